@@ -0,0 +1,16 @@
+"""
+ASGI entry point serving the public read routes, see libs/asgi.py
+
+    uvicorn --factory asgi:create_asgi_app --workers 4
+
+Writes and authenticated reads keep being served by the WSGI app
+(gunicorn "app:create_app()"), the proxy in front routes by path and method.
+"""
+from typing import Mapping
+
+
+def create_asgi_app(config: Mapping = None):
+    from app import create_app
+    from libs.asgi import PublicReadApp
+
+    return PublicReadApp(create_app(config))
@@ -0,0 +1,330 @@
+"""
+Compare WSGI and ASGI serving of the public read routes.
+
+Seeds --database-url (see bench.dataset) plus an avatar of --image-kb, then
+starts the WSGI app (gunicorn, threaded workers) and the ASGI app (uvicorn,
+asgi.py) in turn and measures them over real sockets:
+
+* requests/sec and latency of public routes from --concurrency keep-alive
+  connections,
+* memory per held connection: --connections clients request the avatar image
+  and don't read it, growth of server RSS (all its processes) is divided by
+  their number, and latency of a probe request made meanwhile shows whether
+  the slow clients tie up workers.
+
+Run from src/api with the usual app environment, on Linux (RSS is read from
+/proc), gunicorn and uvicorn come with the Pipfile packages:
+
+    python -m bench.asgi --database-url sqlite:////tmp/blog-asgi.db --connections 200
+
+Server commands are templates with {python}, {port}, {workers} and
+{threads}, override them to measure other servers or settings. ASGI app gets
+ASGI_THREADS equal to --threads, so both sides have the same number of threads
+touching the database.
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import os
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+DEFAULT_COMMANDS = {
+    "wsgi": "{python} -m gunicorn --workers {workers} --threads {threads} --worker-class gthread "
+            "--bind 127.0.0.1:{port} app:create_app()",
+    "asgi": "{python} -m uvicorn --factory asgi:create_asgi_app --workers {workers} "
+            "--host 127.0.0.1 --port {port} --log-level warning",
+}
+HOST = "127.0.0.1"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(int(round(pct / 100.0 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def process_tree(pid: int):
+    """pid and all its descendants (gunicorn/uvicorn workers)."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open("/proc/{}/stat".format(entry)) as stat_file:
+                stat = stat_file.read()
+        except OSError:
+            continue
+        # fields after ")" are state and ppid, process name may contain spaces
+        children.setdefault(int(stat.rsplit(")", 1)[1].split()[1]), []).append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, []))
+    return tree
+
+
+def rss_mb(pid: int) -> float:
+    total_kb = 0
+    for process in process_tree(pid):
+        try:
+            with open("/proc/{}/status".format(process)) as status_file:
+                for line in status_file:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+        except OSError:
+            continue
+    return round(total_kb / 1024.0, 1)
+
+
+class Connection:
+    """Minimal HTTP/1.1 keep-alive client, reads whole responses."""
+
+    def __init__(self, port: int):
+        self.port = port
+        self.reader = self.writer = None
+
+    async def get(self, path: str):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(HOST, self.port)
+        self.writer.write("GET {} HTTP/1.1\r\nHost: {}:{}\r\n\r\n".format(path, HOST, self.port).encode("latin1"))
+        await self.writer.drain()
+        head = (await self.reader.readuntil(b"\r\n\r\n")).decode("latin1").split("\r\n")
+        status = int(head[0].split()[1])
+        headers = {}
+        for line in head[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        if "content-length" in headers:
+            await self.reader.readexactly(int(headers["content-length"]))
+        elif headers.get("transfer-encoding") == "chunked":
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                await self.reader.readexactly(size + 2)
+                if not size:
+                    break
+        elif status not in (204, 304):
+            await self.reader.read()
+            headers["connection"] = "close"
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, headers
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def measure_route(port: int, path: str, requests: int, concurrency: int) -> dict:
+    latencies, statuses = [], Counter()
+    numbers = itertools.count()
+
+    async def client():
+        connection = Connection(port)
+        try:
+            while next(numbers) < requests:
+                started = time.perf_counter()
+                status, _ = await connection.get(path)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] += 1
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    wall = time.perf_counter() - started
+    return {
+        "path": path,
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+    }
+
+
+async def hold_connections(port: int, path: str, count: int):
+    """Sockets which requested path and don't read the response."""
+    loop = asyncio.get_event_loop()
+    request = "GET {} HTTP/1.1\r\nHost: {}:{}\r\n\r\n".format(path, HOST, port).encode("latin1")
+    sockets = []
+    for _ in range(count):
+        sock = socket.socket()
+        # small receive window, so the server can't push the whole file into kernel buffers
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.setblocking(False)
+        await loop.sock_connect(sock, (HOST, port))
+        await loop.sock_sendall(sock, request)
+        sockets.append(sock)
+    return sockets
+
+
+async def probe(port: int, path: str, timeout: float):
+    """Latency of one request in milliseconds, None if it didn't finish within timeout."""
+    connection = Connection(port)
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(connection.get(path), timeout)
+    except asyncio.TimeoutError:
+        return None
+    finally:
+        connection.close()
+    return round((time.perf_counter() - started) * 1000, 2)
+
+
+def prepare_database(args) -> dict:
+    """Seed database and give first user an avatar, returns paths to measure."""
+    from werkzeug.datastructures import FileStorage
+
+    from app import create_app
+    from bench.dataset import seed
+    from libs import image_helper
+    from models import ArticleModel, SnippetModel, UserModel
+    from settings.db import db
+
+    with create_app({"SQLALCHEMY_DATABASE_URI": args.database_url}).app_context():
+        if not args.reuse:
+            db.drop_all()
+            db.create_all()
+            seed(users=args.users, articles=args.articles, snippets=args.snippets, seed=args.seed)
+            user = UserModel.query.order_by(UserModel.id).first()
+            # random bytes, served as they are
+            image = FileStorage(io.BytesIO(os.urandom(args.image_kb * 1024)), filename="avatar.png")
+            user.avatar_name = image_helper.save_image(image)
+            db.session.commit()
+        user = UserModel.query.order_by(UserModel.id).first()
+        article = ArticleModel.query.filter(ArticleModel.published_date.isnot(None)).first()
+        snippet = SnippetModel.query.filter(SnippetModel.published_date.isnot(None)).first()
+        return {
+            "articles": "/api/v1/articles",
+            "article": "/api/v1/articles/{}".format(article.slug),
+            "snippets": "/api/v1/snippets",
+            "snippet": "/api/v1/snippets/{}".format(snippet.slug),
+            "user": "/api/v1/users/{}".format(user.username),
+            "avatar": "/api/v1/users/{}/avatar".format(user.username),
+        }
+
+
+async def wait_until_ready(process, port: int, path: str, timeout: float = 60.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited with status {}".format(process.returncode))
+        try:
+            connection = Connection(port)
+            status, _ = await connection.get(path)
+            connection.close()
+            if status == 200:
+                return
+        except OSError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server didn't answer within {} s".format(timeout))
+
+
+async def measure_server(mode: str, args, paths: dict) -> dict:
+    port = free_port()
+    command = args.commands[mode].format(python=shlex.quote(sys.executable), port=port,
+                                         workers=args.workers, threads=args.threads)
+    env = dict(os.environ, DATABASE_URL=args.database_url, ASGI_THREADS=str(args.threads),
+               RESPONSE_CACHE_BACKEND=args.cache_backend)
+    with tempfile.TemporaryFile(mode="w+") as log_file:
+        process = subprocess.Popen(shlex.split(command), stdout=subprocess.DEVNULL, stderr=log_file, env=env)
+        try:
+            await wait_until_ready(process, port, paths["articles"])
+            connection = Connection(port)
+            _, headers = await connection.get(paths["avatar"])
+            connection.close()
+            image_path = urlsplit(headers["location"]).path
+
+            routes = []
+            for name, path in sorted(dict(paths, image=image_path).items()):
+                routes.append(await measure_route(port, path, args.requests, args.concurrency))
+                print("{:<5} {:<60} {:>9.1f} req/s  p95 {:>8.2f} ms".format(
+                    mode, path[:60], routes[-1]["throughput_rps"], routes[-1]["p95_ms"]), file=sys.stderr)
+
+            idle_rss = rss_mb(process.pid)
+            sockets = await hold_connections(port, image_path, args.connections)
+            await asyncio.sleep(args.settle)
+            held_rss = rss_mb(process.pid)
+            probe_ms = await probe(port, paths["articles"], args.probe_timeout)
+            for sock in sockets:
+                sock.close()
+        except Exception:
+            log_file.seek(0)
+            print(log_file.read()[-4000:], file=sys.stderr)
+            raise
+        finally:
+            process.terminate()
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    return {
+        "command": command,
+        "routes": routes,
+        "held_connections": args.connections,
+        "idle_rss_mb": idle_rss,
+        "held_rss_mb": held_rss,
+        "rss_kb_per_held_connection": round((held_rss - idle_rss) * 1024 / args.connections, 2),
+        # None when slow clients occupied every worker thread until timeout
+        "probe_while_held_ms": probe_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:////tmp/blog-asgi.db")
+    parser.add_argument("--reuse", action="store_true", help="keep existing data, don't seed")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--snippets", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--image-kb", type=int, default=4096, help="size of avatar file")
+    parser.add_argument("--modes", nargs="+", default=["wsgi", "asgi"], choices=sorted(DEFAULT_COMMANDS))
+    parser.add_argument("--wsgi-command", default=DEFAULT_COMMANDS["wsgi"])
+    parser.add_argument("--asgi-command", default=DEFAULT_COMMANDS["asgi"])
+    parser.add_argument("--workers", type=int, default=2, help="server processes")
+    parser.add_argument("--threads", type=int, default=4, help="threads per process")
+    parser.add_argument("--cache-backend", default="null", choices=["null", "memory"])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="requests per route")
+    parser.add_argument("--connections", type=int, default=100, help="slow clients held open")
+    parser.add_argument("--settle", type=float, default=2.0, help="seconds before RSS of held connections is read")
+    parser.add_argument("--probe-timeout", type=float, default=10.0)
+    parser.add_argument("--output", help="write results JSON to this file")
+    args = parser.parse_args()
+    args.commands = {"wsgi": args.wsgi_command, "asgi": args.asgi_command}
+
+    paths = prepare_database(args)
+    loop = asyncio.get_event_loop()
+    results = {"database": args.database_url.split(":", 1)[0], "workers": args.workers,
+               "threads": args.threads, "concurrency": args.concurrency, "image_kb": args.image_kb}
+    for mode in args.modes:
+        results[mode] = loop.run_until_complete(measure_server(mode, args, paths))
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=4)
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
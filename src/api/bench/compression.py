@@ -0,0 +1,95 @@
+"""
+Measure response compression of public read routes.
+
+Seeds --database-url (see bench.dataset) and requests every route of ROUTES
+--requests times per encoding (identity, gzip and br when brotli is
+installed) through the test client. Reports body size, compression ratio,
+CPU time spent compressing by the first request (which compresses) and by
+repeated ones (which reuse the memoized body), and median latency.
+
+    python -m bench.compression --database-url sqlite:////tmp/blog-compression.db
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+ROUTES = (
+    "/api/v1/articles/{article}",
+    "/api/v1/articles?limit=20",
+    "/api/v1/articles?limit=100",
+    "/api/v1/snippets?limit=100",
+    "/api/v1/tags?limit=100",
+    "/api/v1/search?q=python",
+)
+
+
+def compression_cpu_ms(compression, endpoint: str, encoding: str) -> float:
+    return compression.stats()["endpoints"].get(endpoint, {}).get(encoding, {}).get("cpu_ms", 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:////tmp/blog-compression.db")
+    parser.add_argument("--reuse", action="store_true", help="keep existing data, don't seed")
+    parser.add_argument("--articles", type=int, default=500)
+    parser.add_argument("--snippets", type=int, default=300)
+    parser.add_argument("--requests", type=int, default=50, help="requests per route and encoding")
+    parser.add_argument("--cache-backend", default="memory", choices=["null", "memory"])
+    args = parser.parse_args()
+
+    from app import create_app
+    from bench.dataset import seed
+    from models import ArticleModel
+    from settings.compression import compression
+    from settings.db import db
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": args.database_url, "RESPONSE_CACHE_BACKEND": args.cache_backend})
+    with app.app_context():
+        if not args.reuse:
+            db.drop_all()
+            db.create_all()
+            seed(articles=args.articles, snippets=args.snippets)
+        article = ArticleModel.query.filter(ArticleModel.published_date != None).order_by(ArticleModel.id).first()
+        slug = article.slug
+        db.session.remove()
+
+    client = app.test_client()
+    results = []
+    for route in ROUTES:
+        path = route.format(article=slug)
+        identity_size = None
+        for encoding in ("identity",) + compression.encodings:
+            endpoint = app.url_map.bind("localhost").match(path.split("?")[0])[0]
+            spent = [compression_cpu_ms(compression, endpoint, encoding)]
+            latencies, size = [], 0
+            for number in range(args.requests):
+                started = time.perf_counter()
+                response = client.get(path, headers={"Accept-Encoding": encoding})
+                latencies.append((time.perf_counter() - started) * 1000)
+                size = len(response.get_data())
+                if number == 0:
+                    spent.append(compression_cpu_ms(compression, endpoint, encoding))
+            spent.append(compression_cpu_ms(compression, endpoint, encoding))
+            if identity_size is None:
+                identity_size = size
+            results.append({
+                "route": path,
+                "encoding": encoding,
+                "bytes": size,
+                "ratio": round(identity_size / size, 2) if size else 0.0,
+                "first_compression_cpu_ms": round(spent[1] - spent[0], 4),
+                "repeated_compression_cpu_ms": round((spent[2] - spent[1]) / max(args.requests - 1, 1), 4),
+                "p50_ms": round(statistics.median(latencies), 3),
+            })
+            print("{:<40} {:<8} {:>9} bytes  x{:<6} cpu ms first {:>8.4f} repeated {:>7.4f}  p50 {:>7.3f} ms".format(
+                path, encoding, size, results[-1]["ratio"], results[-1]["first_compression_cpu_ms"],
+                results[-1]["repeated_compression_cpu_ms"], results[-1]["p50_ms"]), file=sys.stderr)
+
+    print(json.dumps({"requests_per_route": args.requests, "cache_backend": args.cache_backend,
+                      "compression": compression.stats(), "routes": results}, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Synthetic blog dataset for benchmarks
+
+Users, tags, articles with multi paragraph content and code, likes and
+snippets, written through the models (so published articles are rendered and
+indexed for search) in batches of one commit each. Same seed gives the same
+dataset, so runs against fresh databases are comparable.
+"""
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from models import ArticleModel, SnippetModel, TagModel, UserModel
+from models.article import article_likes
+from settings.db import db
+from settings.search import search_index
+
+WORDS = ("python", "flask", "query", "index", "cache", "generator", "async", "schema",
+         "cursor", "thread", "process", "lambda", "decorator", "closure", "iterator",
+         "database", "transaction", "request", "response", "worker", "profile", "memory")
+LANGUAGES = ("python", "javascript", "sql", "bash", "go")
+CODE = {
+    "python": "def {name}(items):\n    return [item * {n} for item in items if item]\n",
+    "javascript": "const {name} = (items) => items.filter(Boolean).map((item) => item * {n});\n",
+    "sql": "SELECT id, title FROM blog_article WHERE likes_count > {n} ORDER BY id;  -- {name}\n",
+    "bash": "for file in *.log; do gzip -{n} \"$file\"; done  # {name}\n",
+    "go": "func {name}(items []int) int {{\n\treturn len(items) * {n}\n}}\n",
+}
+PASSWORD = "bench-password"
+BATCH_SIZE = 200
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def code(rng: random.Random, language: str) -> str:
+    return CODE[language].format(name="_".join(rng.sample(WORDS, 2)), n=rng.randrange(2, 10))
+
+
+def article_content(rng: random.Random) -> list:
+    """3-8 paragraphs of 40-150 words, most of them with a code block."""
+    content = []
+    for _ in range(rng.randrange(3, 9)):
+        paragraph = {"paragraph_title": sentence(rng, 4).capitalize(),
+                     "content": sentence(rng, rng.randrange(40, 151))}
+        if rng.random() < 0.7:
+            language = rng.choice(LANGUAGES)
+            paragraph["code"] = {"language": language, "content": code(rng, language) * rng.randrange(1, 6)}
+        content.append(paragraph)
+    return content
+
+
+def _commit_in_batches(items, prepare):
+    for index, item in enumerate(items, 1):
+        db.session.add(item)
+        prepare(item)
+        if index % BATCH_SIZE == 0:
+            db.session.commit()
+    db.session.commit()
+
+
+def seed(users: int = 50, tags: int = 30, articles: int = 1000, snippets: int = 500,
+         likes: int = 5, published: float = 0.8, seed: int = 0) -> dict:
+    """
+    Fill empty database, must be called in app context. Returns numbers of
+    created rows. Every user has PASSWORD, `likes` is average per article.
+    """
+    rng = random.Random(seed)
+    started = datetime(2020, 1, 1)
+
+    # hashing is slow on purpose, all users share one hash
+    password_hash = None
+    user_rows = []
+    for i in range(1, users + 1):
+        user = UserModel(username="user{}".format(i), email="user{}@example.com".format(i),
+                         active=True, created_date=started)
+        if password_hash is None:
+            user.set_password(PASSWORD)
+            password_hash = user.password
+        user.password = password_hash
+        user_rows.append(user)
+    _commit_in_batches(user_rows, lambda user: None)
+    user_ids = [user_id for (user_id,) in db.session.query(UserModel.id).order_by(UserModel.id)]
+
+    tag_rows = [TagModel(name="tag-{}".format(i), updated_date=started) for i in range(1, tags + 1)]
+    _commit_in_batches(tag_rows, lambda tag: None)
+
+    article_rows = []
+    for i in range(1, articles + 1):
+        created = started + timedelta(minutes=i)
+        article = ArticleModel(
+            title="Article {} {}".format(i, sentence(rng, 3)),
+            description=sentence(rng, 20),
+            content=article_content(rng),
+            author_id=rng.choice(user_ids),
+            created_date=created,
+            published_date=created if rng.random() < published else None,
+            updated_date=created,
+            image_url="bench.png",
+        )
+        article.tags = rng.sample(tag_rows, min(3, tags))
+        article_rows.append(article)
+
+    def prepare_article(article):
+        article.render()
+        search_index.index_article(article)
+
+    _commit_in_batches(article_rows, prepare_article)
+
+    authors = db.session.query(ArticleModel.id, ArticleModel.author_id).order_by(ArticleModel.id).all()
+    like_rows = set()
+    for _ in range(likes * articles):
+        user_id, (article_id, author_id) = rng.choice(user_ids), rng.choice(authors)
+        if user_id != author_id:
+            like_rows.add((user_id, article_id))
+    if like_rows:
+        db.session.execute(article_likes.insert(), [
+            {"user_id": user_id, "article_id": article_id} for user_id, article_id in sorted(like_rows)])
+        counts = db.session.query(article_likes.c.article_id, func.count()).group_by(article_likes.c.article_id)
+        table = ArticleModel.__table__
+        for article_id, count in counts.all():
+            db.session.execute(table.update().where(table.c.id == article_id).values(likes_count=count))
+        db.session.commit()
+
+    snippet_rows = []
+    for i in range(1, snippets + 1):
+        created = started + timedelta(minutes=i)
+        language = rng.choice(LANGUAGES)
+        snippet = SnippetModel(
+            title="Snippet {} {}".format(i, sentence(rng, 3)),
+            description=sentence(rng, 15),
+            code=code(rng, language) * rng.randrange(1, 10),
+            language=language,
+            author="user{}".format(rng.randrange(1, users + 1)),
+            created_date=created,
+            published_date=created if rng.random() < published else None,
+            updated_date=created,
+        )
+        snippet.tags = rng.sample(tag_rows, min(2, tags))
+        snippet_rows.append(snippet)
+    _commit_in_batches(snippet_rows, search_index.index_snippet)
+
+    # rows aren't saved through save_to_db, which keeps tag counts
+    TagModel.recount()
+    db.session.commit()
+
+    return {"users": users, "tags": tags, "articles": articles, "snippets": snippets, "likes": len(like_rows)}
@@ -0,0 +1,565 @@
+"""
+Drive every API route under concurrency against a freshly seeded database.
+
+Seeds the database given by --database-url with synthetic dataset (see
+bench.dataset), then runs each route in turn from --concurrency threads through
+Flask test client, in this process, so SQL queries and commits are counted per
+request.
+Run from src/api with the usual app environment (.env):
+
+    python -m bench.load --database-url sqlite:////tmp/blog-bench.db \
+        --articles 1000 --requests 200 --output bench.json
+
+    python -m bench.load --database-url postgresql://localhost/blog_bench \
+        --baseline bench.json --threshold 10
+
+Database is dropped and created again unless --reuse is given. Uploads write
+one small PNG into the image store. Exits with status 1 when any route got
+slower, lost throughput or runs more queries or commits by more than
+--threshold percent compared to --baseline, or peak RSS grew by more than that.
+"""
+import argparse
+import io
+import itertools
+import json
+import random
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, deque, namedtuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# request passed to test client, done(response) is called after it's answered
+Call = namedtuple("Call", "path json data headers done")
+Call.__new__.__defaults__ = (None, None, None, None)
+Scenario = namedtuple("Scenario", "method rule make")
+
+LIST_QUERIES = ("", "?limit=50", "?sort=asc", "?tag=tag-1", "?author=user2")
+SEARCH_QUERIES = ("python", "flask cache", "database transaction", "generator", "worker memory")
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(int(round(pct / 100.0 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def tiny_png() -> bytes:
+    """Valid 1x1 PNG, image uploads don't need anything bigger."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(b"\x00\xff\x00\x00")) + chunk(b"IEND", b""))
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0), 1)
+
+
+class Pools:
+    """Slugs moved between routes, e.g. created by POST and deleted by DELETE."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = {}
+
+    def take(self, name):
+        with self.lock:
+            pool = self.items.get(name)
+            return pool.popleft() if pool else None
+
+    def put(self, name, item):
+        with self.lock:
+            self.items.setdefault(name, deque()).append(item)
+
+
+class Bench:
+    """Seeded data, tokens and pools shared by scenarios."""
+
+    def __init__(self, app, args):
+        from flask_jwt_extended import create_access_token, create_refresh_token
+        from models import ArticleModel, SnippetModel, TagModel, UserModel
+
+        self.app = app
+        self.png = tiny_png()
+        self.pools = Pools()
+        self.counter = itertools.count(1)
+        self.image_path = None
+        with app.app_context():
+            self.users = [(user.id, user.username) for user in UserModel.query.order_by(UserModel.id)]
+            self.tags = [tag.name for tag in TagModel.query.order_by(TagModel.id)]
+            articles = ArticleModel.query.with_entities(
+                ArticleModel.id, ArticleModel.slug, ArticleModel.published_date).order_by(ArticleModel.id).all()
+            snippets = SnippetModel.query.with_entities(
+                SnippetModel.slug, SnippetModel.published_date).order_by(SnippetModel.id).all()
+            self.access = {user_id: create_access_token(identity=user_id, fresh=True, expires_delta=False)
+                           for user_id, _ in self.users}
+            self.refresh = {user_id: create_refresh_token(user_id, expires_delta=False)
+                            for user_id, _ in self.users}
+        self.article_ids = [row.id for row in articles if row.published_date]
+        self.published_articles = [row.slug for row in articles if row.published_date]
+        self.draft_articles = [row.slug for row in articles if not row.published_date]
+        self.published_snippets = [row.slug for row in snippets if row.published_date]
+        self.draft_snippets = [row.slug for row in snippets if not row.published_date]
+        # toggled back and forth by publish/unpublish and approve/revoke routes
+        for slug in self.published_articles[:args.requests]:
+            self.pools.put("published_articles", slug)
+        for slug in self.draft_snippets[:args.requests]:
+            self.pools.put("draft_snippets", slug)
+
+    def user(self):
+        return random.choice(self.users)
+
+    def auth(self, user_id=None, token=None):
+        if token is None:
+            token = self.access[user_id if user_id is not None else self.user()[0]]
+        return {"Authorization": "Bearer {}".format(token)}
+
+    def fresh_token(self, user_id):
+        from flask_jwt_extended import create_access_token
+        with self.app.app_context():
+            return create_access_token(identity=user_id, fresh=True, expires_delta=False)
+
+    def image(self, name="image.png"):
+        return {"image": (io.BytesIO(self.png), name)}
+
+    def article_json(self, title):
+        return {
+            "title": title,
+            "description": "Benchmark article",
+            "content": [{"paragraph_title": "First", "content": "Lorem ipsum " * 50,
+                         "code": {"language": "python", "content": "print('bench')\n" * 5}}],
+        }
+
+    def snippet_json(self, title):
+        return {"title": title, "description": "Benchmark snippet", "code": "print('bench')\n" * 5,
+                "language": "python", "author": self.user()[1],
+                "tags": [{"name": name} for name in random.sample(self.tags, min(2, len(self.tags)))]}
+
+    def moved(self, target, slug, make_call):
+        """Call for slug taken from source pool, put into target pool once answered."""
+        if slug is None:
+            return None
+        call = make_call(slug)
+        return call._replace(done=lambda response: self.pools.put(target, slug))
+
+    def avatar_image_path(self):
+        from libs.image_serving import get_image_url
+        from models import UserModel
+        if self.image_path is None:
+            with self.app.test_request_context():
+                avatars = UserModel.query.filter(UserModel.avatar_name != None, UserModel.avatar_name != "")
+                urls = [get_image_url(user.avatar_name, "avatars") for user in avatars.limit(1)]
+            self.image_path = urls[0] if urls and urls[0] else ""
+        return self.image_path
+
+
+def user_scenarios():
+    def login(bench):
+        from bench.dataset import PASSWORD
+        return Call("/api/v1/login", json={"username": bench.user()[1], "password": PASSWORD})
+
+    def logout(bench):
+        # token is revoked, every call needs a new one
+        return Call("/api/v1/logout", headers=bench.auth(token=bench.fresh_token(bench.user()[0])))
+
+    def refresh(bench):
+        return Call("/api/v1/refresh", headers=bench.auth(token=bench.refresh[bench.user()[0]]))
+
+    def avatar(method):
+        def make(bench):
+            user_id, username = bench.user()
+            return Call("/api/v1/users/{}/avatar".format(username), headers=bench.auth(user_id),
+                        data=bench.image() if method == "PUT" else None)
+        return make
+
+    def image(bench):
+        path = bench.avatar_image_path()
+        return Call(path) if path else None
+
+    return [
+        Scenario("POST", "/api/v1/login", login),
+        Scenario("POST", "/api/v1/refresh", refresh),
+        Scenario("GET", "/api/v1/users/<string:username>",
+                 lambda bench: Call("/api/v1/users/{}".format(bench.user()[1]))),
+        Scenario("PUT", "/api/v1/users/<string:username>/avatar", avatar("PUT")),
+        Scenario("GET", "/api/v1/users/<string:username>/avatar",
+                 lambda bench: Call("/api/v1/users/{}/avatar".format(bench.user()[1]))),
+        Scenario("GET", "/api/v1/images/<string:folder>/<string:digest>/<path:filename>", image),
+        Scenario("DELETE", "/api/v1/users/<string:username>/avatar", avatar("DELETE")),
+        Scenario("POST", "/api/v1/logout", logout),
+    ]
+
+
+def article_scenarios():
+    def create(bench):
+        from slugify import slugify
+        title = "Bench article {}".format(next(bench.counter))
+        return Call("/api/v1/articles", json=bench.article_json(title), headers=bench.auth(),
+                    done=lambda response: bench.pools.put("created_articles", slugify(title)))
+
+    def created(make_call):
+        """Route called with article created by POST, returned to the pool afterwards."""
+        def make(bench):
+            slug = bench.pools.take("created_articles")
+            return bench.moved("created_articles", slug, make_call(bench))
+        return make
+
+    def change_title(bench):
+        from slugify import slugify
+        slug = bench.pools.take("created_articles")
+        if slug is None:
+            return None
+        title = "Bench article {}".format(next(bench.counter))
+        return Call("/api/v1/articles/{}/new-title".format(slug), json={"title": title}, headers=bench.auth(),
+                    done=lambda response: bench.pools.put("created_articles", slugify(title)))
+
+    def delete(bench):
+        slug = bench.pools.take("created_articles")
+        return Call("/api/v1/articles/{}".format(slug), headers=bench.auth()) if slug else None
+
+    def toggle(path, source, target):
+        def make(bench):
+            return bench.moved(target, bench.pools.take(source), lambda slug: Call(
+                "/api/v1/articles/{}/{}".format(slug, path), headers=bench.auth()))
+        return make
+
+    def like(path):
+        def make(bench):
+            return Call("/api/v1/articles/{}/{}".format(random.choice(bench.published_articles), path),
+                        headers=bench.auth())
+        return make
+
+    def liked(bench):
+        ids = random.sample(bench.article_ids, min(20, len(bench.article_ids)))
+        return Call("/api/v1/articles/liked?ids={}".format(",".join(map(str, ids))), headers=bench.auth())
+
+    return [
+        Scenario("GET", "/api/v1/articles",
+                 lambda bench: Call("/api/v1/articles" + random.choice(LIST_QUERIES))),
+        Scenario("GET", "/api/v1/articles/<string:slug>",
+                 lambda bench: Call("/api/v1/articles/" + random.choice(bench.published_articles))),
+        Scenario("GET", "/api/v1/articles/<string:slug>/html",
+                 lambda bench: Call("/api/v1/articles/{}/html".format(random.choice(bench.published_articles)))),
+        Scenario("GET", "/api/v1/articles/draft",
+                 lambda bench: Call("/api/v1/articles/draft" + random.choice(LIST_QUERIES), headers=bench.auth())),
+        Scenario("GET", "/api/v1/articles/draft/<string:slug>",
+                 lambda bench: Call("/api/v1/articles/draft/" + random.choice(bench.draft_articles),
+                                       headers=bench.auth()) if bench.draft_articles else None),
+        Scenario("POST", "/api/v1/articles", create),
+        Scenario("PUT", "/api/v1/articles/<string:slug>", created(lambda bench: lambda slug: Call(
+            "/api/v1/articles/" + slug, json=bench.article_json(slug), headers=bench.auth()))),
+        Scenario("PUT", "/api/v1/articles/<string:slug>/tags", created(lambda bench: lambda slug: Call(
+            "/api/v1/articles/{}/tags".format(slug), json={"tags": random.sample(bench.tags, min(3, len(bench.tags)))},
+            headers=bench.auth()))),
+        Scenario("PUT", "/api/v1/articles/<string:slug>/image", created(lambda bench: lambda slug: Call(
+            "/api/v1/articles/{}/image".format(slug), data=bench.image(), headers=bench.auth()))),
+        Scenario("POST", "/api/v1/articles/<string:slug>/unpublish",
+                 toggle("unpublish", "published_articles", "unpublished_articles")),
+        Scenario("POST", "/api/v1/articles/<string:slug>/publish",
+                 toggle("publish", "unpublished_articles", "published_articles")),
+        Scenario("POST", "/api/v1/articles/<string:slug>/like", like("like")),
+        Scenario("POST", "/api/v1/articles/<string:slug>/revoke-like", like("revoke-like")),
+        Scenario("GET", "/api/v1/articles/liked", liked),
+        Scenario("POST", "/api/v1/articles/<string:slug>/new-title", change_title),
+        Scenario("DELETE", "/api/v1/articles/<string:slug>", delete),
+    ]
+
+
+def snippet_scenarios():
+    def create(bench):
+        from slugify import slugify
+        title = "Bench snippet {}".format(next(bench.counter))
+        return Call("/api/v1/snippets", json=bench.snippet_json(title),
+                    done=lambda response: bench.pools.put("created_snippets", slugify(title)))
+
+    def update(bench):
+        return bench.moved("created_snippets", bench.pools.take("created_snippets"),
+                           lambda slug: Call("/api/v1/snippets/" + slug, json=bench.snippet_json(slug),
+                                             headers=bench.auth()))
+
+    def delete(bench):
+        slug = bench.pools.take("created_snippets")
+        return Call("/api/v1/snippets/" + slug, headers=bench.auth()) if slug else None
+
+    def toggle(path, source, target):
+        def make(bench):
+            return bench.moved(target, bench.pools.take(source), lambda slug: Call(
+                "/api/v1/snippets/{}/{}".format(slug, path), headers=bench.auth()))
+        return make
+
+    return [
+        Scenario("GET", "/api/v1/snippets",
+                 lambda bench: Call("/api/v1/snippets" + random.choice(LIST_QUERIES))),
+        Scenario("GET", "/api/v1/snippets/<string:slug>",
+                 lambda bench: Call("/api/v1/snippets/" + random.choice(bench.published_snippets))),
+        Scenario("GET", "/api/v1/snippets-not-approved",
+                 lambda bench: Call("/api/v1/snippets-not-approved" + random.choice(LIST_QUERIES),
+                                       headers=bench.auth())),
+        Scenario("GET", "/api/v1/snippets-not-approved/<string:slug>",
+                 lambda bench: Call("/api/v1/snippets-not-approved/" + random.choice(bench.draft_snippets))
+                 if bench.draft_snippets else None),
+        Scenario("POST", "/api/v1/snippets", create),
+        Scenario("PUT", "/api/v1/snippets/<string:slug>", update),
+        Scenario("POST", "/api/v1/snippets/<string:slug>/approve",
+                 toggle("approve", "draft_snippets", "approved_snippets")),
+        Scenario("POST", "/api/v1/snippets/<string:slug>/revoke",
+                 toggle("revoke", "approved_snippets", "draft_snippets")),
+        Scenario("DELETE", "/api/v1/snippets/<string:slug>", delete),
+    ]
+
+
+def other_scenarios():
+    def search(bench):
+        query = random.choice(SEARCH_QUERIES)
+        kind = random.choice(("", "&type=article", "&type=snippet"))
+        return Call("/api/v1/search?q={}{}".format(query.replace(" ", "+"), kind))
+
+    def bulk_import(bench):
+        lines = [json.dumps(bench.snippet_json("Bulk snippet {}".format(next(bench.counter)))) for _ in range(20)]
+        return Call("/api/v1/bulk/snippets", data="\n".join(lines), headers=bench.auth())
+
+    return [
+        Scenario("GET", "/api/v1/search", search),
+        Scenario("GET", "/api/v1/tags",
+                 lambda bench: Call("/api/v1/tags" + random.choice(("", "?type=article", "?sort=name&limit=50")))),
+        Scenario("GET", "/api/v1/tags/<string:name>/articles",
+                 lambda bench: Call("/api/v1/tags/{}/articles".format(random.choice(bench.tags)))),
+        Scenario("GET", "/api/v1/tags/<string:name>/snippets",
+                 lambda bench: Call("/api/v1/tags/{}/snippets".format(random.choice(bench.tags)))),
+        Scenario("GET", "/api/v1/bulk/<any(articles, snippets):kind>",
+                 lambda bench: Call("/api/v1/bulk/snippets", headers=bench.auth())),
+        Scenario("POST", "/api/v1/bulk/<any(articles, snippets):kind>", bulk_import),
+        Scenario("GET", "/api/v1/cache", lambda bench: Call("/api/v1/cache", headers=bench.auth())),
+        Scenario("DELETE", "/api/v1/cache", lambda bench: Call("/api/v1/cache", headers=bench.auth())),
+        Scenario("GET", "/api/v1/images/processing",
+                 lambda bench: Call("/api/v1/images/processing", headers=bench.auth())),
+    ]
+
+
+SCENARIOS = user_scenarios() + article_scenarios() + snippet_scenarios() + other_scenarios()
+
+
+class QueryCounter:
+    """Counts statements (and their time) and commits executed by current thread."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.local = threading.local()
+        event.listen(engine, "before_cursor_execute", self.before)
+        event.listen(engine, "after_cursor_execute", self.after)
+        event.listen(engine, "commit", self.commit)
+
+    def reset(self):
+        self.local.count = 0
+        self.local.seconds = 0.0
+        self.local.commits = 0
+
+    def before(self, conn, cursor, statement, parameters, context, executemany):
+        self.local.started = time.perf_counter()
+
+    def after(self, conn, cursor, statement, parameters, context, executemany):
+        if hasattr(self.local, "count"):
+            self.local.count += 1
+            self.local.seconds += time.perf_counter() - self.local.started
+
+    def commit(self, conn):
+        if hasattr(self.local, "commits"):
+            self.local.commits += 1
+
+
+def run_scenario(bench, scenario, queries, requests, concurrency):
+    lock = threading.Lock()
+    latencies, query_counts, query_seconds, commit_counts, sizes = [], [], [], [], []
+    statuses = Counter()
+    numbers = itertools.count()
+
+    def worker():
+        client = bench.app.test_client()
+        while next(numbers) < requests:
+            call = scenario.make(bench)
+            if call is None:
+                with lock:
+                    statuses["skipped"] += 1
+                continue
+            queries.reset()
+            started = time.perf_counter()
+            try:
+                response = client.open(call.path, method=scenario.method, json=call.json, data=call.data,
+                                       headers=call.headers)
+                status, size = response.status_code, len(response.get_data())
+            except Exception:
+                # PROPAGATE_EXCEPTIONS lets errors out of test client
+                response, status, size = None, 500, 0
+            elapsed = time.perf_counter() - started
+            if call.done and response is not None and status < 400:
+                call.done(response)
+            with lock:
+                statuses[status] += 1
+                latencies.append(elapsed)
+                query_counts.append(queries.local.count)
+                query_seconds.append(queries.local.seconds)
+                commit_counts.append(queries.local.commits)
+                sizes.append(size)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    answered = len(latencies) or 1
+    return {
+        "route": "{} {}".format(scenario.method, scenario.rule),
+        "requests": len(latencies),
+        "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+        "errors": sum(count for status, count in statuses.items() if status != "skipped" and status >= 500),
+        "throughput_rps": round(len(latencies) / wall, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "queries_per_request": round(sum(query_counts) / answered, 2),
+        "query_ms_per_request": round(sum(query_seconds) * 1000 / answered, 2),
+        "commits_per_request": round(sum(commit_counts) / answered, 2),
+        "response_bytes": int(sum(sizes) / answered),
+    }
+
+
+def uncovered_routes(app):
+    covered = {(scenario.method, scenario.rule) for scenario in SCENARIOS}
+    missing = []
+    for rule in app.url_map.iter_rules():
+        if rule.endpoint == "static":
+            continue
+        for method in sorted(rule.methods - {"HEAD", "OPTIONS"}):
+            if (method, rule.rule) not in covered:
+                missing.append("{} {}".format(method, rule.rule))
+    return missing
+
+
+def compare(results, baseline, threshold):
+    """Changes worse than threshold percent: lower throughput, higher p95, more queries, commits or memory."""
+    def change(new, old):
+        return (new - old) * 100.0 / old if old else 0.0
+
+    regressions = []
+    before = {route["route"]: route for route in baseline.get("routes", [])}
+    for route in results["routes"]:
+        old = before.get(route["route"])
+        if not old or not route["requests"] or not old["requests"]:
+            continue
+        checks = (
+            ("throughput_rps", -change(route["throughput_rps"], old["throughput_rps"]), True),
+            # sub-millisecond and fractional-query differences are noise
+            ("p95_ms", change(route["p95_ms"], old["p95_ms"]), route["p95_ms"] - old["p95_ms"] >= 1),
+            ("queries_per_request", change(route["queries_per_request"], old["queries_per_request"]),
+             route["queries_per_request"] - old["queries_per_request"] >= 0.5),
+            ("commits_per_request", change(route["commits_per_request"], old.get("commits_per_request", 0)),
+             route["commits_per_request"] - old.get("commits_per_request", 0) >= 0.5),
+        )
+        for metric, percent, significant in checks:
+            if significant and percent > threshold:
+                regressions.append({"route": route["route"], "metric": metric, "baseline": old[metric],
+                                    "current": route[metric], "change_pct": round(percent, 1)})
+    rss_change = change(results["peak_rss_mb"], baseline.get("peak_rss_mb", 0))
+    if rss_change > threshold:
+        regressions.append({"route": None, "metric": "peak_rss_mb", "baseline": baseline["peak_rss_mb"],
+                            "current": results["peak_rss_mb"], "change_pct": round(rss_change, 1)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:////tmp/blog-bench.db")
+    parser.add_argument("--reuse", action="store_true", help="keep existing data, don't seed")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--tags", type=int, default=30)
+    parser.add_argument("--articles", type=int, default=1000)
+    parser.add_argument("--snippets", type=int, default=500)
+    parser.add_argument("--likes", type=int, default=5, help="average likes per article")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--routes", nargs="+", help="run only routes containing any of these strings")
+    parser.add_argument("--cache-backend", default="null", choices=["null", "memory", "redis"])
+    parser.add_argument("--output", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="results JSON of earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    from app import create_app
+    from settings.db import db
+    from bench.dataset import seed
+
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": args.database_url,
+        "RESPONSE_CACHE_BACKEND": args.cache_backend,
+        # logins are measured, not throttled
+        "LOGIN_THROTTLE_USERNAME_LIMIT": 10 ** 9,
+        "LOGIN_THROTTLE_IP_LIMIT": 10 ** 9,
+    })
+
+    dataset, seed_seconds = None, 0.0
+    with app.app_context():
+        engine = db.engine
+        if not args.reuse:
+            started = time.perf_counter()
+            db.drop_all()
+            db.create_all()
+            dataset = seed(users=args.users, tags=args.tags, articles=args.articles, snippets=args.snippets,
+                           likes=args.likes, seed=args.seed)
+            seed_seconds = round(time.perf_counter() - started, 2)
+            db.session.remove()
+
+    queries = QueryCounter(engine)
+    bench = Bench(app, args)
+    random.seed(args.seed)
+    routes = []
+    for scenario in SCENARIOS:
+        name = "{} {}".format(scenario.method, scenario.rule)
+        if args.routes and not any(part in name for part in args.routes):
+            continue
+        routes.append(run_scenario(bench, scenario, queries, args.requests, args.concurrency))
+        print("{:<75} {:>9.1f} req/s  p95 {:>8.2f} ms".format(
+            name, routes[-1]["throughput_rps"], routes[-1]["p95_ms"]), file=sys.stderr)
+
+    results = {
+        "database": engine.dialect.name,
+        "dataset": dataset,
+        "seed_seconds": seed_seconds,
+        "concurrency": args.concurrency,
+        "requests_per_route": args.requests,
+        "cache_backend": args.cache_backend,
+        "peak_rss_mb": peak_rss_mb(),
+        "not_benchmarked": uncovered_routes(app),
+        "routes": routes,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        results["regressions"] = regressions
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=4)
+    print(json.dumps(results, indent=4))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
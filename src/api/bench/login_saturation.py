@@ -0,0 +1,104 @@
+"""
+Saturate UserLogin with valid logins and measure how unrelated GETs cope.
+
+Run against a running deployment (from src/api):
+
+    python -m bench.login_saturation --base-url http://localhost:5000 \
+        --username bench --password secret --login-threads 32 --duration 30
+
+Raise LOGIN_THROTTLE_USERNAME_LIMIT / LOGIN_THROTTLE_IP_LIMIT on the server
+first, otherwise most logins are answered by the throttle instead of bcrypt.
+"""
+import argparse
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(int(round(pct / 100.0 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def request(url, body=None):
+    """Send request, return (status, seconds)."""
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as err:
+        status = err.code
+    except urllib.error.URLError:
+        status = 0
+    return status, time.perf_counter() - started
+
+
+def worker(stop, func, statuses, latencies, lock):
+    while not stop.is_set():
+        status, elapsed = func()
+        with lock:
+            statuses[status] += 1
+            latencies.append(elapsed)
+
+
+def run_phase(args, login_threads):
+    stop = threading.Event()
+    lock = threading.Lock()
+    login_statuses, login_latencies = Counter(), []
+    get_statuses, get_latencies = Counter(), []
+
+    login_url = args.base_url + "/api/v1/login"
+    credentials = {"username": args.username, "password": args.password}
+    get_url = args.base_url + args.get_path
+
+    threads = [threading.Thread(target=worker, args=(stop, lambda: request(login_url, credentials),
+                                                     login_statuses, login_latencies, lock))
+               for _ in range(login_threads)]
+    threads += [threading.Thread(target=worker, args=(stop, lambda: request(get_url),
+                                                      get_statuses, get_latencies, lock))
+                for _ in range(args.get_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "login_threads": login_threads,
+        "logins_per_sec": round(login_statuses[200] / args.duration, 2),
+        "login_statuses": dict(login_statuses),
+        "get_requests_per_sec": round(len(get_latencies) / args.duration, 2),
+        "get_statuses": dict(get_statuses),
+        "get_p50_ms": round(percentile(get_latencies, 50) * 1000, 2),
+        "get_p99_ms": round(percentile(get_latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--get-path", default="/api/v1/articles")
+    parser.add_argument("--login-threads", type=int, default=32)
+    parser.add_argument("--get-threads", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30)
+    args = parser.parse_args()
+
+    # baseline without logins first, so GET latency under load has a reference
+    results = [run_phase(args, 0), run_phase(args, args.login_threads)]
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Compare compiled dump functions with plain marshmallow Schema.dump.
+
+Serializes synthetic (never saved) articles, snippets, tags and users, both
+ways, and reports time of each and whether their JSON is identical:
+
+    python -m bench.serialization --sizes 1000 10000 --repeat 3
+
+Identical output of edge cases (null dates, missing author, empty content) is
+checked by tests/test_serializer.py.
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from marshmallow import Schema
+
+from models import ArticleModel, SnippetModel, TagModel, UserModel
+from schemas.article import ArticleSchema
+from schemas.snippet import SnippetSchema
+from schemas.tag import TagSchema
+from schemas.user import UserSchema
+
+WORDS = ("python", "flask", "query", "index", "cache", "generator", "async", "schema",
+         "cursor", "thread", "process", "lambda", "decorator", "closure", "iterator")
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def make_dataset(size, seed=0):
+    rng = random.Random(seed)
+    started = datetime(2020, 1, 1)
+    tags = [TagModel(id=i, name="tag-{}".format(i), updated_date=started) for i in range(1, 51)]
+    users = [UserModel(id=i, username="user{}".format(i), email="user{}@example.com".format(i),
+                       created_date=started, active=True, is_staff=False, is_superuser=False,
+                       avatar_name=None, avatar_variants=None)
+             for i in range(1, size + 1)]
+    articles, snippets = [], []
+    for i in range(1, size + 1):
+        created = started + timedelta(minutes=i)
+        author = users[rng.randrange(len(users))]
+        article = ArticleModel(
+            id=i, author_id=author.id, title="Article {} {}".format(i, sentence(rng, 3)),
+            description=sentence(rng, 12), created_date=created, published_date=created,
+            updated_date=created, image_url=None, image_variants=None, likes_count=rng.randrange(100),
+            content=[{
+                "paragraph_title": sentence(rng, 4),
+                "content": sentence(rng, 60),
+                "code": {"language": "python", "content": "def f(x):\n    return x * {}\n".format(n)},
+            } for n in range(rng.randrange(1, 6))],
+        )
+        article.author = author
+        article.tags = rng.sample(tags, 3)
+        articles.append(article)
+
+        snippet = SnippetModel(
+            id=i, title="Snippet {} {}".format(i, sentence(rng, 3)), description=sentence(rng, 10),
+            code="print({})\n".format(i) * 5, language="python", author=author.username,
+            created_date=created, published_date=created, updated_date=created,
+        )
+        snippet.tags = rng.sample(tags, 2)
+        snippets.append(snippet)
+    return {"article": articles, "snippet": snippets, "tag": tags * (size // len(tags) or 1), "user": users}
+
+
+def timed(func, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    schemas = {"article": ArticleSchema, "snippet": SnippetSchema, "tag": TagSchema, "user": UserSchema}
+    results = []
+    for size in args.sizes:
+        dataset = make_dataset(size)
+        for name, schema_class in schemas.items():
+            schema = schema_class(many=True)
+            objects = dataset[name]
+            marshmallow_time, expected = timed(
+                lambda: json.dumps(Schema.dump(schema, objects, many=True)), args.repeat)
+            compiled_time, actual = timed(lambda: json.dumps(schema.dump(objects)), args.repeat)
+            results.append({
+                "schema": schema_class.__name__,
+                "objects": len(objects),
+                "marshmallow_ms": round(marshmallow_time * 1000, 2),
+                "compiled_ms": round(compiled_time * 1000, 2),
+                "speedup": round(marshmallow_time / compiled_time, 2),
+                "identical": expected == actual,
+            })
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
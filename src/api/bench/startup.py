@@ -0,0 +1,107 @@
+"""
+Measure worker cold start: app import, create_app() and first responses.
+
+Every run is a fresh interpreter, like a new gunicorn worker without preload
+or a new autoscaled instance. Run from src/api with the usual app environment:
+
+    python -m bench.startup --runs 10 --path /api/v1/articles
+    python -m bench.startup --importtime 20
+
+Database must have schema already (`flask db upgrade`), the default SQLite
+file is created by this script. --importtime lists modules which take most
+of create_app() import time (python -X importtime).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(int(round(pct / 100.0 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+def child(args):
+    """Runs in measured interpreter, prints timings of one cold start."""
+    started = time.perf_counter()
+    from app import create_app
+    imported = time.perf_counter()
+    app = create_app({"SQLALCHEMY_DATABASE_URI": args.database_url})
+    created = time.perf_counter()
+    client = app.test_client()
+    status = client.get(args.path).status_code
+    first = time.perf_counter()
+    client.get(args.path)
+    second = time.perf_counter()
+    print(json.dumps({
+        "import_ms": round((imported - started) * 1000, 2),
+        "create_app_ms": round((created - imported) * 1000, 2),
+        "first_response_ms": round((first - created) * 1000, 2),
+        "second_response_ms": round((second - first) * 1000, 2),
+        "status": status,
+    }))
+
+
+def run_child(args, *python_options):
+    command = [sys.executable] + list(python_options) + [
+        "-m", "bench.startup", "--child", "--database-url", args.database_url, "--path", args.path]
+    started = time.perf_counter()
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return timings, result.stderr
+
+
+def slowest_imports(stderr, count):
+    """Top modules by cumulative import time from -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # nested imports are indented, their time is part of the parent's cumulative time
+        modules.append((int(cumulative), name.rstrip(), len(name) - len(name.lstrip())))
+    top_level = [(cumulative, name.strip()) for cumulative, name, depth in modules if depth <= 1]
+    return [{"module": name, "cumulative_ms": round(cumulative / 1000.0, 2)}
+            for cumulative, name in sorted(top_level, reverse=True)[:count]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:////tmp/blog-startup.db")
+    parser.add_argument("--path", default="/api/v1/articles", help="route requested after start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", type=int, metavar="COUNT", help="list COUNT slowest imports")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    if args.database_url.startswith("sqlite:///") and not os.path.exists(args.database_url[len("sqlite:///"):]):
+        from app import create_app
+        from settings.db import db
+        with create_app({"SQLALCHEMY_DATABASE_URI": args.database_url}).app_context():
+            db.create_all()
+
+    runs = [run_child(args)[0] for _ in range(args.runs)]
+    results = {"path": args.path, "runs": args.runs, "statuses": sorted({run["status"] for run in runs})}
+    for key in ("process_ms", "import_ms", "create_app_ms", "first_response_ms", "second_response_ms"):
+        values = [run[key] for run in runs]
+        results[key] = {"p50": percentile(values, 50), "min": min(values), "max": max(values)}
+    if args.importtime:
+        _, stderr = run_child(args, "-X", "importtime")
+        results["slowest_imports"] = slowest_imports(stderr, args.importtime)
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+from .articles import articles_cli
+from .tokens import tokens_cli
+from .images import images_cli
+from .search import search_cli
+from .bulk import bulk_cli
+from .tags import tags_cli
+from .highlighting import highlighting_cli
@@ -0,0 +1,20 @@
+import click
+from flask.cli import AppGroup
+
+from models.article import ArticleModel
+from settings.cache import cache
+from settings.db import db
+
+articles_cli = AppGroup("articles", help="Manage articles.")
+
+
+@articles_cli.command("render")
+def render_articles():
+    """Render published articles again (e.g. after changing ArticleSchema)."""
+    rendered = 0
+    for article in ArticleModel.query.filter(ArticleModel.published_date != None).yield_per(100):
+        article.render()
+        rendered += 1
+    db.session.commit()
+    cache.invalidate("articles")
+    click.echo("Rendered {} article(s)".format(rendered))
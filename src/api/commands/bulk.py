@@ -0,0 +1,34 @@
+import json
+import sys
+
+import click
+from flask.cli import AppGroup
+
+from libs.bulk import KINDS, export_lines, import_lines
+
+bulk_cli = AppGroup("bulk", help="Export and import articles and snippets as NDJSON.")
+
+
+@bulk_cli.command("export")
+@click.argument("kind", type=click.Choice(KINDS))
+@click.argument("output", type=click.File("w", encoding="utf-8"), default="-")
+def export(kind, output):
+    """Write all articles or snippets to OUTPUT (standard output by default)."""
+    count = 0
+    for line in export_lines(kind):
+        output.write(line)
+        count += 1
+    click.echo("Exported {} {}".format(count, kind), err=True)
+
+
+@bulk_cli.command("import")
+@click.argument("kind", type=click.Choice(KINDS))
+@click.argument("source", type=click.File("rb"), default="-")
+def import_(kind, source):
+    """Import articles or snippets from SOURCE (standard input by default), committing every chunk."""
+    report = import_lines(kind, source)
+    for error in report["errors"]:
+        click.echo("Line {}: {}".format(error["line"], json.dumps(error["errors"])), err=True)
+    click.echo("Imported {} {}, {} line(s) failed".format(report["imported"], kind, report["failed"]))
+    if report["failed"]:
+        sys.exit(1)
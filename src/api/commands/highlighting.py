@@ -0,0 +1,38 @@
+import click
+from flask.cli import AppGroup
+
+from libs.highlighting import article_blocks
+from models import ArticleModel, SnippetModel
+from settings.db import db
+from settings.highlighter import highlighter
+
+highlighting_cli = AppGroup("highlighting", help="Manage highlighted code.")
+
+BATCH_SIZE = 500
+
+
+def _batches(model, *columns):
+    """Columns of all rows in id order, BATCH_SIZE rows at a time."""
+    last_id = 0
+    while True:
+        rows = db.session.query(model.id, *columns).filter(model.id > last_id).order_by(model.id).limit(
+            BATCH_SIZE).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+@highlighting_cli.command("backfill")
+def backfill():
+    """Highlight and store code of snippets and articles saved before it was highlighted (e.g. bulk imported)."""
+    if not highlighter.enabled:
+        raise click.ClickException("Highlighting is disabled or Pygments isn't installed.")
+    stored = 0
+    for rows in _batches(SnippetModel, SnippetModel.code, SnippetModel.language):
+        stored += highlighter.store_missing((row.code, row.language) for row in rows)
+        db.session.commit()
+    for rows in _batches(ArticleModel, ArticleModel.content):
+        stored += highlighter.store_missing(block for row in rows for block in article_blocks(row.content))
+        db.session.commit()
+    click.echo("Highlighted {} code block(s)".format(stored))
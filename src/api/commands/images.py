@@ -0,0 +1,127 @@
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Tuple
+
+import click
+from flask.cli import AppGroup
+
+from libs import image_helper
+from models.article import ArticleModel
+from models.image_blob import ImageBlobModel
+from models.user import UserModel
+from settings.db import db
+
+images_cli = AppGroup("images", help="Manage content-addressed image store.")
+
+# folder, model, field with image name, field with its variants
+LEGACY_IMAGES = (
+    ("avatars", UserModel, "avatar_name", "avatar_variants"),
+    ("article_images", ArticleModel, "image_url", "image_variants"),
+)
+
+
+@images_cli.command("gc")
+@click.option("--grace-minutes", default=60, show_default=True,
+              help="Keep unreferenced blobs this long, in case upload is still being committed.")
+def collect_garbage(grace_minutes):
+    """Delete blobs which are no longer referenced."""
+    released_before = datetime.utcnow() - timedelta(minutes=grace_minutes)
+    deleted, freed = 0, 0
+    for blob in ImageBlobModel.find_unreferenced(released_before):
+        freed += image_helper.delete_blob(blob)
+        deleted += 1
+
+    # files of uploads whose request failed before committing the reference
+    known = {digest for (digest,) in db.session.query(ImageBlobModel.digest)}
+    modified_before = time.time() - grace_minutes * 60
+    for directory, _, filenames in os.walk(image_helper.get_path(image_helper.BLOBS_FOLDER)):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            if os.path.getmtime(path) >= modified_before:
+                continue
+            if image_helper.is_blob_name(filename) and image_helper.get_blob_digest(filename) in known:
+                continue
+            freed += os.path.getsize(path)
+            os.remove(path)
+            deleted += 1
+    click.echo("Deleted {} unreferenced file(s), freed {} bytes".format(deleted, freed))
+
+
+@images_cli.command("migrate")
+def migrate_to_store():
+    """Move avatars and article images from their folders into the store."""
+    report = Counter()
+    for folder, model, name_field, variants_field in LEGACY_IMAGES:
+        for instance in model.query.filter(getattr(model, name_field) != "").all():
+            filename = getattr(instance, name_field)
+            if image_helper.is_blob_name(filename):
+                continue
+            path = image_helper.get_path(filename, folder)
+            if not os.path.isfile(path):
+                report["missing"] += 1
+                continue
+
+            name, size, duplicate = image_helper.import_file(path)
+            digest = image_helper.get_blob_digest(name)
+            variants, imported = _import_variants(filename, folder, digest, getattr(instance, variants_field))
+            setattr(instance, name_field, name)
+            setattr(instance, variants_field, variants)
+            instance.save_to_db()
+
+            # legacy files are removed only once the new name is committed
+            if duplicate:
+                report["duplicates"] += 1
+                report["reclaimed"] += size
+            freed = _remove_legacy_variants(filename, folder)
+            if not imported:
+                report["reclaimed"] += freed
+            os.remove(path)
+            report["migrated"] += 1
+
+    click.echo("Migrated {} image(s), {} of them duplicates, {} missing on disk".format(
+        report["migrated"], report["duplicates"], report["missing"]))
+    click.echo("Reclaimed {} bytes".format(report["reclaimed"]))
+
+
+def _import_variants(filename: str, folder: str, digest: str, variants: dict) -> Tuple[dict, bool]:
+    """
+    Link variants of legacy image next to its blob, unless blob already has
+    its own. Returns variants to store and whether legacy ones were imported.
+    """
+    blob = ImageBlobModel.find_by_digest(digest)
+    if blob.variants:
+        return blob.variants, False
+    if not variants:
+        return None, False
+
+    legacy_stem = image_helper.get_stem(filename)
+    variants_folder = image_helper.get_variants_folder(folder)
+    names = image_helper.get_variant_names(legacy_stem)
+    if not all(os.path.isfile(image_helper.get_path(name, variants_folder)) for name in names):
+        return None, False
+    for name in names:
+        image_helper.import_variant(image_helper.get_path(name, variants_folder),
+                                    name.replace(legacy_stem, digest, 1))
+    variants = {
+        variant: dict(description,
+                      webp=description["webp"].replace(legacy_stem, digest, 1),
+                      jpeg=description["jpeg"].replace(legacy_stem, digest, 1))
+        for variant, description in variants.items()
+    }
+    # committed together with the migrated instance
+    blob.variants = variants
+    return variants, True
+
+
+def _remove_legacy_variants(filename: str, folder: str) -> int:
+    """Remove variants of legacy image, returns their size."""
+    freed = 0
+    variants_folder = image_helper.get_variants_folder(folder)
+    for name in image_helper.get_variant_names(image_helper.get_stem(filename)):
+        path = image_helper.get_path(name, variants_folder)
+        if os.path.isfile(path):
+            freed += os.path.getsize(path)
+            os.remove(path)
+    return freed
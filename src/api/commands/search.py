@@ -0,0 +1,25 @@
+import click
+from flask.cli import AppGroup
+
+from models.article import ArticleModel
+from models.snippet import SnippetModel
+from settings.cache import cache
+from settings.db import db
+from settings.search import search_index
+
+search_cli = AppGroup("search", help="Manage full-text search index.")
+
+
+@search_cli.command("reindex")
+def reindex():
+    """Index all published articles and snippets again (e.g. after enabling search)."""
+    counts = {}
+    for kind, model, index in (("article", ArticleModel, search_index.index_article),
+                               ("snippet", SnippetModel, search_index.index_snippet)):
+        counts[kind] = 0
+        for item in model.query.filter(model.published_date != None).yield_per(500):
+            index(item)
+            counts[kind] += 1
+        db.session.commit()
+    cache.invalidate("search")
+    click.echo("Indexed {article} article(s) and {snippet} snippet(s)".format(**counts))
@@ -0,0 +1,15 @@
+import click
+from flask.cli import AppGroup
+
+from models.tag import TagModel
+from settings.db import db
+
+tags_cli = AppGroup("tags", help="Manage tags.")
+
+
+@tags_cli.command("recount")
+def recount():
+    """Count published articles and snippets of every tag again (e.g. after editing tables by hand)."""
+    TagModel.recount()
+    db.session.commit()
+    click.echo("Recounted {} tag(s)".format(TagModel.query.count()))
@@ -0,0 +1,13 @@
+import click
+from flask.cli import AppGroup
+
+from settings.blacklist import blacklist
+
+tokens_cli = AppGroup("tokens", help="Manage revoked JWT tokens.")
+
+
+@tokens_cli.command("purge")
+def purge_expired_tokens():
+    """Delete revoked tokens which have already expired."""
+    deleted = blacklist.purge_expired()
+    click.echo("Purged {} expired revoked token(s)".format(deleted))
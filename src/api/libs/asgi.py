@@ -0,0 +1,198 @@
+"""
+ASGI serving of the public read routes
+
+PublicReadApp answers GET/HEAD/OPTIONS of PUBLIC_ENDPOINTS (published articles
+and snippets, tags, users, avatars and image files) from an asyncio event
+loop. The views of the Flask app run unchanged, with their caching,
+conditional responses and replica routing, on a pool of ASGI_THREADS threads,
+which is where database queries and serialization happen. The threads never wait for
+clients: response bodies and files are read in chunks on the pool and sent
+by the event loop, so a slow client downloading an avatar or a large article
+costs a coroutine, not a worker.
+
+Everything else answers 404 and stays on the WSGI deployment, proxy routes
+writes and authenticated reads there.
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Tuple
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.wsgi import FileWrapper
+
+PUBLIC_ENDPOINTS = frozenset({
+    "articles.articles",
+    "articles.articledetail",
+    "snippets.snippets",
+    "snippets.snippetdetail",
+    "tags.tags",
+    "tags.tagarticles",
+    "tags.tagsnippets",
+    "users.user",
+    "users.useravatar",
+    "images.image",
+})
+PUBLIC_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# bytes collected on the pool before the first send, JSON responses fit whole
+BUFFER_SIZE = 64 * 1024
+FILE_CHUNK_SIZE = 64 * 1024
+NOT_SERVED_BODY = b'{"message": "Not served by this endpoint"}\n'
+
+
+def _file_wrapper(file, buffer_size: int = 8192) -> FileWrapper:
+    # send_file asks for small chunks, every chunk is one trip to the pool here
+    return FileWrapper(file, FILE_CHUNK_SIZE)
+
+
+def build_environ(scope: dict) -> dict:
+    """WSGI environ of ASGI HTTP scope, public routes have no request body."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/{}".format(scope.get("http_version", "1.1")),
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        "wsgi.file_wrapper": _file_wrapper,
+    }
+    for raw_name, raw_value in scope["headers"]:
+        name, value = raw_name.decode("latin1").lower(), raw_value.decode("latin1")
+        if name == "content-type":
+            key = "CONTENT_TYPE"
+        elif name == "content-length":
+            key = "CONTENT_LENGTH"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = environ[key] + "," + value if key in environ else value
+    return environ
+
+
+class PublicReadApp:
+    """ASGI application serving public read routes of Flask app, see module docstring."""
+
+    def __init__(self, app, threads: int = None):
+        self.app = app
+        self.threads = threads or app.config.get("ASGI_THREADS", 8)
+        self._executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # created lazily, in the worker process of the ASGI server
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="asgi")
+        return self._executor
+
+    async def __call__(self, scope: dict, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError("Unsupported ASGI scope type {}".format(scope["type"]))
+
+        environ = build_environ(scope)
+        if not self.is_public(environ):
+            await send({"type": "http.response.start", "status": 404,
+                        "headers": [(b"content-type", b"application/json"),
+                                    (b"content-length", str(len(NOT_SERVED_BODY)).encode("latin1"))]})
+            await send({"type": "http.response.body", "body": NOT_SERVED_BODY})
+            return
+
+        loop = asyncio.get_event_loop()
+        status, headers, chunks, rest = await loop.run_in_executor(self.executor, self._start, environ)
+        try:
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            stream = rest
+            if environ["REQUEST_METHOD"] == "HEAD":
+                stream = None
+            elif chunks:
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+            while stream is not None:
+                chunk = await loop.run_in_executor(self.executor, next, stream, None)
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            if rest is not None and hasattr(rest, "close"):
+                rest.close()
+
+    def is_public(self, environ: dict) -> bool:
+        if environ["REQUEST_METHOD"] not in PUBLIC_METHODS:
+            return False
+        try:
+            endpoint, _ = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return False
+        return endpoint in PUBLIC_ENDPOINTS
+
+    def _start(self, environ: dict) -> Tuple[int, List[Tuple[bytes, bytes]], List[bytes], Iterable[bytes]]:
+        """
+        Runs on the pool: calls the app and reads up to BUFFER_SIZE bytes of
+        body, iterator of the rest is returned unless the body ended.
+        """
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [int(status.split(" ", 1)[0]),
+                          [(name.lower().encode("latin1"), value.encode("latin1")) for name, value in headers]]
+
+        body = self.app.wsgi_app(environ, start_response)
+        iterator = iter(body)
+        chunks, size = [], 0
+        try:
+            for chunk in iterator:
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= BUFFER_SIZE:
+                    # close() of body ends the request, iterator may be a generator without it
+                    return started[0], started[1], chunks, _ClosingIterator(iterator, body)
+        except BaseException:
+            if hasattr(body, "close"):
+                body.close()
+            raise
+        if hasattr(body, "close"):
+            body.close()
+        return started[0], started[1], chunks, None
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+class _ClosingIterator:
+    __slots__ = ("iterator", "body")
+
+    def __init__(self, iterator, body):
+        self.iterator = iterator
+        self.body = body
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> bytes:
+        return next(self.iterator)
+
+    def close(self) -> None:
+        if hasattr(self.body, "close"):
+            self.body.close()
@@ -0,0 +1,23 @@
+"""
+Blueprints of API resources
+"""
+from typing import Tuple
+
+from flask import Blueprint
+from flask_restful import Api
+
+from libs.representation import output_json
+from libs.unit_of_work import transactional
+
+API_PREFIX = "/api/v1"
+
+
+def api_blueprint(name: str, import_name: str) -> Tuple[Blueprint, Api]:
+    """
+    Blueprint mounted under API_PREFIX and Flask-RESTful Api of its resources,
+    each of them answered in single transaction.
+    """
+    blueprint = Blueprint(name, import_name, url_prefix=API_PREFIX)
+    api = Api(blueprint, decorators=[transactional])
+    api.representation("application/json")(output_json)
+    return blueprint, api
@@ -0,0 +1,222 @@
+"""
+Bulk export and import of articles and snippets as NDJSON
+
+One JSON object per line, with fields of FIELDS[kind] - the same ones the
+schemas load, tags as {"name": ...} and author of article as username, so a
+file exported from one environment imports into another.
+
+Export walks the table in id order in batches of EXPORT_BATCH_SIZE (keyset,
+like list pagination), so memory doesn't grow with table size and no
+transaction is held open between batches.
+
+Import handles IMPORT_CHUNK_SIZE lines at a time: each line is validated and
+loaded by the schema, titles and authors are checked and tags resolved with
+one query per chunk, rows and their tag links are inserted with executemany.
+Published items are then rendered and their search documents inserted
+the same way, code not highlighted yet is highlighted and stored, and
+imported image blobs get their references. Lines which fail
+are reported by number and skipped, the rest is imported.
+"""
+import json
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Iterator, List, Tuple
+
+from marshmallow import ValidationError
+
+from libs import image_helper
+from libs.highlighting import article_blocks
+from libs.unit_of_work import after_commit, commit
+from models import ArticleModel, ImageBlobModel, SnippetModel, TagModel, UserModel
+from models.article import article_tags
+from models.snippet import snippet_tags
+from schemas.article import ArticleSchema
+from schemas.snippet import SnippetSchema
+from settings.cache import cache
+from settings.db import db
+from settings.highlighter import highlighter
+from settings.search import search_index
+
+KINDS = ("articles", "snippets")
+FIELDS = {
+    "articles": ("title", "description", "content", "tags", "image_url", "created_date", "published_date"),
+    "snippets": ("title", "description", "code", "language", "author", "tags", "created_date", "published_date"),
+}
+EXPORT_BATCH_SIZE = 500
+IMPORT_CHUNK_SIZE = 500
+# errors of further lines are only counted
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, line: int, messages) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": messages})
+
+    def as_dict(self) -> dict:
+        # schema errors are found before title conflicts of the same chunk
+        errors = sorted(self.errors, key=lambda error: error["line"])
+        return {"imported": self.imported, "failed": self.failed, "errors": errors}
+
+
+def _model(kind: str):
+    return ArticleModel if kind == "articles" else SnippetModel
+
+
+def export_lines(kind: str) -> Iterator[str]:
+    """NDJSON lines of all articles or snippets, drafts included."""
+    model = _model(kind)
+    only = tuple("tags.name" if field == "tags" else field for field in FIELDS[kind])
+    schema = (ArticleSchema if kind == "articles" else SnippetSchema)(only=only, many=True)
+    last_id = 0
+    while True:
+        items = model.query_for_dump().filter(model.id > last_id).order_by(model.id).limit(EXPORT_BATCH_SIZE).all()
+        if not items:
+            return
+        for item, record in zip(items, schema.dump(items)):
+            if kind == "articles":
+                record["author"] = item.author.username if item.author else None
+            yield json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        last_id = items[-1].id
+
+
+def import_lines(kind: str, lines: Iterable) -> dict:
+    """
+    Import NDJSON lines (str or bytes), returns counts and errors by line
+    number. Outside of request every chunk is committed as it's done.
+    """
+    report = ImportReport()
+    chunk = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        chunk.append((number, line))
+        if len(chunk) == IMPORT_CHUNK_SIZE:
+            _import_chunk(kind, chunk, report)
+            chunk = []
+    if chunk:
+        _import_chunk(kind, chunk, report)
+    if report.imported:
+        after_commit(cache.invalidate, kind, "search", "tags")
+    return report.as_dict()
+
+
+def _parse(chunk: List[Tuple[int, object]], report: ImportReport) -> List[Tuple[int, dict]]:
+    records = []
+    for number, line in chunk:
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            report.fail(number, {"_schema": ["Invalid JSON: {}".format(error)]})
+            continue
+        if not isinstance(record, dict):
+            report.fail(number, {"_schema": ["Line must be a JSON object."]})
+            continue
+        records.append((number, record))
+    return records
+
+
+def _import_chunk(kind: str, chunk: List[Tuple[int, object]], report: ImportReport) -> None:
+    model = _model(kind)
+    records = _parse(chunk, report)
+    fields = FIELDS[kind]
+    # author of article is username in the file, author_id in the table
+    schema = (ArticleSchema if kind == "articles" else SnippetSchema)(only=fields)
+
+    authors = {}
+    if kind == "articles":
+        usernames = {record["author"] for _, record in records if isinstance(record.get("author"), str)}
+        if usernames:
+            authors = dict(db.session.query(UserModel.username, UserModel.id).filter(
+                UserModel.username.in_(usernames)))
+
+    loaded = []
+    for number, record in records:
+        author = record.pop("author", None) if kind == "articles" else None
+        try:
+            item = schema.load(record)
+        except ValidationError as error:
+            report.fail(number, error.messages)
+            continue
+        if author is not None and author not in authors:
+            report.fail(number, {"author": ["User {} not found.".format(author)]})
+            continue
+        loaded.append((number, item, authors.get(author), [tag.name for tag in item.tags]))
+
+    # unique title and slug (derived from title), against database and within the chunk
+    titles, slugs = set(), set()
+    if loaded:
+        for title, slug in db.session.query(model.title, model.slug).filter(db.or_(
+                model.title.in_([item.title for _, item, _, _ in loaded]),
+                model.slug.in_([item.slug for _, item, _, _ in loaded]))):
+            titles.add(title)
+            slugs.add(slug)
+    # image blobs have to be in the store already, files aren't part of the export
+    blob_names = {}
+    if kind == "articles":
+        blob_names = ImageBlobModel.find_names(
+            image_helper.get_blob_digest(item.image_url) for _, item, _, _ in loaded
+            if item.image_url and image_helper.is_blob_name(item.image_url))
+    now = datetime.utcnow()
+    rows, tag_names, blob_references = [], [], Counter()
+    for number, item, author_id, names in loaded:
+        if item.title in titles or item.slug in slugs:
+            report.fail(number, {"title": ["{} with given title already exists.".format(kind[:-1].capitalize())]})
+            continue
+        digest = None
+        if kind == "articles" and item.image_url and image_helper.is_blob_name(item.image_url):
+            digest = image_helper.get_blob_digest(item.image_url)
+            if digest not in blob_names:
+                report.fail(number, {"image_url": ["Image {} not found.".format(item.image_url)]})
+                continue
+        titles.add(item.title)
+        slugs.add(item.slug)
+        row = {column.name: getattr(item, column.name) for column in model.__table__.columns
+               if column.name in fields or column.name == "slug"}
+        row.update(created_date=item.created_date or now, updated_date=now)
+        if kind == "articles":
+            row.update(author_id=author_id, likes_count=0)
+        if digest:
+            row["image_url"] = blob_names[digest]
+            blob_references[digest] += 1
+        rows.append(row)
+        tag_names.append(names)
+    if not rows:
+        return
+
+    # executemany, rows of the chunk are found by slug afterwards
+    db.session.execute(model.__table__.insert(), rows)
+    ImageBlobModel.add_references(blob_references)
+    if kind == "articles":
+        highlighter.store_missing(block for row in rows for block in article_blocks(row["content"]))
+    else:
+        highlighter.store_missing((row["code"], row["language"]) for row in rows)
+    ids = dict(db.session.query(model.slug, model.id).filter(model.slug.in_([row["slug"] for row in rows])))
+    tags = {tag.name: tag.id for tag in TagModel.get_or_create_many([name for names in tag_names for name in names])}
+    links_table, item_column = (article_tags, "article_id") if kind == "articles" else (snippet_tags, "snippet_id")
+    links = [{item_column: ids[row["slug"]], "tag_id": tags[name]}
+             for row, names in zip(rows, tag_names) for name in dict.fromkeys(names)]
+    if links:
+        db.session.execute(links_table.insert(), links)
+    TagModel.change_counts(kind + "_count", Counter(
+        tags[name] for row, names in zip(rows, tag_names) if row["published_date"] for name in dict.fromkeys(names)))
+
+    published_ids = [ids[row["slug"]] for row in rows if row["published_date"]]
+    if published_ids:
+        items = model.query_for_dump().filter(model.id.in_(published_ids)).all()
+        if kind == "articles":
+            with db.session.no_autoflush:
+                for item in items:
+                    item.render()
+        search_index.add_new(kind[:-1], items)
+    commit()
+    if published_ids:
+        for item in items:
+            db.session.expunge(item)
+    report.imported += len(rows)
@@ -0,0 +1,229 @@
+"""
+Response cache for public read endpoints
+
+Responses of handlers reading a replica (libs.db_routing) aren't stored for
+DATABASE_REPLICA_STICKY_SECONDS after their namespace was invalidated: the
+replica may not have the write yet, and its stale data would be served from
+cache until TTL, to every client.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Union
+from urllib.parse import urlencode
+
+from flask import request
+from flask_restful.utils import unpack
+
+from libs.db_routing import reads_replica
+from libs.representation import RawJSON
+
+
+class MemoryBackend:
+    """
+    In-process LRU with per entry TTL.
+
+    Every worker keeps its own copy, so invalidation is only visible in the
+    process which made the write - use RedisBackend for multi-worker setups.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._invalidated = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Union[str, None]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, namespace: str, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, namespace: str) -> None:
+        prefix = namespace + ":"
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+            self._invalidated[namespace] = time.time()
+
+    def invalidated_at(self, namespace: str) -> float:
+        """Time of last invalidation of namespace, 0 if unknown."""
+        return self._invalidated.get(namespace, 0.0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Backend shared by all workers, works with any server speaking Redis protocol.
+
+    Keys of each namespace are tracked in a set, so invalidation deletes only
+    entries of that namespace without scanning the keyspace.
+    """
+
+    def __init__(self, url: str, key_prefix: str = "blog:cache:"):
+        import redis  # optional dependency, required only by this backend
+
+        self._redis = redis.Redis.from_url(url)
+        self.key_prefix = key_prefix
+
+    def _namespace_key(self, namespace: str) -> str:
+        return "{}namespace:{}".format(self.key_prefix, namespace)
+
+    def get(self, key: str) -> Union[str, None]:
+        value = self._redis.get(self.key_prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, namespace: str, key: str, value: str, ttl: int) -> None:
+        namespace_key = self._namespace_key(namespace)
+        pipe = self._redis.pipeline()
+        pipe.set(self.key_prefix + key, value, ex=ttl)
+        pipe.sadd(namespace_key, self.key_prefix + key)
+        pipe.expire(namespace_key, ttl)
+        pipe.execute()
+
+    def invalidate(self, namespace: str) -> None:
+        namespace_key = self._namespace_key(namespace)
+        keys = self._redis.smembers(namespace_key)
+        pipe = self._redis.pipeline()
+        pipe.delete(namespace_key, *keys)
+        pipe.set(namespace_key + ":invalidated", time.time())
+        pipe.execute()
+
+    def invalidated_at(self, namespace: str) -> float:
+        """Time of last invalidation of namespace by any worker, 0 if unknown."""
+        value = self._redis.get(self._namespace_key(namespace) + ":invalidated")
+        return float(value) if value is not None else 0.0
+
+    def clear(self) -> None:
+        keys = list(self._redis.scan_iter(match=self.key_prefix + "*"))
+        if keys:
+            self._redis.delete(*keys)
+
+    def size(self) -> int:
+        namespace_prefix = self._namespace_key("").encode("utf-8")
+        return sum(1 for key in self._redis.scan_iter(match=self.key_prefix + "*")
+                   if not key.startswith(namespace_prefix))
+
+
+class ResponseCache:
+    """
+    Caches serialized (data, status, headers) of Flask-RESTful GET handlers.
+
+    Entries are grouped in namespaces ("articles", "snippets", "users") which
+    are dropped by model write paths through invalidate().
+    """
+
+    def __init__(self, app=None):
+        self.backend = MemoryBackend()
+        self.ttl = 300
+        self.enabled = True
+        self.replica_lag = 10
+        self.hits = 0
+        self.misses = 0
+        self.skipped_fills = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        backend = app.config.get("RESPONSE_CACHE_BACKEND", "memory")
+        self.ttl = app.config.get("RESPONSE_CACHE_TTL", 300)
+        self.replica_lag = app.config.get("DATABASE_REPLICA_STICKY_SECONDS", 10)
+        self.enabled = backend != "null"
+        if backend == "redis":
+            self.backend = RedisBackend(app.config["RESPONSE_CACHE_REDIS_URL"])
+        else:
+            self.backend = MemoryBackend(app.config.get("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+        app.extensions["response_cache"] = self
+
+    @staticmethod
+    def make_key(namespace: str) -> str:
+        """Route and query string with arguments sorted, so their order doesn't matter."""
+        query_string = urlencode(sorted(request.args.items(multi=True)))
+        return "{}:{}?{}".format(namespace, request.path, query_string)
+
+    def cached(self, namespace: str):
+        """Decorator serving GET handler from cache, only 200 responses are stored."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                key = self.make_key(namespace)
+                cached_response = self.backend.get(key)
+                if cached_response is not None:
+                    self._count(hit=True)
+                    data, code, headers, raw = json.loads(cached_response)
+                    if raw:
+                        data = RawJSON(data)
+                    headers["X-Cache"] = "HIT"
+                    return data, code, headers
+
+                self._count(hit=False)
+                data, code, headers = unpack(func(*args, **kwargs))
+                headers = dict(headers or {})
+                if code == 200 and self._may_be_stale(namespace):
+                    with self._lock:
+                        self.skipped_fills += 1
+                elif code == 200:
+                    raw = isinstance(data, RawJSON)
+                    self.backend.set(namespace, key, json.dumps([data, code, headers, raw]), self.ttl)
+                headers["X-Cache"] = "MISS"
+                return data, code, headers
+            return wrapper
+        return decorator
+
+    def _may_be_stale(self, namespace: str) -> bool:
+        """Response was read from replica which may lag behind recent write of namespace."""
+        return reads_replica() and time.time() - self.backend.invalidated_at(namespace) < self.replica_lag
+
+    def invalidate(self, *namespaces: str) -> None:
+        if not self.enabled:
+            return
+        for namespace in namespaces:
+            self.backend.invalidate(namespace)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "enabled": self.enabled,
+            "ttl": self.ttl,
+            "entries": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped_fills": self.skipped_fills,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
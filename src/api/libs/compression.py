@@ -0,0 +1,238 @@
+"""
+Negotiated response compression
+
+Responses of COMPRESSION_MIMETYPES at least COMPRESSION_MIN_SIZE bytes long
+are compressed with the best of COMPRESSION_ENCODINGS the client accepts:
+"br" (needs brotli package, skipped without it) and "gzip". Their ETag
+becomes weak, the representation differs but If-None-Match matches it the
+same (see libs.conditional).
+
+Compressed bodies are memoized by digest of the uncompressed one, up to
+COMPRESSION_CACHE_MAX_BYTES. Cache hits and articles served from their
+rendered dump produce the same bytes until the content changes, so a hot
+article or list page is compressed once per encoding, not per request.
+
+Streamed responses (e.g. NDJSON export) are compressed chunk by chunk as
+they are sent, memory doesn't depend on their size.
+
+Bytes before and after compression and CPU time spent are counted per
+endpoint, see stats() and metrics().
+"""
+import hashlib
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+from flask import Response, request
+
+DEFAULT_MIMETYPES = ("application/json", "application/x-ndjson", "text/html", "text/plain")
+# not worth compressing, or body must stay as it is
+SKIPPED_STATUSES = frozenset({204, 206, 304})
+
+# CPU time of current thread, Python 3.6 only has process time
+_cpu_time = getattr(time, "thread_time", time.process_time)
+
+
+def _brotli():
+    try:
+        import brotli  # optional dependency
+    except ImportError:
+        return None
+    return brotli
+
+
+class EndpointStats:
+    __slots__ = ("responses", "memo_hits", "bytes_in", "bytes_out", "cpu_seconds")
+
+    def __init__(self):
+        self.responses = 0
+        self.memo_hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+
+class Compression:
+    """Flask extension compressing responses, see module docstring."""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.encodings = ()
+        self._memo = OrderedDict()
+        self._memo_bytes = 0
+        self._stats = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get("COMPRESSION_ENABLED", True)
+        app.extensions["compression"] = self
+        if not self.enabled:
+            return
+        self.min_size = app.config.get("COMPRESSION_MIN_SIZE", 1024)
+        self.mimetypes = frozenset(app.config.get("COMPRESSION_MIMETYPES", DEFAULT_MIMETYPES))
+        self.gzip_level = app.config.get("COMPRESSION_GZIP_LEVEL", 6)
+        self.brotli_quality = app.config.get("COMPRESSION_BROTLI_QUALITY", 5)
+        self.memo_max_bytes = app.config.get("COMPRESSION_CACHE_MAX_BYTES", 16 * 1024 * 1024)
+        encodings = app.config.get("COMPRESSION_ENCODINGS", ("br", "gzip"))
+        if "br" in encodings and _brotli() is None:
+            app.logger.warning("brotli package isn't installed, responses won't be compressed with br")
+        self.encodings = tuple(encoding for encoding in encodings
+                               if encoding == "gzip" or (encoding == "br" and _brotli() is not None))
+        app.after_request(self._after_request)
+
+    def negotiate(self) -> str:
+        """Encoding of highest quality in Accept-Encoding, earlier in COMPRESSION_ENCODINGS on ties."""
+        best, best_quality = None, 0
+        for encoding in self.encodings:
+            quality = request.accept_encodings[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def _compressible(self, response: Response) -> bool:
+        return (200 <= response.status_code and response.status_code not in SKIPPED_STATUSES
+                and not response.direct_passthrough
+                and "Content-Encoding" not in response.headers
+                and response.mimetype in self.mimetypes
+                and not response.cache_control.no_transform)
+
+    def _after_request(self, response: Response) -> Response:
+        if response.status_code == 304:
+            # same Vary as the full response would have
+            response.vary.add("Accept-Encoding")
+        if not self._compressible(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = self.negotiate()
+        if encoding is None:
+            return response
+        endpoint = request.endpoint or "unmatched"
+
+        if response.is_streamed:
+            original = response.response
+            response.response = self._stream(response.iter_encoded(), original, encoding, endpoint)
+            response.headers.pop("Content-Length", None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            started = _cpu_time()
+            compressed, memo_hit = self._compress_body(body, encoding)
+            elapsed = _cpu_time() - started
+            if len(compressed) >= len(body):
+                return response
+            response.set_data(compressed)
+            self._record(endpoint, encoding, len(body), len(compressed), elapsed, memo_hit)
+
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def _compressor(self, encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+        """compress(chunk) and finish() of new compressor."""
+        if encoding == "br":
+            compressor = _brotli().Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.finish
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)  # gzip container
+        return compressor.compress, compressor.flush
+
+    def _compress_body(self, body: bytes, encoding: str) -> Tuple[bytes, bool]:
+        """Compressed body and whether it was memoized already."""
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        with self._lock:
+            compressed = self._memo.get(key)
+            if compressed is not None:
+                self._memo.move_to_end(key)
+                return compressed, True
+        compress, finish = self._compressor(encoding)
+        compressed = compress(body) + finish()
+        if len(compressed) <= self.memo_max_bytes:
+            with self._lock:
+                if key not in self._memo:
+                    self._memo[key] = compressed
+                    self._memo_bytes += len(compressed)
+                while self._memo_bytes > self.memo_max_bytes:
+                    _, evicted = self._memo.popitem(last=False)
+                    self._memo_bytes -= len(evicted)
+        return compressed, False
+
+    def _stream(self, chunks: Iterable[bytes], original, encoding: str, endpoint: str) -> Iterator[bytes]:
+        compress, finish = self._compressor(encoding)
+        size_in, size_out, elapsed = 0, 0, 0.0
+        try:
+            for chunk in chunks:
+                started = _cpu_time()
+                compressed = compress(chunk)
+                elapsed += _cpu_time() - started
+                size_in += len(chunk)
+                if compressed:
+                    size_out += len(compressed)
+                    yield compressed
+            started = _cpu_time()
+            compressed = finish()
+            elapsed += _cpu_time() - started
+            size_out += len(compressed)
+            yield compressed
+        finally:
+            if hasattr(original, "close"):
+                original.close()
+            self._record(endpoint, encoding, size_in, size_out, elapsed, False)
+
+    def _record(self, endpoint: str, encoding: str, size_in: int, size_out: int, elapsed: float,
+                memo_hit: bool) -> None:
+        with self._lock:
+            stats = self._stats.get((endpoint, encoding))
+            if stats is None:
+                stats = self._stats[(endpoint, encoding)] = EndpointStats()
+            stats.responses += 1
+            stats.memo_hits += memo_hit
+            stats.bytes_in += size_in
+            stats.bytes_out += size_out
+            stats.cpu_seconds += elapsed
+
+    def stats(self) -> dict:
+        """Compressed responses of this worker by endpoint and encoding, with memo size."""
+        with self._lock:
+            endpoints = {}
+            for (endpoint, encoding), stats in sorted(self._stats.items()):
+                endpoints.setdefault(endpoint, {})[encoding] = {
+                    "responses": stats.responses,
+                    "memo_hits": stats.memo_hits,
+                    "bytes_in": stats.bytes_in,
+                    "bytes_out": stats.bytes_out,
+                    "bytes_saved": stats.bytes_in - stats.bytes_out,
+                    "cpu_ms": round(stats.cpu_seconds * 1000, 3),
+                }
+            return {
+                "enabled": self.enabled,
+                "encodings": list(self.encodings),
+                "memo_entries": len(self._memo),
+                "memo_bytes": self._memo_bytes,
+                "endpoints": endpoints,
+            }
+
+    def metrics(self) -> List[str]:
+        """Lines of /metrics, registered as collector of Instrumentation."""
+        with self._lock:
+            items = [((endpoint, encoding), (stats.responses, stats.memo_hits, stats.bytes_in,
+                                             stats.bytes_out, stats.cpu_seconds))
+                     for (endpoint, encoding), stats in sorted(self._stats.items())]
+        lines = []
+        for index, (name, help_text) in enumerate((
+                ("blog_compressed_responses_total", "Responses compressed, by endpoint and encoding."),
+                ("blog_compression_memo_hits_total", "Compressed bodies reused from memo."),
+                ("blog_compression_bytes_in_total", "Bytes of response bodies before compression."),
+                ("blog_compression_bytes_out_total", "Bytes of response bodies after compression."),
+                ("blog_compression_cpu_seconds_total", "CPU time spent compressing."))):
+            lines += ["# HELP {} {}".format(name, help_text), "# TYPE {} counter".format(name)]
+            for (endpoint, encoding), values in items:
+                value = values[index]
+                lines.append('{}{{endpoint="{}",encoding="{}"}} {}'.format(
+                    name, endpoint, encoding, round(value, 6) if isinstance(value, float) else value))
+        return lines
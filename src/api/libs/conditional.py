@@ -0,0 +1,66 @@
+"""
+Conditional GET (ETag / Last-Modified) support for resources
+"""
+import hashlib
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Tuple, Union
+
+from flask import Response, request
+from flask_restful.utils import unpack
+from werkzeug.http import http_date
+
+
+def make_etag(*parts) -> str:
+    """Hash of request path, query string and given version parts."""
+    source = "|".join([request.full_path] + [str(part) for part in parts])
+    return hashlib.sha1(source.encode("utf-8")).hexdigest()
+
+
+def is_not_modified(etag: str, last_modified: Union[datetime, None]) -> bool:
+    """
+    Check request preconditions, If-None-Match takes precedence over
+    If-Modified-Since as RFC 7232 says.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    return False
+
+
+def conditional(version: Callable[..., Union[Tuple[datetime, object], None]]):
+    """
+    Decorator answering 304 before the wrapped GET handler is called.
+
+    version receives view arguments and returns (last_modified, extra) where
+    extra is anything else that changes when response changes (e.g. row count),
+    or None when there is nothing to validate (handler will answer 404).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            current = version(**kwargs)
+            if current is None:
+                return func(*args, **kwargs)
+
+            last_modified, extra = current
+            etag = make_etag(last_modified, extra)
+            headers = {"ETag": '"{}"'.format(etag)}
+            if last_modified:
+                headers["Last-Modified"] = http_date(last_modified)
+
+            if is_not_modified(etag, last_modified):
+                return Response(status=304, headers=headers)
+
+            result = func(*args, **kwargs)
+            if isinstance(result, Response):
+                if result.status_code == 200:
+                    result.headers.extend(headers)
+                return result
+            data, code, response_headers = unpack(result)
+            if code == 200:
+                response_headers = dict(response_headers or {}, **headers)
+            return data, code, response_headers
+        return wrapper
+    return decorator
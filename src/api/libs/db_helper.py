@@ -0,0 +1,25 @@
+"""
+Database helpers shared by models
+"""
+from typing import List
+
+from sqlalchemy import Table
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from settings.db import db
+
+
+def insert_ignoring_conflicts(table: Table, rows: List[dict], index_elements: List[str]) -> int:
+    """
+    Insert rows with a single statement, skipping ones which violate unique
+    index_elements (e.g. inserted meanwhile by concurrent request).
+    Returns number of inserted rows, nothing is committed.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == "postgresql":
+        statement = pg_insert(table).values(rows).on_conflict_do_nothing(index_elements=index_elements)
+    elif dialect == "sqlite":
+        statement = table.insert().prefix_with("OR IGNORE").values(rows)
+    else:
+        statement = table.insert().values(rows)
+    return db.session.execute(statement).rowcount
@@ -0,0 +1,197 @@
+"""
+Connection pool settings and read replica routing
+
+Engines of the primary and of every replica (DATABASE_REPLICA_URLS, registered
+as "replica_<n>" binds) get pool settings from config and a pool which
+measures how long requests wait for connection.
+
+GET handlers decorated with use_replica send their queries to one randomly
+picked replica. Anything written goes to the primary, and so does everything
+after it in the same request. Client which wrote something gets a cookie
+which keeps its reads on the primary for DATABASE_REPLICA_STICKY_SECONDS,
+so it sees its own writes despite replication lag.
+"""
+import random
+import threading
+import time
+from functools import wraps
+from typing import List
+
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import exc, orm
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_BIND_PREFIX = "replica_"
+STICKY_COOKIE = "db_primary_until"
+
+
+class PoolStats:
+    __slots__ = ("lock", "checkouts", "wait_seconds", "max_wait_seconds", "timeouts")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool counting checkouts, time spent waiting for connection and timeouts."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self.stats.lock:
+                self.stats.checkouts += 1
+                self.stats.wait_seconds += waited
+                self.stats.max_wait_seconds = max(self.stats.max_wait_seconds, waited)
+                self.stats.timeouts += timed_out
+
+
+def replica_binds(app) -> List[str]:
+    return ["{}{}".format(REPLICA_BIND_PREFIX, index)
+            for index in range(len(app.config.get("DATABASE_REPLICA_URLS") or []))]
+
+
+def _mark_write() -> None:
+    if has_request_context():
+        g._db_wrote = True
+        g.pop("_db_replica", None)
+
+
+class RoutingSession(SignallingSession):
+    """Session sending reads of use_replica requests to replica picked for the request."""
+
+    def __init__(self, db, **options):
+        self._db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        if self._flushing or isinstance(clause, UpdateBase):
+            _mark_write()
+        elif has_request_context() and g.get("_db_replica"):
+            return self._db.get_engine(self.app, bind=g._db_replica)
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy with pool settings from config and replica routing."""
+
+    def init_app(self, app) -> None:
+        binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+        for bind, url in zip(replica_binds(app), app.config.get("DATABASE_REPLICA_URLS") or []):
+            binds[bind] = url
+        app.config["SQLALCHEMY_BINDS"] = binds
+        super().init_app(app)
+        if replica_binds(app):
+            app.after_request(_set_sticky_cookie)
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        super().apply_driver_hacks(app, sa_url, options)
+        # SQLite gets NullPool/StaticPool from Flask-SQLAlchemy, they take no pool settings
+        if sa_url.drivername.startswith("sqlite"):
+            return
+        options["poolclass"] = TimedQueuePool
+        options["pool_size"] = app.config.get("DATABASE_POOL_SIZE", 5)
+        options["max_overflow"] = app.config.get("DATABASE_MAX_OVERFLOW", 10)
+        options["pool_timeout"] = app.config.get("DATABASE_POOL_TIMEOUT", 30)
+        options["pool_recycle"] = app.config.get("DATABASE_POOL_RECYCLE", -1)
+        options["pool_pre_ping"] = app.config.get("DATABASE_POOL_PRE_PING", False)
+        statement_timeout = app.config.get("DATABASE_STATEMENT_TIMEOUT_MS")
+        if statement_timeout and sa_url.drivername.startswith("postgresql"):
+            connect_args = options.setdefault("connect_args", {})
+            connect_args["options"] = "{} -c statement_timeout={}".format(
+                connect_args.get("options", ""), int(statement_timeout)).strip()
+
+    def pool_stats(self, app=None) -> dict:
+        """Connections of primary and replica pools of this worker."""
+        app = self.get_app(app)
+        stats = {}
+        for bind in [None] + replica_binds(app):
+            pool = self.get_engine(app, bind=bind).pool
+            name = bind or "primary"
+            if not isinstance(pool, QueuePool):
+                stats[name] = {"pool": type(pool).__name__}
+                continue
+            stats[name] = {
+                "pool": type(pool).__name__,
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+            }
+            if isinstance(pool, TimedQueuePool):
+                with pool.stats.lock:
+                    stats[name].update({
+                        "checkouts": pool.stats.checkouts,
+                        "wait_ms_total": round(pool.stats.wait_seconds * 1000, 2),
+                        "wait_ms_max": round(pool.stats.max_wait_seconds * 1000, 2),
+                        "timeouts": pool.stats.timeouts,
+                    })
+        return stats
+
+    def pool_metrics(self) -> List[str]:
+        """Pool stats as Prometheus metrics, collected by instrumentation."""
+        stats = self.pool_stats()
+        lines = []
+        for key, kind, help_text in (
+                ("checked_out", "gauge", "Connections in use."),
+                ("checked_in", "gauge", "Idle connections in pool."),
+                ("overflow", "gauge", "Connections opened above pool size."),
+                ("checkouts", "counter", "Connections taken from pool."),
+                ("wait_ms_total", "counter", "Milliseconds spent waiting for connection."),
+                ("timeouts", "counter", "Checkouts which timed out waiting for connection.")):
+            name = "blog_db_pool_{}".format(key)
+            lines += ["# HELP {} {}".format(name, help_text), "# TYPE {} {}".format(name, kind)]
+            for database, values in sorted(stats.items()):
+                if key in values:
+                    lines.append('{}{{database="{}"}} {}'.format(name, database, values[key]))
+        return lines
+
+
+def _is_sticky() -> bool:
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _set_sticky_cookie(response):
+    if g.get("_db_wrote"):
+        sticky_seconds = current_app.config.get("DATABASE_REPLICA_STICKY_SECONDS", 10)
+        response.set_cookie(STICKY_COOKIE, str(int(time.time()) + sticky_seconds),
+                            max_age=sticky_seconds, httponly=True, samesite="Lax")
+    return response
+
+
+def reads_replica() -> bool:
+    """Current request's queries go to a replica."""
+    return has_request_context() and bool(g.get("_db_replica"))
+
+
+def use_replica(func):
+    """Run read-only handler against a replica, unless client wrote something recently."""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        binds = replica_binds(current_app)
+        if binds and not _is_sticky():
+            g._db_replica = random.choice(binds)
+        return func(*args, **kwargs)
+    return wrapper
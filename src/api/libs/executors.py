@@ -0,0 +1,31 @@
+"""
+Process pools of extensions moving CPU heavy work out of request threads
+(image variants, password hashing, code highlighting)
+"""
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+
+class ProcessPool:
+    """
+    ProcessPoolExecutor created on first use in each process: a pool created
+    before gunicorn forks its workers can't be reused by them.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        # read when executor is created, extensions set it from config in init_app
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def submit(self, func, *args) -> Future:
+        return self.get_executor().submit(func, *args)
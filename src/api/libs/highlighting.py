@@ -0,0 +1,236 @@
+"""
+Server-side syntax highlighting of snippets and article code blocks
+
+Code is highlighted by Pygments (optional dependency, highlighting is off
+without it) into HTML, which is stored once per (language, SHA-256 of code)
+in blog_highlighted_code, no matter how many items contain the same code.
+
+Saving a snippet or article highlights its code which isn't stored yet: code
+up to HIGHLIGHT_INLINE_MAX_BYTES in the saving transaction, larger code on a
+pool of HIGHLIGHT_WORKERS processes once the save is committed. When the pool
+is done the result is stored and on_done() sets highlighted_date of the item,
+so its ETag and cached responses change while updated_date stays.
+
+Responses get `highlighted` fields when asked with ?highlight=1, HTML is
+looked up in a per worker LRU of HIGHLIGHT_CACHE_MAX_ENTRIES, then in the
+table with one query. It's null while large code is still being highlighted.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from libs.executors import ProcessPool
+from libs.rendering import highlight_code
+from libs.unit_of_work import after_commit, unit_of_work
+from models.highlighted_code import HighlightedCodeModel
+
+# (language, code hash)
+Key = Tuple[str, str]
+
+
+@lru_cache(maxsize=256)
+def canonical_language(language: Optional[str]) -> str:
+    """First alias of Pygments lexer of language, "text" when it's unknown or missing."""
+    try:
+        from pygments.lexers import get_lexer_by_name
+        from pygments.util import ClassNotFound
+    except ImportError:
+        return "text"
+    try:
+        return get_lexer_by_name(language or "text").aliases[0]
+    except ClassNotFound:
+        return "text"
+
+
+def code_key(code: str, language: Optional[str]) -> Key:
+    # language is user input, "py" and "Python" share one stored row
+    return canonical_language(language), hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def article_blocks(content: Optional[list]) -> List[Tuple[str, Optional[str]]]:
+    """(code, language) of non-empty code blocks of article content."""
+    blocks = []
+    for paragraph in content or []:
+        code = paragraph.get("code") or {}
+        if code.get("content"):
+            blocks.append((code["content"], code.get("language")))
+    return blocks
+
+
+def _pygments_installed() -> bool:
+    try:
+        import pygments  # optional dependency
+    except ImportError:
+        return False
+    return True
+
+
+class Highlighter:
+    """Highlights, stores and looks up code, see module docstring."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.workers = 2
+        self.inline_max_bytes = 4096
+        self.memo_max_entries = 2048
+        self.memo_hits = 0
+        self.memo_misses = 0
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self._memo = OrderedDict()
+        self._pool = ProcessPool(self.workers)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.enabled = app.config.get("HIGHLIGHT_ENABLED", True)
+        if self.enabled and not _pygments_installed():
+            app.logger.warning("Pygments isn't installed, code won't be highlighted")
+            self.enabled = False
+        self.workers = self._pool.max_workers = app.config.get("HIGHLIGHT_WORKERS", 2)
+        self.inline_max_bytes = app.config.get("HIGHLIGHT_INLINE_MAX_BYTES", 4096)
+        self.memo_max_entries = app.config.get("HIGHLIGHT_CACHE_MAX_ENTRIES", 2048)
+        app.extensions["highlighter"] = self
+
+    def prepare(self, blocks: Iterable[Tuple[str, Optional[str]]], on_done: Callable[[], None]) -> None:
+        """
+        Highlight (code, language) blocks of item being saved which aren't
+        stored yet. Large code is sent to the pool after commit and on_done()
+        is called in unit of work once its result is stored.
+        """
+        if not self.enabled:
+            return
+        results = []
+        for key, code, language in self._not_stored(blocks):
+            if self.workers and len(code) > self.inline_max_bytes:
+                after_commit(self.submit, key, code, language, on_done)
+            else:
+                results.append(key + (self._highlight(key, code, language),))
+        HighlightedCodeModel.store_many(results)
+
+    def store_missing(self, blocks: Iterable[Tuple[str, Optional[str]]]) -> int:
+        """Highlight and store every block not stored yet right away, returns their number."""
+        if not self.enabled:
+            return 0
+        results = [key + (self._highlight(key, code, language),)
+                   for key, code, language in self._not_stored(blocks)]
+        HighlightedCodeModel.store_many(results)
+        return len(results)
+
+    def _not_stored(self, blocks: Iterable[Tuple[str, Optional[str]]]) -> List[Tuple[Key, str, Optional[str]]]:
+        keyed = {code_key(code, language): (code, language) for code, language in blocks}
+        stored = HighlightedCodeModel.find_many(keyed)
+        return [(key, code, language) for key, (code, language) in keyed.items() if key not in stored]
+
+    def _highlight(self, key: Key, code: str, language: Optional[str]) -> str:
+        with self._lock:
+            html = self._memo.get(key)
+        if html is None:
+            html = highlight_code(code, key[0])
+            self._remember(key, html)
+        return html
+
+    def lookup(self, blocks: Iterable[Tuple[str, Optional[str]]]) -> Dict[Key, Optional[str]]:
+        """
+        HTML of (code, language) blocks by key, None when it isn't ready. Code
+        saved before highlighting existed is highlighted here if it's small.
+        """
+        keyed = {code_key(code, language): (code, language) for code, language in blocks}
+        if not self.enabled:
+            return dict.fromkeys(keyed)
+        found, missing = {}, []
+        with self._lock:
+            for key in keyed:
+                html = self._memo.get(key)
+                if html is None:
+                    missing.append(key)
+                else:
+                    self._memo.move_to_end(key)
+                    found[key] = html
+            self.memo_hits += len(found)
+            self.memo_misses += len(missing)
+        if missing:
+            stored = HighlightedCodeModel.find_many(missing)
+            for key in missing:
+                html = stored.get(key)
+                code, language = keyed[key]
+                if html is None and len(code) <= self.inline_max_bytes:
+                    html = highlight_code(code, key[0])
+                if html is not None:
+                    self._remember(key, html)
+                found[key] = html
+        return found
+
+    def attach_to_snippets(self, snippets: List[dict]) -> None:
+        """Add highlighted field to dumped snippets."""
+        found = self.lookup((snippet["code"], snippet["language"]) for snippet in snippets)
+        for snippet in snippets:
+            snippet["highlighted"] = found[code_key(snippet["code"], snippet["language"])]
+
+    def attach_to_articles(self, articles: List[dict]) -> None:
+        """Add highlighted field to code blocks in content of dumped articles."""
+        blocks = [paragraph["code"] for article in articles for paragraph in article.get("content") or []
+                  if (paragraph.get("code") or {}).get("content")]
+        found = self.lookup((block["content"], block.get("language")) for block in blocks)
+        for block in blocks:
+            block["highlighted"] = found[code_key(block["content"], block.get("language"))]
+
+    def _remember(self, key: Key, html: str) -> None:
+        with self._lock:
+            self._memo[key] = html
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_max_entries:
+                self._memo.popitem(last=False)
+
+    def submit(self, key: Key, code: str, language: Optional[str], on_done: Callable[[], None]) -> None:
+        with self._lock:
+            self.submitted += 1
+        future = self._pool.submit(highlight_code, code, key[0])
+
+        def callback(done_future):
+            try:
+                html = done_future.result()
+            except Exception:
+                self._record_failure()
+                return
+            self._finish(key, html, on_done)
+
+        future.add_done_callback(callback)
+
+    def _finish(self, key: Key, html: str, on_done: Callable[[], None]) -> None:
+        self._remember(key, html)
+        with self._lock:
+            self.processed += 1
+        try:
+            # result and item saved again are committed together
+            with self.app.app_context(), unit_of_work():
+                HighlightedCodeModel.store_many([key + (html,)])
+                on_done()
+        except Exception:
+            self.app.logger.exception("Storing highlighted code failed")
+
+    def _record_failure(self) -> None:
+        self.app.logger.exception("Highlighting code failed")
+        with self._lock:
+            self.failed += 1
+
+    def stats(self) -> dict:
+        lookups = self.memo_hits + self.memo_misses
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "memo_entries": len(self._memo),
+            "memo_hits": self.memo_hits,
+            "memo_misses": self.memo_misses,
+            "memo_hit_ratio": round(self.memo_hits / lookups, 4) if lookups else 0.0,
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "failed": self.failed,
+            "pending": self.submitted - self.processed - self.failed,
+        }
@@ -1,19 +1,117 @@
 """
 Library to manage images
+
+Uploaded images are stored once per content, under SHA-256 of their bytes:
+"blobs/<first two hex chars>/<sha256><extension>". Models keep just that name,
+so the same picture used as many avatars and article images takes space once,
+and ImageBlobModel counts references to know when it can be collected.
+Names from before the store (plain files in "avatars", "article_images") still
+resolve to their folders until `flask images migrate` moves them.
 """
+import hashlib
 import os
 import re
-from typing import Union
+import shutil
+import tempfile
+from typing import Callable, Tuple, Union
 
 from werkzeug.datastructures import FileStorage
-from flask_uploads import UploadSet, IMAGES
+from flask_uploads import UploadSet, UploadNotAllowed, IMAGES
+
+from libs.image_processing import VARIANTS
+from libs.unit_of_work import after_commit
+from models.image_blob import ImageBlobModel
+from settings.image_processor import image_processor
 
 IMAGE_SET = UploadSet(name="images", extensions=IMAGES)
+VARIANTS_FOLDER = "variants"
+VARIANT_FORMATS = ("webp", "jpg")
+BLOBS_FOLDER = "blobs"
+# blob itself ("<sha256>.png") or one of its variants ("<sha256>.thumbnail.webp")
+BLOB_NAME = re.compile(r"^([0-9a-f]{64})(\.[a-z]+)?\.[a-z0-9]+$")
+CHUNK_SIZE = 64 * 1024
+
 
+def save_image(image: FileStorage) -> str:
+    """
+    Store uploaded image and return its blob name. Content already present in
+    the store is not written twice. Reference is added to the session and
+    committed together with the model which uses the image.
+    """
+    extension = get_extension(image).lower()
+    if not IMAGE_SET.file_allowed(image, get_basename(image)):
+        raise UploadNotAllowed()
+
+    blobs_dir = IMAGE_SET.path(BLOBS_FOLDER)
+    os.makedirs(blobs_dir, exist_ok=True)
+    sha256 = hashlib.sha256()
+    size = 0
+    # temporary file on the same filesystem, so it can be renamed atomically
+    with tempfile.NamedTemporaryFile(dir=blobs_dir, prefix=".upload-", delete=False) as temporary:
+        for chunk in iter(lambda: image.stream.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            temporary.write(chunk)
+            size += len(chunk)
+    # same content uploaded before as ".jpeg" keeps that name when it comes as ".jpg"
+    name = ImageBlobModel.acquire(sha256.hexdigest(), extension, size)
+    path = get_path(name)
+    if os.path.isfile(path):
+        os.remove(temporary.name)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temporary.name, path)
+    return name
+
+
+def import_file(source_path: str) -> Tuple[str, int, bool]:
+    """
+    Copy file into the store (hard link if possible), return its blob name,
+    size and whether same content was already stored. Reference is added to
+    the session like in save_image().
+    """
+    sha256 = hashlib.sha256()
+    with open(source_path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    size = os.path.getsize(source_path)
+    name = ImageBlobModel.acquire(sha256.hexdigest(), get_extension(source_path).lower(), size)
+    duplicate = _link_into_store(source_path, get_path(name))
+    return name, size, duplicate
+
+
+def import_variant(source_path: str, name: str) -> None:
+    """Copy variant file into the store under given name (hard link if possible)."""
+    _link_into_store(source_path, get_path(name))
+
+
+def _link_into_store(source_path: str, path: str) -> bool:
+    """Place copy of source at path unless it's there already, returns True if it was."""
+    if os.path.isfile(path):
+        return True
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        os.link(source_path, path)
+    except OSError:
+        shutil.copyfile(source_path, path)
+    return False
+
+
+def release_image(filename: str, folder: str) -> None:
+    """
+    Drop reference to image which is no longer used. Blob files are removed
+    later by `flask images gc`, images from before the store once the change
+    is committed.
+    """
+    if is_blob_name(filename):
+        ImageBlobModel.release(get_blob_digest(filename))
+    else:
+        after_commit(_delete_image_files, filename, folder)
 
-def save_image(image: FileStorage, folder: str = None, name: str = None) -> str:
-    """Saves image and return it's name in storage."""
-    return IMAGE_SET.save(image, folder, name)
+
+def _delete_image_files(filename: str, folder: str) -> None:
+    if os.path.isfile(get_path(filename, folder)):
+        delete_image(filename, folder)
+    delete_variants(filename, folder)
 
 
 def delete_image(filename: str, folder: str) -> None:
@@ -21,22 +119,97 @@ def delete_image(filename: str, folder: str) -> None:
     os.remove(image_path)
 
 
-def get_path(filename: str, folder: str):
-    """Get full path of file in storage"""
+def delete_blob(blob: ImageBlobModel) -> int:
+    """Remove blob with its variants from disk and database, returns freed bytes."""
+    freed = 0
+    for name in [blob.name] + get_variant_names(blob.digest):
+        path = get_path(name)
+        if os.path.isfile(path):
+            freed += os.path.getsize(path)
+            os.remove(path)
+    blob.delete_from_db()
+    return freed
+
+
+def is_blob_name(filename: str) -> bool:
+    return BLOB_NAME.match(filename) is not None
+
+
+def get_blob_digest(filename: str) -> str:
+    return BLOB_NAME.match(filename).group(1)
+
+
+def get_path(filename: str, folder: str = None):
+    """Get full path of file in storage, blobs (and their variants) are found by name alone"""
+    match = BLOB_NAME.match(filename)
+    if match:
+        folder = os.path.join(BLOBS_FOLDER, match.group(1)[:2])
     return IMAGE_SET.path(filename, folder)
 
 
-def find_image_any_format(filename: str, folder: str) -> Union[str, None]:
+def get_variants_folder(folder: str) -> str:
+    """Folder (relative to storage) holding generated variants of images from folder"""
+    return os.path.join(folder, VARIANTS_FOLDER)
+
+
+def get_stem(file: Union[FileStorage, str]) -> str:
+    """Returns image name without extension"""
+    return os.path.splitext(get_basename(file))[0]
+
+
+def get_variant_names(stem: str) -> list:
+    return [f"{stem}.{variant}.{_format}" for variant in VARIANTS for _format in VARIANT_FORMATS]
+
+
+def generate_variants(filename: str, folder: str, on_done: Callable[[dict], bool]) -> None:
+    """
+    Schedule generation of resized variants, on_done receives their description
+    and returns False if image is no longer used (variants are removed then).
+    Generation starts once the image is committed.
+
+    Variants of a blob are generated once and shared by all its references.
+    """
+    if is_blob_name(filename):
+        digest = get_blob_digest(filename)
+        blob = ImageBlobModel.find_by_digest(digest)
+        if blob and blob.variants:
+            on_done({"variants": blob.variants, "duration_ms": 0.0})
+            return
+
+        def store(result: dict) -> None:
+            ImageBlobModel.store_variants(digest, result)
+            on_done(result)
+
+        path = get_path(filename)
+        after_commit(image_processor.submit, path, os.path.dirname(path), digest, store)
+        return
+
+    def store_or_discard(result: dict) -> None:
+        if not on_done(result):
+            delete_variants(filename, folder)
+
+    variants_dir = os.path.dirname(get_path(filename, get_variants_folder(folder)))
+    after_commit(image_processor.submit, get_path(filename, folder), variants_dir, get_stem(filename),
+                 store_or_discard)
+
+
+def delete_variants(filename: str, folder: str) -> None:
+    """Remove all generated variants of image, missing ones are skipped."""
+    for variant_name in get_variant_names(get_stem(filename)):
+        variant_path = get_path(variant_name, get_variants_folder(folder))
+        if os.path.isfile(variant_path):
+            os.remove(variant_path)
+
+
+def find_image_any_format(filename: str, folder: str = None) -> Union[str, None]:
     """
-    Given a format-less filename, try to find the file by appending each of the allowed formats to the given
-    filename and check if the file exists
+    Given a format-less filename (SHA-256 of the image), find the stored file.
+    Single indexed lookup instead of checking every allowed format on disk.
     """
-    for _format in IMAGES:  # look for existing avatar and delete it
-        avatar = f"{filename}.{_format}"
-        avatar_path = IMAGE_SET.path(filename=avatar, folder=folder)
-        if os.path.isfile(avatar_path):
-            return avatar_path
-    return None
+    blob = ImageBlobModel.find_by_digest(filename)
+    if blob is None:
+        return None
+    return get_path(blob.name, folder)
 
 
 def _retrieve_filename(file: Union[FileStorage, str]) -> str:
@@ -0,0 +1,137 @@
+"""
+Background generation of resized, re-encoded image variants
+"""
+import os
+import threading
+import time
+import traceback
+from typing import Callable
+
+from libs.executors import ProcessPool
+from libs.unit_of_work import unit_of_work
+
+# name -> bounding box, images are never upscaled
+VARIANTS = {
+    "thumbnail": (200, 200),
+    "medium": (800, 800),
+    "full": (1920, 1920),
+}
+
+
+def generate_variants(source_path: str, variants_dir: str, stem: str) -> dict:
+    """
+    Write WebP and optimized JPEG file of every variant, without EXIF or any
+    other metadata of the original. Runs in a worker process.
+    """
+    from PIL import Image, ImageOps  # optional dependency, required only here
+
+    started = time.perf_counter()
+    os.makedirs(variants_dir, exist_ok=True)
+    variants = {}
+    with Image.open(source_path) as original:
+        original.seek(0)  # first frame of animated images
+        image = ImageOps.exif_transpose(original)
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        for name, size in VARIANTS.items():
+            variant = image.copy()
+            variant.thumbnail(size, Image.LANCZOS)
+            variant.info = {}
+
+            webp_name = "{}.{}.webp".format(stem, name)
+            variant.save(os.path.join(variants_dir, webp_name), "WEBP", quality=80, method=4)
+            jpeg_name = "{}.{}.jpg".format(stem, name)
+            variant.convert("RGB").save(os.path.join(variants_dir, jpeg_name), "JPEG",
+                                        quality=85, optimize=True, progressive=True)
+
+            variants[name] = {
+                "width": variant.width,
+                "height": variant.height,
+                "webp": webp_name,
+                "jpeg": jpeg_name,
+            }
+    return {"variants": variants, "duration_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+
+class ImageProcessor:
+    """
+    Generates variants on a process pool after the upload request returned,
+    then calls on_done(result) inside app context so it can store them.
+
+    With workers set to 0 variants are generated inline (handy for shell and tests).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.workers = 2
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.total_duration_ms = 0.0
+        self.last_duration_ms = None
+        self._pool = ProcessPool(self.workers)
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.app = app
+        self.workers = self._pool.max_workers = app.config.get("IMAGE_PROCESSING_WORKERS", 2)
+        try:
+            import PIL  # optional dependency, required by generate_variants
+        except ImportError:
+            app.logger.warning("Pillow isn't installed, image variants won't be generated")
+        app.extensions["image_processor"] = self
+
+    def submit(self, source_path: str, variants_dir: str, stem: str,
+               on_done: Callable[[dict], None]) -> None:
+        with self._lock:
+            self.submitted += 1
+        if not self.workers:
+            try:
+                result = generate_variants(source_path, variants_dir, stem)
+            except Exception:
+                self._record_failure()
+                return
+            self._finish(result, on_done)
+            return
+
+        future = self._pool.submit(generate_variants, source_path, variants_dir, stem)
+
+        def callback(done_future):
+            try:
+                result = done_future.result()
+            except Exception:
+                self._record_failure()
+                return
+            self._finish(result, on_done)
+
+        future.add_done_callback(callback)
+
+    def _finish(self, result: dict, on_done: Callable[[dict], None]) -> None:
+        with self._lock:
+            self.processed += 1
+            self.total_duration_ms += result["duration_ms"]
+            self.last_duration_ms = result["duration_ms"]
+        try:
+            # variants of blob and model using it are committed together
+            with self.app.app_context(), unit_of_work():
+                on_done(result)
+        except Exception:
+            traceback.print_exc()
+
+    def _record_failure(self) -> None:
+        traceback.print_exc()
+        with self._lock:
+            self.failed += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "submitted": self.submitted,
+            "processed": self.processed,
+            "failed": self.failed,
+            "pending": self.submitted - self.processed - self.failed,
+            "avg_duration_ms": round(self.total_duration_ms / self.processed, 2) if self.processed else None,
+            "last_duration_ms": self.last_duration_ms,
+        }
@@ -0,0 +1,94 @@
+"""
+Serving stored images under content-hashed, immutable URLs
+"""
+import hashlib
+import mimetypes
+import os
+from functools import lru_cache
+from typing import Union
+
+from flask import current_app, request, send_file, url_for
+from werkzeug.security import safe_join
+
+from libs import image_helper
+from libs.image_helper import IMAGE_SET
+
+# folders which can be served publicly
+PUBLIC_FOLDERS = ("avatars", "article_images")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+CHUNK_SIZE = 64 * 1024
+
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    # mtime and size are part of the cache key, so modified file is hashed again
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()[:16]
+
+
+def get_digest(path: str) -> str:
+    """Short SHA-256 of file content, computed once per file version."""
+    filename = os.path.basename(path)
+    if image_helper.is_blob_name(filename):
+        # content-addressed file, nothing to hash
+        return image_helper.get_blob_digest(filename)[:16]
+    stat = os.stat(path)
+    return _file_digest(path, stat.st_mtime_ns, stat.st_size)
+
+
+def get_public_path(filename: str, folder: str) -> Union[str, None]:
+    """Full path of file from public folder, None if it's outside of it or missing."""
+    if folder not in PUBLIC_FOLDERS:
+        return None
+    if image_helper.is_blob_name(filename):
+        path = image_helper.get_path(filename)
+    else:
+        path = safe_join(IMAGE_SET.config.destination, folder, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    return path
+
+
+def get_image_url(filename: str, folder: str) -> Union[str, None]:
+    """
+    Immutable URL of image, changes whenever its content changes. Blob name
+    is the digest already, only images from before the store touch the disk.
+    """
+    if not filename or folder not in PUBLIC_FOLDERS:
+        return None
+    if image_helper.is_blob_name(filename):
+        digest = image_helper.get_blob_digest(filename)[:16]
+    else:
+        path = get_public_path(filename, folder)
+        if path is None:
+            return None
+        digest = get_digest(path)
+    return url_for("images.image", folder=folder, digest=digest, filename=filename)
+
+
+def send_image(path: str, digest: str):
+    """
+    Response with long lived cache headers, ETag/304 and Range support.
+
+    If IMAGE_ACCEL_REDIRECT_LOCATION (nginx) or USE_X_SENDFILE (apache,
+    lighttpd) is configured, bytes are sent by front web server instead of
+    Python worker - Range requests are then handled there as well.
+    """
+    accel_location = current_app.config.get("IMAGE_ACCEL_REDIRECT_LOCATION")
+    if accel_location:
+        response = current_app.response_class(mimetype=mimetypes.guess_type(path)[0])
+        relative_path = os.path.relpath(path, IMAGE_SET.config.destination).replace(os.sep, "/")
+        response.headers["X-Accel-Redirect"] = "{}/{}".format(accel_location.rstrip("/"), relative_path)
+    else:
+        response = send_file(path, add_etags=False, conditional=False)
+    offloaded = bool(accel_location) or current_app.use_x_sendfile
+
+    response.set_etag(digest)
+    response.last_modified = int(os.path.getmtime(path))
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    if offloaded:
+        return response.make_conditional(request)
+    return response.make_conditional(request, accept_ranges=True, complete_length=os.path.getsize(path))
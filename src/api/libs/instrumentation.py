@@ -0,0 +1,281 @@
+"""
+Opt-in per-request instrumentation
+
+With INSTRUMENTATION_ENABLED every request records its wall time, number and
+time of SQL queries (engine events), time spent serializing response (schema
+dumps and JSON encoding) and response size. Totals per endpoint are exposed
+in Prometheus text format at /metrics, per request they are sent in
+Server-Timing header.
+
+Slow requests can be profiled: a sampled fraction of requests runs under
+cProfile (or pyinstrument, optional dependency) and profiles of those slower
+than INSTRUMENTATION_PROFILE_THRESHOLD_MS are written to
+INSTRUMENTATION_PROFILE_DIR. X-Profile header with INSTRUMENTATION_PROFILE_TOKEN
+profiles and writes given request regardless of sampling and threshold.
+"""
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, List, Union
+
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# upper bounds of request duration histogram, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROFILE_HEADER = "X-Profile"
+
+
+class RequestStats:
+    """Measurements of one request, kept in flask.g."""
+
+    __slots__ = ("started", "queries", "query_seconds", "query_started",
+                 "sections", "active_sections", "profiler", "forced_profile")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.query_started = None
+        self.sections = {}
+        self.active_sections = set()
+        self.profiler = None
+        self.forced_profile = False
+
+
+def current_stats() -> Union[RequestStats, None]:
+    if not has_app_context():
+        return None
+    return g.get("_instrumentation")
+
+
+@contextmanager
+def measure(section: str):
+    """
+    Add time spent in block to section of current request, nested blocks of
+    the same section are counted once. Does nothing when instrumentation is off.
+    """
+    stats = current_stats()
+    if stats is None or section in stats.active_sections:
+        yield
+        return
+    stats.active_sections.add(section)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.active_sections.discard(section)
+        stats.sections[section] = stats.sections.get(section, 0.0) + time.perf_counter() - started
+
+
+class EndpointMetrics:
+    __slots__ = ("requests", "duration_buckets", "duration_sum", "queries", "query_seconds",
+                 "serialization_seconds", "response_bytes")
+
+    def __init__(self):
+        self.requests = {}
+        self.duration_buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.duration_sum = 0.0
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serialization_seconds = 0.0
+        self.response_bytes = 0
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class Instrumentation:
+    """
+    Flask extension recording metrics per endpoint (method) in this worker.
+    Nothing is registered unless INSTRUMENTATION_ENABLED is set.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._profiles_written = 0
+        self._collectors = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.enabled = app.config.get("INSTRUMENTATION_ENABLED", False)
+        app.extensions["instrumentation"] = self
+        if not self.enabled:
+            return
+        self.profile_dir = app.config.get("INSTRUMENTATION_PROFILE_DIR")
+        self.profile_sample_rate = app.config.get("INSTRUMENTATION_PROFILE_SAMPLE_RATE", 0.0)
+        self.profile_threshold = app.config.get("INSTRUMENTATION_PROFILE_THRESHOLD_MS", 500) / 1000.0
+        self.profile_token = app.config.get("INSTRUMENTATION_PROFILE_TOKEN")
+        self.profiler_name = app.config.get("INSTRUMENTATION_PROFILER", "cprofile")
+
+        # listening on Engine class covers every engine, whenever it's created
+        if not event.contains(Engine, "before_cursor_execute", self._before_cursor_execute):
+            event.listen(Engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", self._after_cursor_execute)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule("/metrics", "metrics", self.metrics_view)
+
+    def register_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Add function returning lines of extra metrics, e.g. gauges read at scrape time."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = current_stats()
+        if stats is not None:
+            stats.query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = current_stats()
+        if stats is not None and stats.query_started is not None:
+            stats.queries += 1
+            stats.query_seconds += time.perf_counter() - stats.query_started
+            stats.query_started = None
+
+    def _before_request(self) -> None:
+        stats = g._instrumentation = RequestStats()
+        if not self.profile_dir:
+            return
+        token = request.headers.get(PROFILE_HEADER)
+        stats.forced_profile = bool(self.profile_token) and token == self.profile_token
+        if stats.forced_profile or random.random() < self.profile_sample_rate:
+            stats.profiler = self._start_profiler()
+
+    def _after_request(self, response: Response) -> Response:
+        stats = g.pop("_instrumentation", None)
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - stats.started
+        serialization = stats.sections.get("serialization", 0.0)
+        if stats.profiler is not None:
+            self._finish_profile(stats, elapsed)
+        size = 0 if response.is_streamed else response.calculate_content_length() or 0
+        self._record(elapsed, response.status_code, stats, serialization, size)
+        response.headers.add("Server-Timing", "db;desc=\"{} queries\";dur={:.2f}, serialize;dur={:.2f}, "
+                                              "total;dur={:.2f}".format(stats.queries, stats.query_seconds * 1000,
+                                                                        serialization * 1000, elapsed * 1000))
+        return response
+
+    def _teardown_request(self, exc) -> None:
+        # after_request isn't called when exception propagates
+        stats = g.pop("_instrumentation", None)
+        if stats is None:
+            return
+        elapsed = time.perf_counter() - stats.started
+        if stats.profiler is not None:
+            self._finish_profile(stats, elapsed)
+        self._record(elapsed, 500, stats, stats.sections.get("serialization", 0.0), 0)
+
+    def _record(self, elapsed: float, status: int, stats: RequestStats, serialization: float, size: int) -> None:
+        key = (request.endpoint or "unmatched", request.method)
+        bucket = next((index for index, bound in enumerate(DURATION_BUCKETS) if elapsed <= bound),
+                      len(DURATION_BUCKETS))
+        with self._lock:
+            metrics = self._metrics.get(key)
+            if metrics is None:
+                metrics = self._metrics[key] = EndpointMetrics()
+            metrics.requests[status] = metrics.requests.get(status, 0) + 1
+            metrics.duration_buckets[bucket] += 1
+            metrics.duration_sum += elapsed
+            metrics.queries += stats.queries
+            metrics.query_seconds += stats.query_seconds
+            metrics.serialization_seconds += serialization
+            metrics.response_bytes += size
+
+    def _start_profiler(self):
+        try:
+            if self.profiler_name == "pyinstrument":
+                from pyinstrument import Profiler  # optional dependency
+                profiler = Profiler()
+                profiler.start()
+            else:
+                import cProfile
+                profiler = cProfile.Profile()
+                profiler.enable()
+        except (ImportError, ValueError, RuntimeError):
+            # not installed, or another profiler is active (one per process since Python 3.12)
+            return None
+        return profiler
+
+    def _finish_profile(self, stats: RequestStats, elapsed: float) -> None:
+        profiler, stats.profiler = stats.profiler, None
+        if self.profiler_name == "pyinstrument":
+            profiler.stop()
+        else:
+            profiler.disable()
+        if not stats.forced_profile and elapsed < self.profile_threshold:
+            return
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = "{}-{}-{}-{}ms".format(datetime.utcnow().strftime("%Y%m%dT%H%M%S.%f"), request.method,
+                                      request.endpoint or "unmatched", int(elapsed * 1000))
+        path = os.path.join(self.profile_dir, name)
+        if self.profiler_name == "pyinstrument":
+            with open(path + ".html", "w") as profile_file:
+                profile_file.write(profiler.output_html())
+        else:
+            # readable by pstats, snakeviz etc.
+            profiler.dump_stats(path + ".prof")
+        with self._lock:
+            self._profiles_written += 1
+        current_app.logger.info("Profile of %s %s (%d ms) written to %s",
+                                request.method, request.path, elapsed * 1000, path)
+
+    def metrics(self) -> str:
+        """Metrics of this worker in Prometheus text exposition format."""
+        with self._lock:
+            items = sorted(self._metrics.items())
+            profiles_written = self._profiles_written
+        lines = [
+            "# HELP blog_http_requests_total Requests answered, by endpoint, method and status.",
+            "# TYPE blog_http_requests_total counter",
+        ]
+        for (endpoint, method), metrics in items:
+            for status, count in sorted(metrics.requests.items()):
+                lines.append('blog_http_requests_total{{endpoint="{}",method="{}",status="{}"}} {}'.format(
+                    _label(endpoint), method, status, count))
+        lines += [
+            "# HELP blog_http_request_duration_seconds Wall time of requests.",
+            "# TYPE blog_http_request_duration_seconds histogram",
+        ]
+        for (endpoint, method), metrics in items:
+            labels = 'endpoint="{}",method="{}"'.format(_label(endpoint), method)
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS + ("+Inf",), metrics.duration_buckets):
+                cumulative += count
+                lines.append('blog_http_request_duration_seconds_bucket{{{},le="{}"}} {}'.format(
+                    labels, bound, cumulative))
+            lines.append("blog_http_request_duration_seconds_sum{{{}}} {:.6f}".format(labels, metrics.duration_sum))
+            lines.append("blog_http_request_duration_seconds_count{{{}}} {}".format(labels, cumulative))
+        for name, kind, help_text, attribute in (
+                ("blog_db_queries_total", "counter", "SQL statements executed.", "queries"),
+                ("blog_db_query_duration_seconds_total", "counter", "Time spent executing SQL statements.",
+                 "query_seconds"),
+                ("blog_serialization_duration_seconds_total", "counter",
+                 "Time spent dumping schemas and encoding JSON.", "serialization_seconds"),
+                ("blog_http_response_size_bytes_total", "counter", "Bytes of response bodies.", "response_bytes")):
+            lines += ["# HELP {} {}".format(name, help_text), "# TYPE {} {}".format(name, kind)]
+            for (endpoint, method), metrics in items:
+                value = getattr(metrics, attribute)
+                lines.append('{}{{endpoint="{}",method="{}"}} {}'.format(
+                    name, _label(endpoint), method, round(value, 6) if isinstance(value, float) else value))
+        lines += [
+            "# HELP blog_profiles_written_total Profiles of slow requests written to disk.",
+            "# TYPE blog_profiles_written_total counter",
+            "blog_profiles_written_total {}".format(profiles_written),
+        ]
+        for collector in self._collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+    def metrics_view(self) -> Response:
+        return Response(self.metrics(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,117 @@
+"""
+Fixed window throttling of login attempts per IP address and of failed
+login attempts per username
+"""
+import threading
+import time
+from typing import Tuple
+
+
+class MemoryCounter:
+    """Counters kept in worker memory, limits are enforced per process."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def incr(self, key: str, window: int) -> Tuple[int, int]:
+        """Increment counter of current window, return (count, seconds until reset)."""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._counters) >= self.max_keys:
+                self._counters = {k: v for k, v in self._counters.items() if v[0] > now}
+            expires_at, count = self._counters.get(key, (0, 0))
+            if expires_at <= now:
+                expires_at, count = now + window, 0
+            count += 1
+            self._counters[key] = (expires_at, count)
+            return count, int(expires_at - now) + 1
+
+    def get(self, key: str) -> Tuple[int, int]:
+        """Return (count, seconds until reset) of current window without incrementing."""
+        now = time.monotonic()
+        with self._lock:
+            expires_at, count = self._counters.get(key, (0, 0))
+        if expires_at <= now:
+            return 0, 0
+        return count, int(expires_at - now) + 1
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._counters.pop(key, None)
+
+
+class RedisCounter:
+    """Counters shared by all workers, works with any server speaking Redis protocol."""
+
+    def __init__(self, url: str, key_prefix: str = "blog:login:"):
+        import redis  # optional dependency, required only by this backend
+
+        self._redis = redis.Redis.from_url(url)
+        self.key_prefix = key_prefix
+
+    def incr(self, key: str, window: int) -> Tuple[int, int]:
+        key = self.key_prefix + key
+        pipe = self._redis.pipeline()
+        pipe.set(key, 0, ex=window, nx=True)
+        pipe.incr(key)
+        pipe.ttl(key)
+        _, count, ttl = pipe.execute()
+        return count, max(ttl, 1)
+
+    def get(self, key: str) -> Tuple[int, int]:
+        key = self.key_prefix + key
+        pipe = self._redis.pipeline()
+        pipe.get(key)
+        pipe.ttl(key)
+        count, ttl = pipe.execute()
+        if count is None:
+            return 0, 0
+        return int(count), max(ttl, 1)
+
+    def reset(self, key: str) -> None:
+        self._redis.delete(self.key_prefix + key)
+
+
+class LoginThrottle:
+
+    def __init__(self, app=None):
+        self.counter = MemoryCounter()
+        self.window = 60
+        self.username_limit = 5
+        self.ip_limit = 20
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        if app.config.get("LOGIN_THROTTLE_BACKEND", "memory") == "redis":
+            self.counter = RedisCounter(app.config["LOGIN_THROTTLE_REDIS_URL"])
+        else:
+            self.counter = MemoryCounter()
+        self.window = app.config.get("LOGIN_THROTTLE_WINDOW", 60)
+        self.username_limit = app.config.get("LOGIN_THROTTLE_USERNAME_LIMIT", 5)
+        self.ip_limit = app.config.get("LOGIN_THROTTLE_IP_LIMIT", 20)
+        app.extensions["login_throttle"] = self
+
+    def hit(self, username: str, ip: str) -> int:
+        """
+        Count login attempt from `ip` and check failed attempts of `username`,
+        return number of seconds client has to wait or 0 if attempt is allowed.
+        """
+        retry_after = 0
+        count, reset_in = self.counter.incr("ip:" + str(ip), self.window)
+        if count > self.ip_limit:
+            retry_after = reset_in
+        count, reset_in = self.counter.get("user:" + username)
+        if count >= self.username_limit:
+            retry_after = max(retry_after, reset_in)
+        return retry_after
+
+    def fail(self, username: str) -> None:
+        """Count failed attempt of `username`."""
+        self.counter.incr("user:" + username, self.window)
+
+    def reset(self, username: str) -> None:
+        """Forget failed attempts after successful login."""
+        self.counter.reset("user:" + username)
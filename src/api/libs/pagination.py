@@ -0,0 +1,97 @@
+"""
+Keyset (cursor) pagination for list endpoints
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+from urllib.parse import urlencode
+
+from flask import request
+from marshmallow import ValidationError
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+CURSOR_DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+def encode_cursor(sort_value: datetime, _id: int) -> str:
+    """Pack position of last returned row into opaque url-safe token."""
+    payload = json.dumps([sort_value.strftime(CURSOR_DATE_FORMAT), _id])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Unpack token created by encode_cursor, raise ValidationError if it's malformed."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        sort_value, _id = json.loads(payload.decode("utf-8"))
+        return datetime.strptime(sort_value, CURSOR_DATE_FORMAT), int(_id)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise ValidationError({"cursor": ["Not a valid cursor."]})
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Opaque token for lists which can't be paginated by key, like ranked search results."""
+    return base64.urlsafe_b64encode(json.dumps(["offset", offset]).encode("utf-8")).decode("ascii")
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """Unpack token created by encode_offset_cursor, raise ValidationError if it's malformed."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        marker, offset = json.loads(payload.decode("utf-8"))
+        if marker != "offset" or int(offset) < 0:
+            raise ValueError
+        return int(offset)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        raise ValidationError({"cursor": ["Not a valid cursor."]})
+
+
+def paginate(query, sort_column, id_column, cursor: str = None,
+             limit: int = DEFAULT_LIMIT, descending: bool = True) -> Tuple[List, Optional[str]]:
+    """
+    Return one page of query results ordered by (sort_column, id_column)
+    together with cursor pointing to the next page (None on last page).
+
+    Rows are located by comparing with the last seen key instead of using
+    OFFSET, so every page costs a single index range scan.
+    """
+    if cursor:
+        sort_value, _id = decode_cursor(cursor)
+        if descending:
+            query = query.filter(or_(sort_column < sort_value,
+                                     and_(sort_column == sort_value, id_column < _id)))
+        else:
+            query = query.filter(or_(sort_column > sort_value,
+                                     and_(sort_column == sort_value, id_column > _id)))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    # fetch one extra row to find out whether next page exists
+    items = query.limit(limit + 1).all()
+    if len(items) <= limit:
+        return items, None
+    items = items[:limit]
+    last = items[-1]
+    return items, encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+
+
+def pagination_headers(next_cursor: Optional[str]) -> dict:
+    """
+    Headers advertising next page, response body stays a plain list.
+
+    Link target is relative, so responses cached without host and scheme in
+    their key are valid on every host the app is served at.
+    """
+    if not next_cursor:
+        return {}
+    args = request.args.to_dict()
+    args["cursor"] = next_cursor
+    next_url = "{}{}?{}".format(request.script_root, request.path, urlencode(args))
+    return {"X-Next-Cursor": next_cursor, "Link": '<{}>; rel="next"'.format(next_url)}
@@ -0,0 +1,74 @@
+"""
+Bcrypt hashing and verification on a bounded process pool
+"""
+import threading
+from concurrent.futures import TimeoutError
+
+import bcrypt
+
+from libs.executors import ProcessPool
+
+
+class PasswordPoolBusy(Exception):
+    """All workers and queue slots are taken, caller should answer 429."""
+
+
+def _hash_password(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check_password(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt outside of request threads, so a login burst can't take CPU
+    from other endpoints. At most workers + queue_limit operations are in
+    flight per process, any further one fails fast with PasswordPoolBusy.
+    Operation which timed out keeps its slot until its process finishes it.
+
+    With workers set to 0 bcrypt runs inline (handy for shell and tests).
+    """
+
+    def __init__(self, app=None):
+        self.rounds = 12
+        self.workers = 2
+        self.queue_limit = 8
+        self.timeout = 10
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+        self._pool = ProcessPool(self.workers)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.rounds = app.config.get("BCRYPT_LOG_ROUNDS", 12)
+        self.workers = self._pool.max_workers = app.config.get("PASSWORD_HASHING_WORKERS", 2)
+        self.queue_limit = app.config.get("PASSWORD_HASHING_QUEUE_LIMIT", 8)
+        self.timeout = app.config.get("PASSWORD_HASHING_TIMEOUT", 10)
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_limit)
+        app.extensions["password_hasher"] = self
+
+    def hash_password(self, password: str) -> str:
+        return self._run(_hash_password, password.encode("utf-8"), self.rounds).decode("utf-8")
+
+    def check_password(self, password: str, hashed: str) -> bool:
+        return self._run(_check_password, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordPoolBusy()
+        slots = self._slots
+        try:
+            future = self._pool.submit(func, *args)
+        except Exception:
+            slots.release()
+            raise
+        # released when the work is done, not when the caller stops waiting for it
+        future.add_done_callback(lambda done: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise PasswordPoolBusy()
@@ -0,0 +1,98 @@
+"""
+Articles rendered once on save, served as ready JSON on read
+
+Published article is dumped by ArticleSchema when it's saved. Values which
+change without saving the article (likes_count, updated_date) or depend on
+files on disk (image_src) are left as named slots and filled on read, so
+ArticleDetail neither parses the content JSONField nor runs marshmallow.
+"""
+from html import escape
+from typing import Union
+
+from flask import current_app
+
+from libs.representation import RawJSON, dumps
+
+# never emitted by dumps() (control characters are escaped), valid in PostgreSQL text
+SLOT = "\x1f"
+VOLATILE_FIELDS = ("updated_date", "likes_count", "image_src")
+
+# created on first render, building a schema compiles its dump function
+_schemas = {}
+
+
+def _render_schemas() -> dict:
+    if not _schemas:
+        # schemas import models, which render on save
+        from schemas.article import ArticleSchema
+        from schemas.article_content import ContentSchema
+
+        _schemas.update(content=ContentSchema(many=True), article=ArticleSchema(exclude=VOLATILE_FIELDS),
+                        keys=tuple(ArticleSchema().dump_fields))
+    return _schemas
+
+
+def render_article(article) -> str:
+    """
+    Validate content and serialize article like ArticleSchema does, with slots
+    in place of volatile fields. Raises ValidationError on malformed content.
+    """
+    schemas = _render_schemas()
+    schemas["content"].load(article.content)
+    # volatile fields aren't dumped at all, image_src needs request context
+    data = schemas["article"].dump(article)
+    # same bytes as dumps() of the whole dump, response of either path has the same ETag
+    fields = []
+    for key in schemas["keys"]:
+        if key in VOLATILE_FIELDS:
+            fields.append("{}:{}{}{}".format(dumps(key), SLOT, key, SLOT))
+        else:
+            fields.append("{}:{}".format(dumps(key), dumps(data[key])))
+    return "{" + ",".join(fields) + "}"
+
+
+def fill_rendered_article(rendered: str, updated_date, likes_count: int, image_src: str) -> RawJSON:
+    """Response body of rendered article, identical to ArticleSchema dump."""
+    values = {
+        "updated_date": updated_date.isoformat() if updated_date else None,
+        "likes_count": likes_count,
+        "image_src": image_src,
+    }
+    parts = rendered.split(SLOT)
+    parts[1::2] = [dumps(values[name]) for name in parts[1::2]]
+    return RawJSON("".join(parts))
+
+
+def render_article_html(article) -> Union[str, None]:
+    """
+    HTML of article content with highlighted code, if ARTICLE_RENDER_HTML is
+    enabled. Code is highlighted by Pygments when it's installed.
+    """
+    if not current_app.config.get("ARTICLE_RENDER_HTML"):
+        return None
+    html = []
+    for paragraph in article.content:
+        html.append("<h2>{}</h2>".format(escape(paragraph["paragraph_title"])))
+        html.append("<p>{}</p>".format(escape(paragraph["content"])))
+        code = paragraph.get("code")
+        if code and code.get("content"):
+            html.append(highlight_code(code["content"], code.get("language")))
+        image = paragraph.get("image")
+        if image and image.get("url"):
+            html.append('<img src="{}" alt="{}">'.format(escape(image["url"]), escape(image.get("description", ""))))
+    return "\n".join(html)
+
+
+def highlight_code(code: str, language: str = None) -> str:
+    try:
+        from pygments import highlight
+        from pygments.formatters import HtmlFormatter
+        from pygments.lexers import get_lexer_by_name
+        from pygments.util import ClassNotFound
+    except ImportError:
+        return "<pre><code>{}</code></pre>".format(escape(code))
+    try:
+        lexer = get_lexer_by_name(language or "text")
+    except ClassNotFound:
+        lexer = get_lexer_by_name("text")
+    return highlight(code, lexer, HtmlFormatter())
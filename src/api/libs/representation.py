@@ -0,0 +1,42 @@
+"""
+Response representations registered on Flask-RESTful Api
+"""
+import json
+
+from flask import current_app, make_response
+from flask_restful.representations.json import output_json as restful_output_json
+
+from libs.instrumentation import measure
+
+
+class RawJSON(str):
+    """Already serialized JSON document, written to response as it is."""
+
+
+def dumps(data) -> str:
+    """
+    Compact JSON with UTF-8 left unescaped, independent of DEBUG. Rendered
+    articles (libs.rendering) and ArticleDetail responses dumped on request
+    are encoded this way, so each of its paths gives the same bytes.
+    """
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def output_json(data, code, headers=None):
+    """
+    Flask-RESTful JSON representation passing RawJSON through. With
+    JSON_ENCODER set to "orjson" (optional dependency) other data is encoded
+    by orjson straight to bytes, in compact form.
+    """
+    with measure("serialization"):
+        if isinstance(data, RawJSON):
+            body = data + "\n"
+        elif current_app.config.get("JSON_ENCODER") == "orjson" and not current_app.debug:
+            import orjson
+            body = orjson.dumps(data) + b"\n"
+        else:
+            return restful_output_json(data, code, headers)
+    response = make_response(body, code)
+    response.headers.extend(headers or {})
+    response.mimetype = "application/json"
+    return response
@@ -0,0 +1,184 @@
+"""
+Full-text search over published articles and snippets
+
+Every published item has one row in blog_search_document, written in the same
+transaction as the item itself. Matching and ranking is done by the database:
+tsvector + GIN index on PostgreSQL, FTS5 virtual table on SQLite.
+"""
+from datetime import datetime
+from html import escape
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import func, text
+
+from models.search_document import SearchDocumentModel
+from settings.db import db
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+# private use characters wrapping matches in database output, replaced by
+# HIGHLIGHT_START/STOP once the user-authored text around them is escaped
+MATCH_START = "\ue000"
+MATCH_STOP = "\ue001"
+
+
+def _without_markers(text: str) -> str:
+    # indexed text can't pass for a match
+    return text.replace(MATCH_START, "").replace(MATCH_STOP, "")
+
+
+def article_text(article) -> Tuple[str, str]:
+    """Title and body of article document: description and all paragraphs with their code."""
+    parts = [article.description or ""]
+    for paragraph in article.content or []:
+        parts.append(paragraph.get("paragraph_title") or "")
+        parts.append(paragraph.get("content") or "")
+        parts.append((paragraph.get("code") or {}).get("content") or "")
+    return _without_markers(article.title), _without_markers("\n".join(part for part in parts if part))
+
+
+def snippet_text(snippet) -> Tuple[str, str]:
+    """Title and body of snippet document: description and code."""
+    return _without_markers(snippet.title), _without_markers(
+        "\n".join(part for part in (snippet.description, snippet.code) if part))
+
+
+def highlight_html(text: str) -> str:
+    """HTML of text with matches wrapped by database in MATCH_START/STOP, everything else escaped."""
+    if text is None:
+        return None
+    return escape(text).replace(MATCH_START, HIGHLIGHT_START).replace(MATCH_STOP, HIGHLIGHT_STOP)
+
+
+def fts5_query(query: str) -> str:
+    """User input as FTS5 query matching all words, without FTS5 operators."""
+    return " ".join('"{}"'.format(word.replace('"', '""')) for word in query.split())
+
+
+class SearchIndex:
+    """
+    Updates documents from model write paths (nothing is committed here) and
+    runs ranked, highlighted searches.
+    """
+
+    def __init__(self, app=None):
+        self.language = "english"
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        self.language = app.config.get("SEARCH_LANGUAGE", "english")
+        app.extensions["search_index"] = self
+
+    def index_article(self, article) -> None:
+        if article.published_date:
+            self._store("article", article, *article_text(article))
+        else:
+            self.remove("article", article.id)
+
+    def index_snippet(self, snippet) -> None:
+        if snippet.published_date:
+            self._store("snippet", snippet, *snippet_text(snippet))
+        else:
+            self.remove("snippet", snippet.id)
+
+    def add_new(self, kind: str, items: Iterable) -> None:
+        """
+        Add documents of published items which have none yet (e.g. they were
+        just imported) with one executemany, instead of looking each one up.
+        """
+        item_text = article_text if kind == "article" else snippet_text
+        now = datetime.utcnow()
+        rows = []
+        for item in items:
+            title, body = item_text(item)
+            rows.append({"kind": kind, "item_id": item.id, "slug": item.slug, "title": title, "body": body,
+                         "updated_date": now})
+        if not rows:
+            return
+        document = SearchDocumentModel
+        db.session.execute(document.__table__.insert(), rows)
+        if db.engine.dialect.name == "postgresql":
+            db.session.query(document).filter(
+                document.kind == kind, document.item_id.in_([row["item_id"] for row in rows])
+            ).update({document.search_vector: self._search_vector(document.title, document.body)},
+                     synchronize_session=False)
+
+    def remove(self, kind: str, item_id: int) -> None:
+        if item_id is None:
+            return
+        SearchDocumentModel.query.filter_by(kind=kind, item_id=item_id).delete(synchronize_session=False)
+
+    def _store(self, kind: str, item, title: str, body: str) -> None:
+        if item.id is None:
+            db.session.flush()  # item is new, id is needed
+        slug = item.slug
+        document = SearchDocumentModel.find_by_item(kind, item.id)
+        if document is None:
+            document = SearchDocumentModel(kind=kind, item_id=item.id)
+        elif (document.slug, document.title, document.body) == (slug, title, body):
+            return
+        document.slug = slug
+        document.title = title
+        document.body = body
+        if db.engine.dialect.name == "postgresql":
+            document.search_vector = self._search_vector(title, body)
+        db.session.add(document)
+
+    def _search_vector(self, title, body):
+        return func.setweight(func.to_tsvector(self.language, title), "A").op("||")(
+            func.setweight(func.to_tsvector(self.language, body), "B"))
+
+    def search(self, query: str, kind: str = None, offset: int = 0, limit: int = 20) -> List[dict]:
+        """Page of documents matching all words of query, best matches first."""
+        if db.engine.dialect.name == "postgresql":
+            rows = self._search_postgresql(query, kind, offset, limit)
+        else:
+            rows = self._search_sqlite(query, kind, offset, limit)
+        return [
+            {
+                "type": row.kind,
+                "id": row.item_id,
+                "slug": row.slug,
+                "title": row.title,
+                "rank": round(float(row.rank), 6),
+                "highlights": {"title": highlight_html(row.title_highlight),
+                               "body": highlight_html(row.body_highlight)},
+            }
+            for row in rows
+        ]
+
+    def _search_postgresql(self, query: str, kind: str, offset: int, limit: int):
+        document = SearchDocumentModel
+        ts_query = func.plainto_tsquery(self.language, query)
+        rank = func.ts_rank_cd(document.search_vector, ts_query)
+        options = "StartSel={}, StopSel={}".format(MATCH_START, MATCH_STOP)
+        statement = db.session.query(
+            document.kind, document.item_id, document.slug, document.title,
+            rank.label("rank"),
+            func.ts_headline(self.language, document.title, ts_query,
+                             options + ", HighlightAll=TRUE").label("title_highlight"),
+            func.ts_headline(self.language, document.body, ts_query,
+                             options + ", MaxFragments=2, MinWords=5, MaxWords=20").label("body_highlight"),
+        ).filter(document.search_vector.op("@@")(ts_query))
+        if kind:
+            statement = statement.filter(document.kind == kind)
+        return statement.order_by(rank.desc(), document.id).offset(offset).limit(limit).all()
+
+    def _search_sqlite(self, query: str, kind: str, offset: int, limit: int):
+        match = fts5_query(query)
+        if not match:
+            return []
+        # bm25 is lower for better matches, title weighs 10 times more than body
+        statement = text(
+            "SELECT d.kind, d.item_id, d.slug, d.title, -bm25(blog_search_fts, 10.0, 1.0) AS rank, "
+            "highlight(blog_search_fts, 0, :start, :stop) AS title_highlight, "
+            "snippet(blog_search_fts, 1, :start, :stop, '...', 20) AS body_highlight "
+            "FROM blog_search_fts JOIN blog_search_document AS d ON d.id = blog_search_fts.rowid "
+            "WHERE blog_search_fts MATCH :match" + (" AND d.kind = :kind" if kind else "") + " "
+            "ORDER BY bm25(blog_search_fts, 10.0, 1.0), d.id LIMIT :limit OFFSET :offset"
+        )
+        return db.session.execute(statement, {
+            "match": match, "kind": kind, "limit": limit, "offset": offset,
+            "start": MATCH_START, "stop": MATCH_STOP,
+        }).fetchall()
@@ -0,0 +1,153 @@
+"""
+Compiled dump functions for marshmallow schemas
+
+Schema.dump asks every field to look up and format its value through a few
+layers of generic calls, per object. compile_dump() reads schema's fields once
+and generates a plain Python function doing the same for this schema only.
+Fields it doesn't know (or configured in unusual ways) are still serialized by
+marshmallow itself, so output is always the same as Schema.dump.
+"""
+import inspect
+from collections.abc import Mapping
+from typing import Callable
+
+from marshmallow import fields, missing
+from marshmallow.utils import ensure_text_type
+from marshmallow_sqlalchemy.fields import Related
+
+from libs.instrumentation import measure
+
+_MISSING = missing
+
+
+def _is_iso_datetime(field) -> bool:
+    return type(field) is fields.DateTime and field.format in (None, "iso")
+
+
+def _single_argument(function) -> bool:
+    try:
+        return len(inspect.signature(function).parameters) == 1
+    except (TypeError, ValueError):
+        return False
+
+
+def _value_expression(field, name: str, namespace: dict) -> str:
+    """Python expression formatting value `v` like field does, None if field isn't supported."""
+    field_type = type(field)
+    if field_type is fields.String:
+        return "v if v is None or v.__class__ is str else ensure_text_type(v)"
+    if field_type is fields.Integer and not field.as_string:
+        return "v if v is None or v.__class__ is int else int(v)"
+    if field_type is fields.Boolean:
+        namespace[name] = field
+        return "v if v is None or v.__class__ is bool else {}._serialize(v, None, obj)".format(name)
+    if _is_iso_datetime(field):
+        return "None if v is None else v.isoformat()"
+    if field_type in (fields.Raw, fields.Dict) and getattr(field, "key_field", None) is None \
+            and getattr(field, "value_field", None) is None:
+        return "v"
+    if field_type is fields.Nested:
+        nested = compile_dump(field.schema)
+        if nested is None:
+            return None
+        namespace[name] = nested
+        if field.many or field.schema.many:
+            return "None if v is None else [{}(item) for item in v]".format(name)
+        return "None if v is None else {}(v)".format(name)
+    if field_type is Related and not field.columns:
+        keys = field.related_keys
+        if len(keys) != 1:
+            return None
+        return "None if v is None else getattr(v, {!r}, None)".format(keys[0].key)
+    return None
+
+
+def _generate(schema, mapping: bool, namespace: dict) -> str:
+    lines = []
+    for index, (attr_name, field) in enumerate(schema.dump_fields.items()):
+        key = field.data_key if field.data_key is not None else attr_name
+        name = "_field_{}".format(index)
+        attribute = field.attribute or attr_name
+
+        if type(field) is fields.Function and field.serialize_func and _single_argument(field.serialize_func):
+            namespace[name] = field.serialize_func
+            lines.append("    out[{!r}] = {}(obj)".format(key, name))
+            continue
+
+        expression = None
+        if field.default is _MISSING and "." not in attribute:
+            expression = _value_expression(field, name, namespace)
+        if expression is None:
+            # anything else is serialized by the field itself
+            namespace[name] = field
+            lines.append("    v = {}.serialize({!r}, obj, accessor=get_attribute)".format(name, attr_name))
+            lines.append("    if v is not _MISSING:")
+            lines.append("        out[{!r}] = v".format(key))
+            continue
+
+        if mapping:
+            lines.append("    v = obj.get({!r}, _MISSING)".format(attribute))
+        else:
+            lines.append("    v = getattr(obj, {!r}, _MISSING)".format(attribute))
+        lines.append("    if v is not _MISSING:")
+        lines.append("        out[{!r}] = {}".format(key, expression))
+    return "\n".join(lines) or "    pass"
+
+
+def compile_dump(schema) -> Callable:
+    """
+    Function serializing single object like schema.dump(obj, many=False),
+    None when schema has pre/post dump processors.
+    """
+    if schema._has_processors("pre_dump") or schema._has_processors("post_dump"):
+        return None
+    namespace = {
+        "_MISSING": _MISSING,
+        "Mapping": Mapping,
+        "dict_class": schema.dict_class,
+        "get_attribute": schema.get_attribute,
+        "ensure_text_type": ensure_text_type,
+    }
+    # dicts (e.g. JSON column content) are read by key, everything else by attribute
+    source = "\n".join([
+        "def dump_mapping(obj):",
+        "    out = dict_class()",
+        _generate(schema, True, namespace),
+        "    return out",
+        "",
+        "def dump_object(obj):",
+        "    out = dict_class()",
+        _generate(schema, False, namespace),
+        "    return out",
+        "",
+        "def dump(obj):",
+        "    if isinstance(obj, Mapping):",
+        "        return dump_mapping(obj)",
+        "    return dump_object(obj)",
+    ])
+    exec(compile(source, "<compiled {}>".format(type(schema).__name__), "exec"), namespace)
+    return namespace["dump"]
+
+
+class CompiledDumpMixin:
+    """
+    Schema mixin replacing dump() with function compiled on first use.
+    Loading and validation are untouched.
+    """
+    _compiled_dump = None
+
+    def dump(self, obj, *, many: bool = None):
+        with measure("serialization"):
+            return self._dump(obj, many)
+
+    def _dump(self, obj, many: bool):
+        if self._compiled_dump is None:
+            self._compiled_dump = compile_dump(self) or False
+        if self._compiled_dump is False:
+            return super().dump(obj, many=many)
+
+        many = self.many if many is None else bool(many)
+        if many:
+            dump = self._compiled_dump
+            return [dump(item) for item in obj]
+        return self._compiled_dump(obj)
@@ -0,0 +1,182 @@
+"""
+Revoked JWT store shared by all workers
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List
+
+from models.revoked_token import RevokedTokenModel
+
+
+class BloomFilter:
+    """Set membership test without false negatives, used as local pre-check."""
+
+    def __init__(self, capacity: int = 100000, hashes: int = 7, bits_per_item: int = 10):
+        self.size = capacity * bits_per_item
+        self.hashes = hashes
+        self._bits = bytearray(self.size // 8 + 1)
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode("utf-8")).digest()
+        first = int.from_bytes(digest[:8], "big")
+        second = int.from_bytes(digest[8:16], "big") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position // 8] & (1 << (position % 8))
+                   for position in self._positions(item))
+
+
+class DatabaseBackend:
+    """Keeps revoked tokens in blog_revoked_token table."""
+
+    def revoke(self, jti: str, expires_date: datetime) -> None:
+        RevokedTokenModel.revoke(jti, expires_date)
+
+    def is_revoked(self, jti: str) -> bool:
+        return RevokedTokenModel.find_by_jti(jti) is not None
+
+    def revoked_since(self, since: datetime = None) -> List[str]:
+        return RevokedTokenModel.find_jtis_revoked_since(since)
+
+    def purge_expired(self) -> int:
+        return RevokedTokenModel.purge_expired()
+
+
+class RedisBackend:
+    """
+    Keeps every revoked jti as a key expiring together with the token, works
+    with any server speaking Redis protocol.
+
+    Sorted set scored by revocation time lets workers fetch only new entries.
+    """
+
+    def __init__(self, url: str, max_token_age: timedelta = timedelta(days=30),
+                 key_prefix: str = "blog:revoked:"):
+        import redis  # optional dependency, required only by this backend
+
+        self._redis = redis.Redis.from_url(url)
+        self.max_token_age = max_token_age
+        self.key_prefix = key_prefix
+        self.log_key = key_prefix + "log"
+
+    def revoke(self, jti: str, expires_date: datetime) -> None:
+        ttl = max(int((expires_date - datetime.utcnow()).total_seconds()), 1)
+        pipe = self._redis.pipeline()
+        pipe.set(self.key_prefix + jti, 1, ex=ttl)
+        pipe.zadd(self.log_key, {jti: time.time()})
+        pipe.execute()
+
+    def is_revoked(self, jti: str) -> bool:
+        return bool(self._redis.exists(self.key_prefix + jti))
+
+    def revoked_since(self, since: datetime = None) -> List[str]:
+        low = (since - datetime(1970, 1, 1)).total_seconds() if since else "-inf"
+        return [jti.decode("utf-8") for jti in self._redis.zrangebyscore(self.log_key, low, "+inf")]
+
+    def purge_expired(self) -> int:
+        """Token keys expire by themselves, only old log entries have to be removed."""
+        oldest = time.time() - self.max_token_age.total_seconds()
+        return self._redis.zremrangebyscore(self.log_key, "-inf", oldest)
+
+
+class TokenBlacklist:
+    """
+    Revocation check called for every authenticated request.
+
+    Each worker keeps a bloom filter of revoked jti refreshed from backend at
+    most every sync_interval seconds, so the common not revoked token is
+    accepted without a round trip. Token revoked by another worker may be
+    accepted for up to sync_interval seconds, set it to 0 to always ask backend.
+    """
+
+    def __init__(self, app=None):
+        self.backend = DatabaseBackend()
+        self.sync_interval = 5
+        self.rebuild_interval = 3600
+        self.filter_capacity = 100000
+        self.max_token_age = timedelta(days=30)
+        self._filter = BloomFilter(self.filter_capacity)
+        self._known_revoked = OrderedDict()
+        self._synced_at = None
+        self._synced_date = None
+        self._rebuilt_at = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        refresh_expires = app.config.get("JWT_REFRESH_TOKEN_EXPIRES", timedelta(days=30))
+        if isinstance(refresh_expires, timedelta):
+            self.max_token_age = refresh_expires
+        if app.config.get("REVOKED_TOKENS_BACKEND", "database") == "redis":
+            self.backend = RedisBackend(app.config["REVOKED_TOKENS_REDIS_URL"], self.max_token_age)
+        else:
+            self.backend = DatabaseBackend()
+        self.sync_interval = app.config.get("REVOKED_TOKENS_SYNC_INTERVAL", 5)
+        self.filter_capacity = app.config.get("REVOKED_TOKENS_FILTER_CAPACITY", 100000)
+        self._filter = BloomFilter(self.filter_capacity)
+        self._synced_at = self._rebuilt_at = None
+        app.extensions["token_blacklist"] = self
+
+    def revoke(self, jti: str, exp: int = None) -> None:
+        """Revoke token until its exp (epoch seconds) passes."""
+        if exp:
+            expires_date = datetime.utcfromtimestamp(exp)
+        else:
+            expires_date = datetime.utcnow() + self.max_token_age
+        self.backend.revoke(jti, expires_date)
+        with self._lock:
+            self._filter.add(jti)
+            self._remember(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        if self.sync_interval:
+            self._sync()
+            if jti not in self._filter:
+                return False
+        if jti in self._known_revoked:
+            return True
+        revoked = self.backend.is_revoked(jti)
+        if revoked:
+            with self._lock:
+                self._remember(jti)
+        return revoked
+
+    def purge_expired(self) -> int:
+        return self.backend.purge_expired()
+
+    def _remember(self, jti: str, max_entries: int = 10000) -> None:
+        self._known_revoked[jti] = True
+        while len(self._known_revoked) > max_entries:
+            self._known_revoked.popitem(last=False)
+
+    def _sync(self) -> None:
+        now = time.monotonic()
+        if self._synced_at is not None and now - self._synced_at < self.sync_interval:
+            return
+        with self._lock:
+            if self._synced_at is not None and now - self._synced_at < self.sync_interval:
+                return
+            synced_date = datetime.utcnow()
+            if self._rebuilt_at is None or now - self._rebuilt_at >= self.rebuild_interval:
+                # start from scratch now and then, so expired entries don't fill the filter
+                fresh = BloomFilter(self.filter_capacity)
+                for jti in self.backend.revoked_since(None):
+                    fresh.add(jti)
+                self._filter = fresh
+                self._rebuilt_at = now
+            else:
+                # overlap previous sync to tolerate clock differences between workers
+                since = self._synced_date - timedelta(seconds=5)
+                for jti in self.backend.revoked_since(since):
+                    self._filter.add(jti)
+            self._synced_at = now
+            self._synced_date = synced_date
@@ -0,0 +1,130 @@
+"""
+Request scoped unit of work
+
+Every API view runs in one transaction. Model write paths call commit(), which
+during request only flushes (ids get assigned, constraints are checked) and
+the view wrapped by `transactional` commits once when it answers with status
+below 400, or rolls everything back. Side effects which must not happen for
+rolled back changes (cache invalidation, scheduling of image variants, removal
+of files) are registered with after_commit and run after the commit.
+
+Background jobs stage their changes the same way in `with unit_of_work():`.
+Elsewhere (CLI commands) commit() commits right away and after_commit
+callbacks run immediately.
+
+Serialization failures and deadlocks (PostgreSQL) and locked database
+(SQLite) roll back and run the whole view again, at most
+UNIT_OF_WORK_RETRIES times, unless the view called disable_retries().
+"""
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, List, Union
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import exc
+
+from settings.db import db
+
+# serialization_failure, deadlock_detected
+TRANSIENT_PGCODES = {"40001", "40P01"}
+# seconds, doubled with every retry and jittered
+RETRY_BACKOFF = 0.02
+
+
+def _pending() -> Union[List[tuple], None]:
+    if not has_app_context():
+        return None
+    return g.get("_unit_of_work")
+
+
+def commit() -> None:
+    """Commit now, or only flush when request's unit of work commits later."""
+    if _pending() is None:
+        db.session.commit()
+    else:
+        db.session.flush()
+
+
+def after_commit(callback: Callable, *args) -> None:
+    """Call callback(*args) once changes are committed, same calls are made once per request."""
+    pending = _pending()
+    if pending is None:
+        callback(*args)
+    elif (callback, args) not in pending:
+        pending.append((callback, args))
+
+
+def is_transient(error: exc.DBAPIError) -> bool:
+    """Failure which goes away when transaction is run again."""
+    if getattr(error.orig, "pgcode", None) in TRANSIENT_PGCODES:
+        return True
+    return "database is locked" in str(error.orig)
+
+
+def disable_retries() -> None:
+    """Don't run current view again, e.g. it has read request body which can't be read twice."""
+    g._unit_of_work_no_retries = True
+
+
+def _run_callbacks(pending: List[tuple]) -> None:
+    for callback, args in pending:
+        callback(*args)
+
+
+@contextmanager
+def unit_of_work():
+    """Commit changes staged in block once at its end, roll them back on exception."""
+    g._unit_of_work = pending = []
+    try:
+        yield
+        db.session.commit()
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        g.pop("_unit_of_work", None)
+    _run_callbacks(pending)
+
+
+def _rewind_uploads() -> None:
+    # view reads uploaded files again when it's retried
+    for storage in request.files.values():
+        storage.stream.seek(0)
+
+
+def transactional(view):
+    """Run API view in one transaction committed when it succeeds, see module docstring."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        retries = current_app.config.get("UNIT_OF_WORK_RETRIES", 0)
+        for attempt in itertools.count():
+            g._unit_of_work = pending = []
+            try:
+                response = view(*args, **kwargs)
+                db.session.flush()
+                # flush or bulk statement sent to primary marks the request as writing
+                if response.status_code < 400 and g.get("_db_wrote"):
+                    db.session.commit()
+                else:
+                    db.session.rollback()
+                    del pending[:]
+            except exc.DBAPIError as error:
+                db.session.rollback()
+                if attempt >= retries or not is_transient(error) or g.get("_unit_of_work_no_retries"):
+                    raise
+                current_app.logger.info("Retrying %s %s after transient failure: %s",
+                                        request.method, request.path, error.orig)
+                _rewind_uploads()
+                time.sleep(random.uniform(0, RETRY_BACKOFF * 2 ** attempt))
+                continue
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                g.pop("_unit_of_work", None)
+            _run_callbacks(pending)
+            return response
+    return wrapper
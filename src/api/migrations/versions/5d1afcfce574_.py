@@ -0,0 +1,69 @@
+"""add slug column to articles and snippets
+
+Revision ID: 5d1afcfce574
+Revises: 6a14cdf98cf2
+Create Date: 2026-10-18 10:12:41.203518
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from slugify import slugify
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1afcfce574'
+down_revision = '6a14cdf98cf2'
+branch_labels = None
+depends_on = None
+
+
+def _backfill_slugs(table_name):
+    """
+    Store slugified title of every row. Colliding slugs get id suffix (and a
+    counter, if that's taken too), titles without letters or digits their id.
+    """
+    if context.is_offline_mode():
+        # --sql scripts can't read rows, they are meant for empty databases
+        return
+    connection = op.get_bind()
+    table = sa.table(table_name,
+                     sa.column('id', sa.Integer),
+                     sa.column('title', sa.String),
+                     sa.column('slug', sa.String))
+    taken = set()
+    rows = connection.execute(
+        sa.select([table.c.id, table.c.title]).order_by(table.c.id))
+    for _id, title in rows.fetchall():
+        base = slugify(title or "") or str(_id)
+        slug, attempt = base, 1
+        while slug in taken:
+            suffix = _id if attempt == 1 else "{}-{}".format(_id, attempt)
+            slug = "{}-{}".format(base, suffix)
+            attempt += 1
+        taken.add(slug)
+        connection.execute(
+            table.update().where(table.c.id == _id).values(slug=slug))
+
+
+def upgrade():
+    op.add_column('blog_article', sa.Column('slug', sa.String(length=200), nullable=True))
+    op.add_column('blog_snippet', sa.Column('slug', sa.String(), nullable=True))
+
+    _backfill_slugs('blog_article')
+    _backfill_slugs('blog_snippet')
+
+    with op.batch_alter_table('blog_article') as batch_op:
+        batch_op.alter_column('slug', existing_type=sa.String(length=200), nullable=False)
+        batch_op.create_index(batch_op.f('ix_blog_article_slug'), ['slug'], unique=True)
+    with op.batch_alter_table('blog_snippet') as batch_op:
+        batch_op.alter_column('slug', existing_type=sa.String(), nullable=False)
+        batch_op.create_index(batch_op.f('ix_blog_snippet_slug'), ['slug'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('blog_snippet') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_blog_snippet_slug'))
+        batch_op.drop_column('slug')
+    with op.batch_alter_table('blog_article') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_blog_article_slug'))
+        batch_op.drop_column('slug')
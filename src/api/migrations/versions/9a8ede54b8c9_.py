@@ -0,0 +1,32 @@
+"""add updated_date to articles, snippets and tags
+
+Revision ID: 9a8ede54b8c9
+Revises: fc59d03ace4e
+Create Date: 2026-10-18 13:05:32.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a8ede54b8c9'
+down_revision = 'fc59d03ace4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('blog_article', sa.Column('updated_date', sa.DateTime(), nullable=True))
+    op.add_column('blog_snippet', sa.Column('updated_date', sa.DateTime(), nullable=True))
+    op.add_column('blog_tag', sa.Column('updated_date', sa.DateTime(), nullable=True))
+
+    op.execute("UPDATE blog_article SET updated_date = COALESCE(published_date, created_date, CURRENT_TIMESTAMP)")
+    op.execute("UPDATE blog_snippet SET updated_date = COALESCE(published_date, created_date, CURRENT_TIMESTAMP)")
+    op.execute("UPDATE blog_tag SET updated_date = CURRENT_TIMESTAMP")
+
+
+def downgrade():
+    op.drop_column('blog_tag', 'updated_date')
+    op.drop_column('blog_snippet', 'updated_date')
+    op.drop_column('blog_article', 'updated_date')
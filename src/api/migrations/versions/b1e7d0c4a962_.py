@@ -0,0 +1,36 @@
+"""backfill and require created_date of articles and snippets
+
+Revision ID: b1e7d0c4a962
+Revises: 7d21e5b08c3a
+Create Date: 2026-10-19 09:41:17.530862
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b1e7d0c4a962'
+down_revision = '7d21e5b08c3a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # draft lists are paginated by created_date, cursor can't point past NULL
+    op.execute("UPDATE blog_article SET created_date = COALESCE(published_date, updated_date, CURRENT_TIMESTAMP) "
+               "WHERE created_date IS NULL")
+    op.execute("UPDATE blog_snippet SET created_date = COALESCE(published_date, updated_date, CURRENT_TIMESTAMP) "
+               "WHERE created_date IS NULL")
+
+    with op.batch_alter_table('blog_article') as batch_op:
+        batch_op.alter_column('created_date', existing_type=sa.DateTime(), nullable=False)
+    with op.batch_alter_table('blog_snippet') as batch_op:
+        batch_op.alter_column('created_date', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('blog_snippet') as batch_op:
+        batch_op.alter_column('created_date', existing_type=sa.DateTime(), nullable=True)
+    with op.batch_alter_table('blog_article') as batch_op:
+        batch_op.alter_column('created_date', existing_type=sa.DateTime(), nullable=True)
@@ -1,7 +1,7 @@
 """empty message
 
 Revision ID: d7f4ee177b03
-Revises: 
+Revises: c49989933f4a
 Create Date: 2019-09-20 10:02:57.259920
 
 """
@@ -11,7 +11,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision = 'd7f4ee177b03'
-down_revision = None
+down_revision = 'c49989933f4a'
 branch_labels = None
 depends_on = None
 
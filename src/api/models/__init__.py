@@ -2,3 +2,7 @@ from .article import ArticleModel
 from .tag import TagModel
 from .user import UserModel
 from .snippet import SnippetModel
+from .revoked_token import RevokedTokenModel
+from .image_blob import ImageBlobModel
+from .search_document import SearchDocumentModel
+from .highlighted_code import HighlightedCodeModel
@@ -1,7 +1,19 @@
 from datetime import datetime
-from typing import List
+from functools import partial
+from typing import List, Optional, Tuple, Union
+from marshmallow import ValidationError
+from sqlalchemy.orm import joinedload, selectinload, validates
 from sqlalchemy_jsonfield import JSONField
 from slugify import slugify
+from libs.db_helper import insert_ignoring_conflicts
+from libs.highlighting import article_blocks
+from libs.pagination import DEFAULT_LIMIT, paginate
+from libs.rendering import render_article, render_article_html
+from libs.unit_of_work import after_commit, commit
+from models.tag import TagModel
+from settings.cache import cache
+from settings.highlighter import highlighter
+from settings.search import search_index
 from settings.db import db
 
 
@@ -9,37 +21,73 @@ article_likes = db.Table('likes_in_article',
                          db.Column('user_id', db.Integer,
                                    db.ForeignKey('blog_user.id')),
                          db.Column('article_id', db.Integer,
-                                   db.ForeignKey('blog_article.id'))
+                                   db.ForeignKey('blog_article.id')),
+                         # target of insert-on-conflict in like(), user_id first for find_liked_ids()
+                         db.Index('uq_likes_in_article_user_id_article_id',
+                                  'user_id', 'article_id', unique=True)
                          )
 
 article_tags = db.Table('blog_article_tag',
                         db.Column('tag_id', db.Integer,
                                   db.ForeignKey('blog_tag.id')),
                         db.Column('article_id', db.Integer,
-                                  db.ForeignKey('blog_article.id'))
+                                  db.ForeignKey('blog_article.id')),
+                        db.Index('ix_blog_article_tag_article_id_tag_id',
+                                 'article_id', 'tag_id'),
+                        # articles of tag
+                        db.Index('ix_blog_article_tag_tag_id_article_id',
+                                 'tag_id', 'article_id')
                         )
 
 
 class ArticleModel(db.Model):
     __tablename__ = "blog_article"
+    __table_args__ = (
+        # keyset pagination of published and draft lists
+        db.Index("ix_blog_article_published_date_id", "published_date", "id"),
+        db.Index("ix_blog_article_created_date_id", "created_date", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    author_id = db.Column(db.Integer, db.ForeignKey("blog_user.id"))
+    author_id = db.Column(db.Integer, db.ForeignKey("blog_user.id"), index=True)
     title = db.Column(db.String(200), nullable=False, unique=True)
+    slug = db.Column(db.String(200), nullable=False, unique=True, index=True)
     content = db.Column(JSONField(enforce_string=True,
                                   enforce_unicode=False), nullable=False)
     description = db.Column(db.String, nullable=False)
-    created_date = db.Column(db.DateTime, default=datetime.utcnow)
+    created_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     published_date = db.Column(db.DateTime)
+    updated_date = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # set when code highlighted by the pool is stored, changes version of ?highlight=1 responses
+    highlighted_date = db.Column(db.DateTime)
     image_url = db.Column(db.String)
+    # resized variants of image, filled in by image processor
+    image_variants = db.Column(JSONField(enforce_string=True,
+                                         enforce_unicode=False))
+    # maintained by like()/revoke_like() in the same transaction as likes_in_article
+    likes_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # ArticleSchema dump of published article made on save, see libs.rendering
+    rendered = db.Column(db.Text)
+    # content as HTML with highlighted code, if ARTICLE_RENDER_HTML is enabled
+    content_html = db.Column(db.Text)
 
     author = db.relationship("UserModel")
     likes = db.relationship("UserModel", secondary=article_likes)
     tags = db.relationship("TagModel", secondary=article_tags)
 
-    @property
-    def slug(self) -> str:
-        return slugify(self.title)
+    @validates("title")
+    def validate_title(self, key: str, title: str) -> str:
+        """Keep stored slug in sync with title, which has to give non-empty one."""
+        slug = slugify(title or "")
+        if not slug:
+            raise ValidationError({"title": ["Title has to contain a letter or a digit."]})
+        self.slug = slug
+        return title
+
+    @classmethod
+    def query_for_dump(cls):
+        """Query eager loading relationships nested in ArticleSchema."""
+        return cls.query.options(joinedload(cls.author), selectinload(cls.tags))
 
     @classmethod
     def find_by_id(cls, _id: int) -> "ArticleModel":
@@ -47,19 +95,141 @@ class ArticleModel(db.Model):
 
     @classmethod
     def find_all(cls, published: bool = True) -> List["ArticleModel"]:
+        query = cls.query_for_dump()
         if published:
-            return cls.query.filter(cls.published_date != None)
-        return cls.query.filter(cls.published_date == None)
+            return query.filter(cls.published_date != None)
+        return query.filter(cls.published_date == None)
+
+    @classmethod
+    def tagged_ids(cls, tag: str):
+        """Subquery of ids of articles with tag, range scan of (tag_id, article_id) index."""
+        return db.session.query(article_tags.c.article_id).join(
+            TagModel, TagModel.id == article_tags.c.tag_id).filter(TagModel.name == tag)
+
+    @classmethod
+    def sort_column(cls, published: bool = True):
+        """Column by which published or draft list is ordered and paginated."""
+        return cls.published_date if published else cls.created_date
+
+    @classmethod
+    def find_filtered(cls, published: bool = True, tag: str = None, author: str = None,
+                      date_from: datetime = None, date_to: datetime = None) -> List["ArticleModel"]:
+        query = cls.find_all(published)
+        if tag:
+            query = query.filter(cls.id.in_(cls.tagged_ids(tag)))
+        if author:
+            query = query.filter(cls.author.has(username=author))
+        sort_column = cls.sort_column(published)
+        if date_from:
+            query = query.filter(sort_column >= date_from)
+        if date_to:
+            query = query.filter(sort_column <= date_to)
+        return query
+
+    @classmethod
+    def find_page(cls, published: bool = True, cursor: str = None, limit: int = DEFAULT_LIMIT,
+                  sort: str = "desc", **filters) -> Tuple[List["ArticleModel"], Optional[str]]:
+        """Return one page of filtered list and cursor of the next one."""
+        query = cls.find_filtered(published, **filters)
+        return paginate(query, cls.sort_column(published), cls.id, cursor, limit,
+                        descending=sort == "desc")
+
+    @classmethod
+    def version_date(cls):
+        """updated_date, or highlighted_date when it's later, what responses are validated by."""
+        return db.case([(cls.highlighted_date > cls.updated_date, cls.highlighted_date)], else_=cls.updated_date)
+
+    @classmethod
+    def find_list_version(cls, published: bool = True, cursor: str = None, limit: int = None,
+                          sort: str = None, **filters) -> Tuple[Optional[datetime], int]:
+        """Last modification date and size of filtered list, computed without loading rows."""
+        query = cls.find_filtered(published, **filters)
+        return query.with_entities(db.func.max(cls.version_date()), db.func.count(cls.id)).one()
+
+    @classmethod
+    def find_version_by_slug(cls, slug: str) -> Union[Tuple[datetime, int], None]:
+        """Last modification date and id of published article, without loading its content."""
+        return db.session.query(cls.version_date(), cls.id).filter(
+            cls.slug == slug, cls.published_date != None).first()
 
     @classmethod
     def find_by_slug(cls, slug: str) -> "ArticleModel":
-        unslugged_title = " ".join(slug.split("-"))
-        return cls.query.filter(cls.title.ilike(unslugged_title)).first()
+        return cls.query_for_dump().filter_by(slug=slug).first()
+
+    @classmethod
+    def find_rendered_by_slug(cls, slug: str):
+        """Columns needed to serve published article from its rendered dump."""
+        return db.session.query(
+            cls.rendered, cls.updated_date, cls.likes_count, cls.image_url
+        ).filter(cls.slug == slug, cls.published_date != None).first()
+
+    @classmethod
+    def find_content_html_by_slug(cls, slug: str) -> Union[str, None]:
+        return db.session.query(cls.content_html).filter(
+            cls.slug == slug, cls.published_date != None).scalar()
 
     @classmethod
     def find_by_title(cls, title: str) -> "ArticleModel":
         return cls.query.filter_by(title=title).first()
 
+    @classmethod
+    def store_image_variants(cls, _id: int, image_url: str, result: dict) -> bool:
+        """Called by image processor, ignored if image has been replaced meanwhile."""
+        article = cls.find_by_id(_id)
+        if not article or article.image_url != image_url:
+            return False
+        article.image_variants = result["variants"]
+        article.save_to_db()
+        return True
+
+    @classmethod
+    def store_highlighted(cls, _id: int) -> None:
+        """
+        Called by highlighter once large code block is stored. Nothing stored with the
+        article depends on it, only the version of its responses changes, updated_date stays.
+        """
+        table = cls.__table__
+        db.session.execute(table.update().where(table.c.id == _id).values(
+            highlighted_date=datetime.utcnow(), updated_date=table.c.updated_date))
+        commit()
+        after_commit(cache.invalidate, "articles")
+
+    @classmethod
+    def find_liked_ids(cls, user_id: int, ids: List[int]) -> List[int]:
+        """Which of given articles are liked by user, single range scan of likes index."""
+        query = db.session.query(article_likes.c.article_id).filter(
+            article_likes.c.user_id == user_id, article_likes.c.article_id.in_(ids))
+        return sorted(article_id for (article_id,) in query)
+
+    def like(self, user_id: int) -> bool:
+        """
+        Add like of user with a single insert-on-conflict statement, returns
+        False if it was there already. Counter changes in the same transaction.
+        """
+        inserted = insert_ignoring_conflicts(article_likes, [{"user_id": user_id, "article_id": self.id}],
+                                             index_elements=["user_id", "article_id"])
+        if inserted:
+            self._change_likes_count(1)
+        return bool(inserted)
+
+    def revoke_like(self, user_id: int) -> bool:
+        """Remove like of user, returns False if there was none."""
+        deleted = db.session.execute(article_likes.delete().where(db.and_(
+            article_likes.c.user_id == user_id, article_likes.c.article_id == self.id))).rowcount
+        if deleted:
+            self._change_likes_count(-1)
+        return bool(deleted)
+
+    def _change_likes_count(self, delta: int) -> None:
+        # computed by database, concurrent likes can't overwrite each other
+        table = type(self).__table__
+        db.session.execute(table.update().where(table.c.id == self.id).values(
+            likes_count=table.c.likes_count + delta, updated_date=datetime.utcnow()))
+        commit()
+        # core UPDATE doesn't expire the loaded article, during request commit() only flushes
+        db.session.refresh(self, ["likes_count", "updated_date"])
+        after_commit(cache.invalidate, "articles")
+
     def publish(self) -> None:
         self.published_date = datetime.utcnow()
         self.save_to_db()
@@ -69,9 +239,32 @@ class ArticleModel(db.Model):
         self.save_to_db()
 
     def save_to_db(self) -> None:
+        # set explicitly, changes of likes/tags alone don't update the row
+        self.updated_date = datetime.utcnow()
+        TagModel.count_published(self, article_tags.c.article_id, "articles_count")
         db.session.add(self)
-        db.session.commit()
+        self.render()
+        if self.id is None:
+            db.session.flush()
+        highlighter.prepare(article_blocks(self.content), partial(ArticleModel.store_highlighted, self.id))
+        search_index.index_article(self)
+        commit()
+        after_commit(cache.invalidate, "articles", "search")
+
+    def render(self) -> None:
+        """Validate content and store ready responses, only published articles are served from them."""
+        if not self.published_date:
+            self.rendered = None
+            self.content_html = None
+            return
+        if self.id is None:
+            db.session.flush()
+        self.rendered = render_article(self)
+        self.content_html = render_article_html(self)
 
     def delete_from_db(self) -> None:
+        TagModel.count_published(self, article_tags.c.article_id, "articles_count", deleted=True)
+        search_index.remove("article", self.id)
         db.session.delete(self)
-        db.session.commit()
+        commit()
+        after_commit(cache.invalidate, "articles", "search")
@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from libs.db_helper import insert_ignoring_conflicts
+from settings.db import db
+
+
+class HighlightedCodeModel(db.Model):
+    """
+    HTML of highlighted code stored once under SHA-256 of the code and its
+    language, no matter how many snippets and article code blocks contain it.
+    """
+    __tablename__ = "blog_highlighted_code"
+    __table_args__ = (
+        db.UniqueConstraint("code_hash", "language", name="uq_blog_highlighted_code_code_hash_language"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    code_hash = db.Column(db.String(64), nullable=False)
+    # first alias of Pygments lexer, "text" when language is unknown or missing
+    language = db.Column(db.String(50), nullable=False)
+    html = db.Column(db.Text, nullable=False)
+    created_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @classmethod
+    def find_many(cls, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """HTML by (language, code_hash) of given keys which are stored, with one query."""
+        keys = set(keys)
+        if not keys:
+            return {}
+        rows = db.session.query(cls.language, cls.code_hash, cls.html).filter(
+            cls.code_hash.in_({code_hash for _, code_hash in keys}))
+        return {(language, code_hash): html for language, code_hash, html in rows
+                if (language, code_hash) in keys}
+
+    @classmethod
+    def store_many(cls, results: List[Tuple[str, str, str]]) -> None:
+        """Insert (language, code_hash, html) rows, ones stored meanwhile are skipped. Nothing is committed."""
+        if not results:
+            return
+        now = datetime.utcnow()
+        insert_ignoring_conflicts(cls.__table__, [
+            {"language": language, "code_hash": code_hash, "html": html, "created_date": now}
+            for language, code_hash, html in results
+        ], index_elements=["code_hash", "language"])
@@ -0,0 +1,93 @@
+from datetime import datetime
+from sqlalchemy_jsonfield import JSONField
+from typing import Dict, Iterable, List, Union
+from libs.db_helper import insert_ignoring_conflicts
+from libs.unit_of_work import commit
+from settings.db import db
+
+
+class ImageBlobModel(db.Model):
+    """
+    Image file stored once under SHA-256 of its content, no matter how many
+    avatars and article images point to it.
+    """
+    __tablename__ = "blog_image_blob"
+
+    id = db.Column(db.Integer, primary_key=True)
+    digest = db.Column(db.String(64), nullable=False, unique=True)
+    # with '.' character like: '.jpg'
+    extension = db.Column(db.String(10), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    # number of avatars and article images using the blob
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    # resized variants, generated once and shared by all references
+    variants = db.Column(JSONField(enforce_string=True,
+                                   enforce_unicode=False))
+    created_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # when refcount dropped last time, unreferenced blobs are collected after grace period
+    released_date = db.Column(db.DateTime, index=True)
+
+    @property
+    def name(self) -> str:
+        return f"{self.digest}{self.extension}"
+
+    @classmethod
+    def find_by_digest(cls, digest: str) -> Union["ImageBlobModel", None]:
+        return cls.query.filter_by(digest=digest).first()
+
+    @classmethod
+    def find_unreferenced(cls, released_before: datetime) -> List["ImageBlobModel"]:
+        return cls.query.filter(cls.refcount <= 0, cls.released_date < released_before).all()
+
+    @classmethod
+    def acquire(cls, digest: str, extension: str, size: int) -> str:
+        """
+        Add reference to blob, creating its row if needed. Both are single
+        statements, so concurrent uploads of the same file can't lose a reference.
+        Committed together with model pointing to the blob. Returns blob name,
+        with extension of the first upload of the content.
+        """
+        insert_ignoring_conflicts(cls.__table__, [{
+            "digest": digest,
+            "extension": extension,
+            "size": size,
+            "refcount": 0,
+            "created_date": datetime.utcnow(),
+        }], index_elements=["digest"])
+        db.session.execute(cls.__table__.update().where(cls.digest == digest).values(
+            refcount=cls.refcount + 1, released_date=None))
+        stored_extension = db.session.query(cls.extension).filter(cls.digest == digest).scalar()
+        return f"{digest}{stored_extension}"
+
+    @classmethod
+    def find_names(cls, digests: Iterable[str]) -> Dict[str, str]:
+        """Blob names of stored blobs by digest."""
+        rows = db.session.query(cls.digest, cls.extension).filter(cls.digest.in_(set(digests)))
+        return {digest: f"{digest}{extension}" for digest, extension in rows}
+
+    @classmethod
+    def add_references(cls, counts: Dict[str, int]) -> None:
+        """Add references to stored blobs by digest, one statement per distinct count (e.g. bulk import)."""
+        digests_by_count = {}
+        for digest, count in counts.items():
+            digests_by_count.setdefault(count, []).append(digest)
+        for count, digests in digests_by_count.items():
+            db.session.execute(cls.__table__.update().where(cls.digest.in_(digests)).values(
+                refcount=cls.refcount + count, released_date=None))
+
+    @classmethod
+    def release(cls, digest: str) -> None:
+        """Drop reference to blob, committed together with model which dropped it."""
+        db.session.execute(cls.__table__.update().where(cls.digest == digest).where(cls.refcount > 0).values(
+            refcount=cls.refcount - 1, released_date=datetime.utcnow()))
+
+    @classmethod
+    def store_variants(cls, digest: str, result: dict) -> None:
+        """Called by image processor."""
+        db.session.execute(cls.__table__.update().where(cls.digest == digest).values(
+            variants=result["variants"]))
+        commit()
+
+    def delete_from_db(self) -> None:
+        db.session.delete(self)
+        commit()
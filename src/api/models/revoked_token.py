@@ -0,0 +1,53 @@
+from datetime import datetime
+from typing import List, Union
+from libs.db_helper import insert_ignoring_conflicts
+from libs.unit_of_work import commit
+from settings.db import db
+
+
+class RevokedTokenModel(db.Model):
+    __tablename__ = "blog_revoked_token"
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), nullable=False, unique=True)
+    revoked_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    # token is rejected by signature check after this date anyway
+    expires_date = db.Column(db.DateTime, nullable=False, index=True)
+
+    @classmethod
+    def find_by_jti(cls, jti: str) -> Union["RevokedTokenModel", None]:
+        return cls.query.filter_by(jti=jti).first()
+
+    @classmethod
+    def revoke(cls, jti: str, expires_date: datetime) -> None:
+        """Store revoked jti, single statement so concurrent revokes of the same token don't conflict."""
+        insert_ignoring_conflicts(cls.__table__, [{
+            "jti": jti,
+            "revoked_date": datetime.utcnow(),
+            "expires_date": expires_date,
+        }], index_elements=["jti"])
+        commit()
+
+    @classmethod
+    def find_jtis_revoked_since(cls, since: datetime = None) -> List[str]:
+        """jti of not yet expired tokens revoked after given date."""
+        query = db.session.query(cls.jti).filter(cls.expires_date > datetime.utcnow())
+        if since:
+            query = query.filter(cls.revoked_date >= since)
+        return [jti for (jti,) in query]
+
+    @classmethod
+    def purge_expired(cls) -> int:
+        """Delete entries of expired tokens, returns number of deleted rows."""
+        deleted = cls.query.filter(cls.expires_date <= datetime.utcnow()).delete(
+            synchronize_session=False)
+        commit()
+        return deleted
+
+    def save_to_db(self) -> None:
+        db.session.add(self)
+        commit()
+
+    def delete_from_db(self) -> None:
+        db.session.delete(self)
+        commit()
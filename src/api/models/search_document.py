@@ -0,0 +1,54 @@
+from datetime import datetime
+from sqlalchemy import DDL, event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from typing import Union
+from settings.db import db
+
+# external content FTS5 table, triggers keep it in sync with blog_search_document
+SQLITE_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS blog_search_fts USING fts5("
+    "title, body, content='blog_search_document', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS blog_search_document_ai AFTER INSERT ON blog_search_document BEGIN "
+    "INSERT INTO blog_search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_search_document_ad AFTER DELETE ON blog_search_document BEGIN "
+    "INSERT INTO blog_search_fts(blog_search_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS blog_search_document_au AFTER UPDATE ON blog_search_document BEGIN "
+    "INSERT INTO blog_search_fts(blog_search_fts, rowid, title, body) "
+    "VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO blog_search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+)
+
+
+class SearchDocumentModel(db.Model):
+    """
+    Searchable text of published article or snippet, kept in sync by their
+    save_to_db/delete_from_db. PostgreSQL matches search_vector through GIN
+    index, SQLite matches blog_search_fts (FTS5) table filled by triggers.
+    """
+    __tablename__ = "blog_search_document"
+    __table_args__ = (
+        db.UniqueConstraint("kind", "item_id", name="uq_blog_search_document_kind_item_id"),
+        db.Index("ix_blog_search_document_search_vector", "search_vector", postgresql_using="gin"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    # "article" or "snippet"
+    kind = db.Column(db.String(10), nullable=False)
+    item_id = db.Column(db.Integer, nullable=False)
+    slug = db.Column(db.String, nullable=False)
+    title = db.Column(db.String, nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    # weighted title and body, used on PostgreSQL only
+    search_vector = db.Column(db.Text().with_variant(TSVECTOR(), "postgresql"))
+    updated_date = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def find_by_item(cls, kind: str, item_id: int) -> Union["SearchDocumentModel", None]:
+        return cls.query.filter_by(kind=kind, item_id=item_id).first()
+
+
+for statement in SQLITE_SCHEMA:
+    event.listen(SearchDocumentModel.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(SearchDocumentModel.__table__, "before_drop",
+             DDL("DROP TABLE IF EXISTS blog_search_fts").execute_if(dialect="sqlite"))
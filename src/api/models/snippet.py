@@ -1,5 +1,15 @@
 from datetime import datetime
-from typing import List, Union
+from functools import partial
+from typing import List, Optional, Tuple, Union
+from marshmallow import ValidationError
+from sqlalchemy.orm import selectinload, validates
+from slugify import slugify
+from libs.pagination import DEFAULT_LIMIT, paginate
+from libs.unit_of_work import after_commit, commit
+from models.tag import TagModel
+from settings.cache import cache
+from settings.highlighter import highlighter
+from settings.search import search_index
 from settings.db import db
 
 
@@ -7,46 +17,138 @@ snippet_tags = db.Table('blog_snippet_tag',
                         db.Column('tag_id', db.Integer,
                                   db.ForeignKey('blog_tag.id')),
                         db.Column('snippet_id', db.Integer,
-                                  db.ForeignKey('blog_snippet.id'))
+                                  db.ForeignKey('blog_snippet.id')),
+                        db.Index('ix_blog_snippet_tag_snippet_id_tag_id',
+                                 'snippet_id', 'tag_id'),
+                        # snippets of tag
+                        db.Index('ix_blog_snippet_tag_tag_id_snippet_id',
+                                 'tag_id', 'snippet_id')
                         )
 
 
 class SnippetModel(db.Model):
     __tablename__ = "blog_snippet"
+    __table_args__ = (
+        # keyset pagination of approved and not approved lists
+        db.Index("ix_blog_snippet_published_date_id", "published_date", "id"),
+        db.Index("ix_blog_snippet_created_date_id", "created_date", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String, nullable=False, unique=True)
+    slug = db.Column(db.String, nullable=False, unique=True, index=True)
     description = db.Column(db.String, nullable=False)
     code = db.Column(db.String, nullable=False)
     language = db.Column(db.String, nullable=False)
     # kiedyś zrobić ForeignKey do blog_user
-    author = db.Column(db.String, nullable=False)
+    author = db.Column(db.String, nullable=False, index=True)
 
-    created_date = db.Column(db.DateTime, default=datetime.utcnow)
+    created_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     published_date = db.Column(db.DateTime)
+    updated_date = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # set when code highlighted by the pool is stored, changes version of ?highlight=1 responses
+    highlighted_date = db.Column(db.DateTime)
 
     # likes = db.relationship("UserModel", secondary=snippet_likes)   <-- dodać jak już będzie opcja logowania się
     tags = db.relationship("TagModel", secondary=snippet_tags)
 
+    @validates("title")
+    def validate_title(self, key: str, title: str) -> str:
+        """Keep stored slug in sync with title, which has to give non-empty one."""
+        slug = slugify(title or "")
+        if not slug:
+            raise ValidationError({"title": ["Title has to contain a letter or a digit."]})
+        self.slug = slug
+        return title
+
+    @classmethod
+    def query_for_dump(cls):
+        """Query eager loading relationships nested in SnippetSchema."""
+        return cls.query.options(selectinload(cls.tags))
+
     @classmethod
     def find_by_id(cls, _id: int) -> Union["SnippetModel", None]:
         return cls.query.filter_by(id=_id).first()
 
     @classmethod
     def find_all(cls, published: bool = True) -> List["SnippetModel"]:
+        query = cls.query_for_dump()
         if published:
-            return cls.query.filter(cls.published_date != None)
-        return cls.query.filter(cls.published_date == None)
+            return query.filter(cls.published_date != None)
+        return query.filter(cls.published_date == None)
+
+    @classmethod
+    def tagged_ids(cls, tag: str):
+        """Subquery of ids of snippets with tag, range scan of (tag_id, snippet_id) index."""
+        return db.session.query(snippet_tags.c.snippet_id).join(
+            TagModel, TagModel.id == snippet_tags.c.tag_id).filter(TagModel.name == tag)
+
+    @classmethod
+    def sort_column(cls, published: bool = True):
+        """Column by which approved or not approved list is ordered and paginated."""
+        return cls.published_date if published else cls.created_date
+
+    @classmethod
+    def find_filtered(cls, published: bool = True, tag: str = None, author: str = None,
+                      date_from: datetime = None, date_to: datetime = None) -> List["SnippetModel"]:
+        query = cls.find_all(published)
+        if tag:
+            query = query.filter(cls.id.in_(cls.tagged_ids(tag)))
+        if author:
+            query = query.filter_by(author=author)
+        sort_column = cls.sort_column(published)
+        if date_from:
+            query = query.filter(sort_column >= date_from)
+        if date_to:
+            query = query.filter(sort_column <= date_to)
+        return query
+
+    @classmethod
+    def find_page(cls, published: bool = True, cursor: str = None, limit: int = DEFAULT_LIMIT,
+                  sort: str = "desc", **filters) -> Tuple[List["SnippetModel"], Optional[str]]:
+        """Return one page of filtered list and cursor of the next one."""
+        query = cls.find_filtered(published, **filters)
+        return paginate(query, cls.sort_column(published), cls.id, cursor, limit,
+                        descending=sort == "desc")
+
+    @classmethod
+    def version_date(cls):
+        """updated_date, or highlighted_date when it's later, what responses are validated by."""
+        return db.case([(cls.highlighted_date > cls.updated_date, cls.highlighted_date)], else_=cls.updated_date)
+
+    @classmethod
+    def find_list_version(cls, published: bool = True, cursor: str = None, limit: int = None,
+                          sort: str = None, **filters) -> Tuple[Optional[datetime], int]:
+        """Last modification date and size of filtered list, computed without loading rows."""
+        query = cls.find_filtered(published, **filters)
+        return query.with_entities(db.func.max(cls.version_date()), db.func.count(cls.id)).one()
+
+    @classmethod
+    def find_version_by_slug(cls, slug: str) -> Union[Tuple[datetime, int], None]:
+        """Last modification date and id of published snippet, without loading its content."""
+        return db.session.query(cls.version_date(), cls.id).filter(
+            cls.slug == slug, cls.published_date != None).first()
 
     @classmethod
     def find_by_slug(cls, slug: str) -> Union["SnippetModel", None]:
-        unslugged_title = " ".join(slug.split("-"))
-        return cls.query.filter(cls.title.ilike(unslugged_title)).first()
+        return cls.query_for_dump().filter_by(slug=slug).first()
 
     @classmethod
     def find_by_title(cls, title: str) -> Union["SnippetModel", None]:
         return cls.query.filter_by(title=title).first()
 
+    @classmethod
+    def store_highlighted(cls, _id: int) -> None:
+        """
+        Called by highlighter once large code is stored. Nothing stored with the
+        snippet depends on it, only the version of its responses changes, updated_date stays.
+        """
+        table = cls.__table__
+        db.session.execute(table.update().where(table.c.id == _id).values(
+            highlighted_date=datetime.utcnow(), updated_date=table.c.updated_date))
+        commit()
+        after_commit(cache.invalidate, "snippets")
+
     def approve(self) -> None:
         self.published_date = datetime.utcnow()
         self.save_to_db()
@@ -56,9 +158,20 @@ class SnippetModel(db.Model):
         self.save_to_db()
 
     def save_to_db(self) -> None:
+        # set explicitly, changes of tags alone don't update the row
+        self.updated_date = datetime.utcnow()
+        TagModel.count_published(self, snippet_tags.c.snippet_id, "snippets_count")
         db.session.add(self)
-        db.session.commit()
+        if self.id is None:
+            db.session.flush()
+        highlighter.prepare([(self.code, self.language)], partial(SnippetModel.store_highlighted, self.id))
+        search_index.index_snippet(self)
+        commit()
+        after_commit(cache.invalidate, "snippets", "search")
 
     def delete_from_db(self) -> None:
+        TagModel.count_published(self, snippet_tags.c.snippet_id, "snippets_count", deleted=True)
+        search_index.remove("snippet", self.id)
         db.session.delete(self)
-        db.session.commit()
+        commit()
+        after_commit(cache.invalidate, "snippets", "search")
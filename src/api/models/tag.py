@@ -1,12 +1,26 @@
-from typing import Union
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Union
+from libs.db_helper import insert_ignoring_conflicts
+from libs.unit_of_work import after_commit, commit
+from settings.cache import cache
 from settings.db import db
 
 
 class TagModel(db.Model):
     __tablename__ = "blog_tag"
+    __table_args__ = (
+        # tag listing ordered by usage
+        db.Index("ix_blog_tag_articles_count_id", "articles_count", "id"),
+        db.Index("ix_blog_tag_snippets_count_id", "snippets_count", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), nullable=False, unique=True)
+    updated_date = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # published articles and snippets with the tag, maintained by count_published()
+    articles_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    snippets_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     @classmethod
     def find_by_id(cls, _id: int) -> Union["TagModel", None]:
@@ -16,6 +30,21 @@ class TagModel(db.Model):
     def find_by_name(cls, name: str) -> Union["TagModel", None]:
         return cls.query.filter_by(name=name).first()
 
+    @classmethod
+    def find_used(cls, kind: str = None, sort: str = "count"):
+        """
+        Tags of published articles and/or snippets (kind "article"/"snippet")
+        with their counts, most used or alphabetically first.
+        """
+        if kind:
+            count = cls.articles_count if kind == "article" else cls.snippets_count
+        else:
+            count = cls.articles_count + cls.snippets_count
+        query = cls.query.filter(count > 0)
+        if sort == "name":
+            return query.order_by(cls.name)
+        return query.order_by(count.desc(), cls.id.desc())
+
     @classmethod
     def get_or_create(cls, name: str) -> "TagModel":
         tag = cls.find_by_name(name)
@@ -24,10 +53,92 @@ class TagModel(db.Model):
             tag.save_to_db()
         return tag
 
+    @classmethod
+    def get_or_create_many(cls, names: List[str]) -> List["TagModel"]:
+        """
+        Return tags with given names in given order, creating missing ones.
+
+        Existing tags are fetched with one IN query and missing ones are
+        inserted with a single statement which ignores rows added meanwhile
+        by concurrent request. Nothing is committed, so tags are saved in the
+        same transaction as article/snippet they are assigned to.
+        """
+        names = list(OrderedDict.fromkeys(names))
+        if not names:
+            return []
+        tags = {tag.name: tag for tag in cls.query.filter(cls.name.in_(names))}
+        missing = [name for name in names if name not in tags]
+        if missing:
+            now = datetime.utcnow()
+            rows = [{"name": name, "updated_date": now} for name in missing]
+            insert_ignoring_conflicts(cls.__table__, rows, index_elements=["name"])
+            tags.update({tag.name: tag for tag in cls.query.filter(cls.name.in_(missing))})
+        return [tags[name] for name in names]
+
+    @classmethod
+    def count_published(cls, item, item_column, counter: str, deleted: bool = False) -> None:
+        """
+        Move counter of published items from tags item has in the database (if
+        it's published there) to tags it has now (if it's published now), or
+        only remove it when item is deleted. Call before item is flushed.
+
+        item_column is item's column of association table, counter is
+        articles_count or snippets_count.
+        """
+        model = type(item)
+        with db.session.no_autoflush:
+            stored = set()
+            if item.id is not None:
+                stored = {tag_id for (tag_id,) in db.session.query(item_column.table.c.tag_id).join(
+                    model, model.id == item_column).filter(item_column == item.id, model.published_date != None)}
+            current = set() if deleted or not item.published_date else set(item.tags)
+        if any(tag.id is None for tag in current):
+            db.session.flush()
+        current = {tag.id for tag in current}
+        deltas = dict.fromkeys(current - stored, 1)
+        deltas.update(dict.fromkeys(stored - current, -1))
+        cls.change_counts(counter, deltas)
+
+    @classmethod
+    def change_counts(cls, counter: str, deltas: Dict[int, int]) -> None:
+        """Add deltas to counter of tags by id, computed by database like likes_count."""
+        table = cls.__table__
+        ids_by_delta = {}
+        for tag_id, delta in deltas.items():
+            if delta:
+                ids_by_delta.setdefault(delta, []).append(tag_id)
+        for delta, ids in ids_by_delta.items():
+            # counts aren't nested in article and snippet responses, updated_date stays
+            db.session.execute(table.update().where(table.c.id.in_(ids)).values(
+                {counter: table.c[counter] + delta, "updated_date": table.c.updated_date}))
+        if ids_by_delta:
+            after_commit(cache.invalidate, "tags")
+
+    @classmethod
+    def recount(cls) -> None:
+        """Compute all counters from association tables again, nothing is committed here."""
+        # models import this module
+        from models.article import ArticleModel, article_tags
+        from models.snippet import SnippetModel, snippet_tags
+
+        table = cls.__table__
+        values = {"updated_date": table.c.updated_date}
+        for counter, model, item_column in (("articles_count", ArticleModel, article_tags.c.article_id),
+                                            ("snippets_count", SnippetModel, snippet_tags.c.snippet_id)):
+            values[counter] = db.select([db.func.count(db.distinct(item_column))]).select_from(
+                item_column.table.join(model.__table__, model.id == item_column)
+            ).where(db.and_(item_column.table.c.tag_id == table.c.id, model.published_date != None)).as_scalar()
+        db.session.execute(table.update().values(values))
+        after_commit(cache.invalidate, "tags")
+
     def save_to_db(self):
+        self.updated_date = datetime.utcnow()
         db.session.add(self)
-        db.session.commit()
+        commit()
+        # tags are nested in article and snippet responses
+        after_commit(cache.invalidate, "articles", "snippets", "tags")
 
     def delete_from_db(self):
         db.session.delete(self)
-        db.session.commit()
+        commit()
+        after_commit(cache.invalidate, "articles", "snippets", "tags")
@@ -1,7 +1,10 @@
-import bcrypt
 from datetime import datetime
+from sqlalchemy_jsonfield import JSONField
 from typing import List
+from libs.unit_of_work import after_commit, commit
+from settings.cache import cache
 from settings.db import db
+from settings.login import password_hasher
 
 
 class UserModel(db.Model):
@@ -12,11 +15,14 @@ class UserModel(db.Model):
     password = db.Column(db.String(180), nullable=False)
     email = db.Column(db.String(40), nullable=False, unique=True)
     created_date = db.Column(db.DateTime, default=datetime.now)
-    active = db.Column(db.Boolean, default=False)
-    is_staff = db.Column(db.Boolean, default=False)
-    is_superuser = db.Column(db.Boolean, default=False)
+    active = db.Column(db.Boolean(name="active"), default=False)
+    is_staff = db.Column(db.Boolean(name="is_staff"), default=False)
+    is_superuser = db.Column(db.Boolean(name="is_superuser"), default=False)
     # path to image file
     avatar_name = db.Column(db.String)
+    # resized variants of avatar, filled in by image processor
+    avatar_variants = db.Column(JSONField(enforce_string=True,
+                                          enforce_unicode=False))
 
     @classmethod
     def find_all(cls) -> List["UserModel"]:
@@ -34,17 +40,29 @@ class UserModel(db.Model):
     def find_by_email(cls, email: str) -> "UserModel":
         return cls.query.filter_by(email=email).first()
 
+    @classmethod
+    def store_avatar_variants(cls, _id: int, avatar_name: str, result: dict) -> bool:
+        """Called by image processor, ignored if avatar has been replaced meanwhile."""
+        user = cls.find_by_id(_id)
+        if not user or user.avatar_name != avatar_name:
+            return False
+        user.avatar_variants = result["variants"]
+        user.save_to_db()
+        return True
+
     def set_password(self, password: str) -> None:
-        self.password = bcrypt.hashpw(
-            password.encode("utf-8"), bcrypt.gensalt())
+        self.password = password_hasher.hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return bcrypt.checkpw(password.encode("utf-8"), self.password.encode("utf-8"))
+        """May raise PasswordPoolBusy when hashing pool is saturated."""
+        return password_hasher.check_password(password, self.password)
 
     def save_to_db(self) -> None:
         db.session.add(self)
-        db.session.commit()
+        commit()
+        after_commit(cache.invalidate, "users")
 
     def delete_from_db(self) -> None:
         db.session.delete(self)
-        db.session.commit()
+        commit()
+        after_commit(cache.invalidate, "users")
@@ -1,32 +1,63 @@
-import traceback
+import json
+from functools import partial
 
-from flask import request
+from flask import Response, current_app, request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity, get_current_user
 from flask_uploads import UploadNotAllowed
+from marshmallow import ValidationError
+from slugify import slugify
 
 from libs import image_helper
-from models import ArticleModel, TagModel, UserModel
+from libs.blueprint import api_blueprint
+from libs.conditional import conditional
+from libs.db_routing import use_replica
+from libs.image_serving import get_image_url
+from libs.pagination import pagination_headers
+from libs.rendering import fill_rendered_article
+from libs.representation import RawJSON, dumps
+from settings.cache import cache
+from settings.highlighter import highlighter
+from models import ArticleModel, TagModel
 from schemas.article import ArticleSchema
+from schemas.highlighting import HighlightArgsSchema
 from schemas.image import ImageSchema
+from schemas.pagination import ListArgsSchema, LikedArgsSchema
 
 article_schema = ArticleSchema()
 article_schema_many = ArticleSchema(many=True)
 image_schema = ImageSchema()
+list_args_schema = ListArgsSchema()
+liked_args_schema = LikedArgsSchema()
+highlight_args_schema = HighlightArgsSchema()
+
+
+def published_articles_version():
+    args = list_args_schema.load(request.args)
+    return ArticleModel.find_list_version(**args)
 
 
-# TODO add pagination / sorting and filtering according to this resources:
-# https://www.moesif.com/blog/technical/api-design/REST-API-Design-Filtering-Sorting-and-Pagination/
-# https://stackoverflow.com/questions/55543011/flask-restful-pagination
 class Articles(Resource):
 
     @classmethod
+    @use_replica
+    @conditional(published_articles_version)
+    @cache.cached("articles")
     def get(cls):
         """
-        Returns list of published articles.
+        Returns page of published articles.
+
+        Accepts cursor, limit, sort (desc/asc by published_date), tag, author,
+        date_from and date_to query arguments. Cursor of the next page is
+        returned in X-Next-Cursor and Link headers. With highlight=1 code
+        blocks of content have highlighted field, HTML of their code.
         """
-        published_articles = ArticleModel.find_all()
-        return article_schema_many.dump(published_articles), 200
+        args = list_args_schema.load(request.args)
+        published_articles, next_cursor = ArticleModel.find_page(**args)
+        data = article_schema_many.dump(published_articles)
+        if highlight_args_schema.load(request.args)["highlight"]:
+            highlighter.attach_to_articles(data)
+        return data, 200, pagination_headers(next_cursor)
 
     @classmethod
     @jwt_required
@@ -40,7 +71,7 @@ class Articles(Resource):
         article_json = request.get_json()
         article_data = article_schema.load(article_json)
 
-        if ArticleModel.find_by_title(article_data.title):
+        if ArticleModel.find_by_slug(article_data.slug):
             return {"message": "Article with given title already exists"}
 
         article_data.save_to_db()
@@ -50,16 +81,34 @@ class Articles(Resource):
 class ArticleDetail(Resource):
 
     @classmethod
+    @use_replica
+    @conditional(ArticleModel.find_version_by_slug)
+    @cache.cached("articles")
     def get(cls, slug: str):
         """
         Return specific article data.
 
-        Only published articles are available via this endpoint
+        Only published articles are available via this endpoint. Served from
+        dump rendered when article was saved. With highlight=1 code blocks of
+        content have highlighted field, HTML of their code.
         """
-        article = ArticleModel.find_by_slug(slug)
-        if not article or not article.published_date:
+        row = ArticleModel.find_rendered_by_slug(slug)
+        if not row:
             return {"message": "Article not found"}, 404
-        return article_schema.dump(article), 200
+        highlight = highlight_args_schema.load(request.args)["highlight"]
+        if row.rendered is None:
+            # published before rendering existed, `flask articles render` fills it
+            data = article_schema.dump(ArticleModel.find_by_slug(slug))
+        else:
+            image_src = get_image_url(row.image_url, "article_images")
+            data = fill_rendered_article(row.rendered, row.updated_date, row.likes_count, image_src)
+            if not highlight:
+                return data, 200
+            data = json.loads(data)
+        if highlight:
+            highlighter.attach_to_articles([data])
+        # encoded like the rendered dump, whichever path serves the article
+        return RawJSON(dumps(data)), 200
 
     @classmethod
     @jwt_required
@@ -91,16 +140,35 @@ class ArticleDetail(Resource):
         return {"message": "Article deleted"}, 200
 
 
+class ArticleHtml(Resource):
+
+    @classmethod
+    @conditional(ArticleModel.find_version_by_slug)
+    def get(cls, slug: str):
+        """
+        Return content of published article as HTML with highlighted code.
+
+        Available when ARTICLE_RENDER_HTML is enabled.
+        """
+        content_html = ArticleModel.find_content_html_by_slug(slug)
+        if content_html is None:
+            return {"message": "Article not found"}, 404
+        return Response(content_html, mimetype="text/html")
+
+
 class DraftArticles(Resource):
 
     @classmethod
     @jwt_required
     def get(cls):
         """
-        Return list of unpublished articles.
+        Return page of unpublished articles, ordered by created_date.
+
+        Accepts the same query arguments as published articles list.
         """
-        unpublished_articles = ArticleModel.find_all(published=False)
-        return article_schema_many.dump(unpublished_articles), 200
+        args = list_args_schema.load(request.args)
+        unpublished_articles, next_cursor = ArticleModel.find_page(published=False, **args)
+        return article_schema_many.dump(unpublished_articles), 200, pagination_headers(next_cursor)
 
 
 class DraftArticleDetail(Resource):
@@ -133,11 +201,7 @@ class ArticleSetTags(Resource):
         if not article:
             return {"message": "Article does not exist"}, 404
         tags = request.get_json()["tags"]
-        article.tags = []
-        for tag in tags:
-            tag_object = TagModel.get_or_create(name=tag)
-            if not tag_object in article.tags:
-                article.tags.append(tag_object)
+        article.tags = TagModel.get_or_create_many(tags)
         article.save_to_db()
 
         return article_schema.dump(article), 200
@@ -159,22 +223,26 @@ class ArticleUploadImage(Resource):
         folder = "article_images"
 
         try:
-            image_path = image_helper.save_image(data["image"], folder=folder)
-            basename = image_helper.get_basename(image_path)
+            basename = image_helper.save_image(data["image"])
 
             previous_article_image = article.image_url
+            if previous_article_image:
+                image_helper.release_image(previous_article_image, folder)
             article.image_url = basename
+            article.image_variants = None
             article.save_to_db()
-
-            if previous_article_image:
-                image_helper.delete_image(previous_article_image, folder)
+            image_helper.generate_variants(
+                basename, folder, partial(ArticleModel.store_image_variants, article.id, basename))
 
             return {"message": "Image {} uploaded".format(basename)}, 201
         except UploadNotAllowed:
             extension = image_helper.get_extension(data["image"])
             return {"message": "Extension not allowed"}, 400
+        except ValidationError as err:
+            # content of published article is validated when it's rendered on save
+            return err.messages, 400
         except Exception:
-            traceback.print_exc()
+            current_app.logger.exception("Uploading image of article %s failed", slug)
             return {"message": "Internal server error"}, 500
 
 
@@ -220,21 +288,21 @@ class ArticleLike(Resource):
     @classmethod
     @jwt_required
     def post(cls, slug):
-        """Like specific article instance by current logged in user."""
+        """
+        Like specific article instance by current logged in user.
+
+        Liking article again has no effect.
+        """
         article = ArticleModel.find_by_slug(slug)
         if not article:
             return {"message": "Article not found"}, 404
         user_id = get_jwt_identity()
-        user = UserModel.find_by_id(user_id)
-
-        if user == article.author:
+        if user_id == article.author_id:
             return {"message": "You can't like your own article"}, 403
-        if user in article.likes:
-            return {"message": "You can't like this article twice"}, 403
 
-        article.likes.append(user)
-        article.save_to_db()
-        return {"message": "Article with id={} has been liked by {}".format(article.id, user.username)}, 200
+        article.like(user_id)
+        return {"message": "Article with id={} has been liked".format(article.id),
+                "likes_count": article.likes_count}, 200
 
 
 class ArticleRevokeLike(Resource):
@@ -242,19 +310,33 @@ class ArticleRevokeLike(Resource):
     @classmethod
     @jwt_required
     def post(cls, slug):
-        """Revoke like from article by logged in user."""
+        """
+        Revoke like from article by logged in user.
+
+        Revoking like which doesn't exist has no effect.
+        """
         article = ArticleModel.find_by_slug(slug)
         if not article:
             return {"message": "Article not found"}, 404
-        user_id = get_jwt_identity()
-        user = UserModel.find_by_id(user_id)
 
-        if not user in article.likes:
-            return {"message": "You have to like this article before you can revoke like"}, 403
+        article.revoke_like(get_jwt_identity())
+        return {"message": "Article with id={} has been disliked".format(article.id),
+                "likes_count": article.likes_count}, 200
 
-        article.likes.remove(user)
-        article.save_to_db()
-        return {"message": "Article with id={} has been disliked by {}".format(article.id, user.username)}, 200
+
+class ArticlesLiked(Resource):
+
+    @classmethod
+    @jwt_required
+    def get(cls):
+        """
+        Return which of given articles are liked by current logged in user.
+
+        Accepts ids query argument, repeated (ids=1&ids=2) or comma separated.
+        """
+        args = liked_args_schema.load({"ids": [
+            part for value in request.args.getlist("ids") for part in value.split(",") if part]})
+        return {"liked": ArticleModel.find_liked_ids(get_jwt_identity(), args["ids"])}, 200
 
 
 class ArticleChangeTitle(Resource):
@@ -269,9 +351,26 @@ class ArticleChangeTitle(Resource):
             return {"message": "Article not found"}, 404
         if new_title == article.title:
             return {"message": "You're trying to change to existing title"}
-        if ArticleModel.find_by_title(new_title):
+        title_owner = ArticleModel.find_by_slug(slugify(new_title))
+        if title_owner and title_owner is not article:
             return {"message": "This title is taken"}
 
         article.title = new_title
         article.save_to_db()
         return {"message": "Title has been changed"}, 200
+
+
+blueprint, api = api_blueprint("articles", __name__)
+api.add_resource(Articles, "/articles")
+api.add_resource(ArticleDetail, "/articles/<string:slug>")
+api.add_resource(ArticleHtml, "/articles/<string:slug>/html")
+api.add_resource(DraftArticles, "/articles/draft")
+api.add_resource(DraftArticleDetail, "/articles/draft/<string:slug>")
+api.add_resource(ArticleSetTags, "/articles/<string:slug>/tags")
+api.add_resource(ArticleUploadImage, "/articles/<string:slug>/image")
+api.add_resource(ArticlePublish, "/articles/<string:slug>/publish")
+api.add_resource(ArticleUnpublish, "/articles/<string:slug>/unpublish")
+api.add_resource(ArticleLike, "/articles/<string:slug>/like")
+api.add_resource(ArticleRevokeLike, "/articles/<string:slug>/revoke-like")
+api.add_resource(ArticleChangeTitle, "/articles/<string:slug>/new-title")
+api.add_resource(ArticlesLiked, "/articles/liked")
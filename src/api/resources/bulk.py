@@ -0,0 +1,37 @@
+from flask import Response, request, stream_with_context
+from flask_jwt_extended import jwt_required
+from flask_restful import Resource
+
+from libs.blueprint import api_blueprint
+from libs.bulk import export_lines, import_lines
+from libs.unit_of_work import disable_retries
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+class Bulk(Resource):
+
+    @classmethod
+    @jwt_required
+    def get(cls, kind: str):
+        """
+        Streams all articles or snippets, drafts included, as NDJSON: one JSON
+        object per line, in format accepted by POST.
+        """
+        return Response(stream_with_context(export_lines(kind)), mimetype=NDJSON_MIMETYPE)
+
+    @classmethod
+    @jwt_required
+    def post(cls, kind: str):
+        """
+        Imports NDJSON request body, one article or snippet per line. Lines
+        which fail validation are skipped and reported by number, the rest is
+        imported in one transaction.
+        """
+        # request body can be read only once
+        disable_retries()
+        return import_lines(kind, request.stream), 200
+
+
+blueprint, api = api_blueprint("bulk", __name__)
+api.add_resource(Bulk, "/bulk/<any(articles, snippets):kind>")
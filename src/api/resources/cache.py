@@ -0,0 +1,33 @@
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+
+from libs.blueprint import api_blueprint
+from settings.cache import cache
+from settings.compression import compression
+from settings.highlighter import highlighter
+
+
+class CacheStats(Resource):
+
+    @classmethod
+    @jwt_required
+    def get(cls):
+        """
+        Return response cache hit/miss counters of this worker, with bytes
+        saved and CPU time spent by compression per endpoint, and memo and
+        worker pool counters of code highlighting.
+        """
+        return dict(cache.stats(), compression=compression.stats(), highlighting=highlighter.stats()), 200
+
+    @classmethod
+    @jwt_required
+    def delete(cls):
+        """
+        Drop all cached responses.
+        """
+        cache.clear()
+        return {"message": "Cache cleared"}, 200
+
+
+blueprint, api = api_blueprint("cache", __name__)
+api.add_resource(CacheStats, "/cache")
@@ -0,0 +1,20 @@
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+
+from libs.blueprint import api_blueprint
+from settings.db import db
+
+
+class DatabasePoolStats(Resource):
+
+    @classmethod
+    @jwt_required
+    def get(cls):
+        """
+        Return connection pool usage of primary and replica databases in this worker.
+        """
+        return db.pool_stats(), 200
+
+
+blueprint, api = api_blueprint("database", __name__)
+api.add_resource(DatabasePoolStats, "/db/pool")
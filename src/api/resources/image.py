@@ -0,0 +1,37 @@
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required
+
+from libs import image_serving
+from libs.blueprint import api_blueprint
+from settings.image_processor import image_processor
+
+
+class Image(Resource):
+
+    @classmethod
+    def get(cls, folder: str, digest: str, filename: str):
+        """
+        Serve avatar, article image or one of their variants.
+
+        URL contains digest of file content, so response can be cached forever.
+        """
+        path = image_serving.get_public_path(filename, folder)
+        if not path or image_serving.get_digest(path) != digest:
+            return {"message": "Image not found"}, 404
+        return image_serving.send_image(path, digest)
+
+
+class ImageProcessingStats(Resource):
+
+    @classmethod
+    @jwt_required
+    def get(cls):
+        """
+        Return counters and timings of image variants processing in this worker.
+        """
+        return image_processor.stats(), 200
+
+
+blueprint, api = api_blueprint("images", __name__)
+api.add_resource(ImageProcessingStats, "/images/processing")
+api.add_resource(Image, "/images/<string:folder>/<string:digest>/<path:filename>", endpoint="image")
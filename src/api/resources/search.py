@@ -0,0 +1,36 @@
+from flask import request
+from flask_restful import Resource
+
+from libs.blueprint import api_blueprint
+from libs.pagination import decode_offset_cursor, encode_offset_cursor, pagination_headers
+from schemas.search import SearchArgsSchema
+from settings.cache import cache
+from settings.search import search_index
+
+search_args_schema = SearchArgsSchema()
+
+
+class Search(Resource):
+
+    @classmethod
+    @cache.cached("search")
+    def get(cls):
+        """
+        Returns page of published articles and snippets matching all words of q,
+        best matches first, with matched words wrapped in <mark> in highlights
+        (HTML, the rest of their text is escaped).
+
+        Accepts q, type (article/snippet), cursor and limit query arguments.
+        Cursor of the next page is returned in X-Next-Cursor and Link headers.
+        """
+        args = search_args_schema.load(request.args)
+        offset = decode_offset_cursor(args["cursor"]) if args.get("cursor") else 0
+        limit = args["limit"]
+        # fetch one extra result to find out whether next page exists
+        results = search_index.search(args["q"], args.get("type"), offset, limit + 1)
+        next_cursor = encode_offset_cursor(offset + limit) if len(results) > limit else None
+        return results[:limit], 200, pagination_headers(next_cursor)
+
+
+blueprint, api = api_blueprint("search", __name__)
+api.add_resource(Search, "/search")
@@ -1,23 +1,51 @@
 from flask import request
 from flask_jwt_extended import jwt_required
 from flask_restful import Resource
+from libs.blueprint import api_blueprint
+from libs.conditional import conditional
+from libs.db_routing import use_replica
+from libs.pagination import pagination_headers
+from settings.cache import cache
+from settings.highlighter import highlighter
 from models import SnippetModel, TagModel
+from schemas.highlighting import HighlightArgsSchema
+from schemas.pagination import ListArgsSchema
 from schemas.snippet import SnippetSchema
 
 
 snippet_schema = SnippetSchema()
 snippet_schema_many = SnippetSchema(many=True)
+list_args_schema = ListArgsSchema()
+highlight_args_schema = HighlightArgsSchema()
+
+
+def published_snippets_version():
+    args = list_args_schema.load(request.args)
+    return SnippetModel.find_list_version(**args)
 
 
 class Snippets(Resource):
 
     @classmethod
+    @use_replica
+    @conditional(published_snippets_version)
+    @cache.cached("snippets")
     def get(cls):
         """
-        List of all published snippets.
+        Page of published snippets.
+
+        Accepts cursor, limit, sort (desc/asc by published_date), tag, author,
+        date_from and date_to query arguments. Cursor of the next page is
+        returned in X-Next-Cursor and Link headers. With highlight=1 every
+        snippet has highlighted field, HTML of its code (null until large
+        code is highlighted).
         """
-        snippets = SnippetModel.find_all()
-        return snippet_schema_many.dump(snippets)
+        args = list_args_schema.load(request.args)
+        snippets, next_cursor = SnippetModel.find_page(**args)
+        data = snippet_schema_many.dump(snippets)
+        if highlight_args_schema.load(request.args)["highlight"]:
+            highlighter.attach_to_snippets(data)
+        return data, 200, pagination_headers(next_cursor)
 
     @classmethod
     def post(cls):
@@ -29,14 +57,10 @@ class Snippets(Resource):
         """
         snippet_json = request.get_json()
         snippet = snippet_schema.load(snippet_json)
-        if SnippetModel.find_by_title(snippet.title):
+        if SnippetModel.find_by_slug(snippet.slug):
             return {"message": "This title is already taken"}, 400
 
-        tags = snippet.tags
-        snippet.tags = []
-        for tag in tags:
-            tag_object = TagModel.get_or_create(tag.name)
-            snippet.tags.append(tag_object)
+        snippet.tags = TagModel.get_or_create_many([tag.name for tag in snippet.tags])
         snippet.save_to_db()
         return snippet_schema.dump(snippet), 201
 
@@ -44,14 +68,21 @@ class Snippets(Resource):
 class SnippetDetail(Resource):
 
     @classmethod
+    @use_replica
+    @conditional(SnippetModel.find_version_by_slug)
+    @cache.cached("snippets")
     def get(cls, slug: str):
         """
-        Return specific snippet data (only published one)
+        Return specific snippet data (only published one), with highlighted
+        code when asked with highlight=1.
         """
         snippet = SnippetModel.find_by_slug(slug)
         if not snippet or snippet.published_date == None:
             return {"message": "Snippet does not exist"}, 404
-        return snippet_schema.dump(snippet), 200
+        data = snippet_schema.dump(snippet)
+        if highlight_args_schema.load(request.args)["highlight"]:
+            highlighter.attach_to_snippets([data])
+        return data, 200
 
     @classmethod
     @jwt_required
@@ -67,12 +98,8 @@ class SnippetDetail(Resource):
         snippet.description = snippet_json["description"]
         snippet.code = snippet_json["code"]
         snippet.language = snippet_json["language"]
-        snippet.tags = []
-        tags = snippet_json.get("tags")
-        if tags:
-            for tag in tags:
-                tag_object = TagModel.get_or_create(tag["name"])
-                snippet.tags.append(tag_object)
+        tags = snippet_json.get("tags") or []
+        snippet.tags = TagModel.get_or_create_many([tag["name"] for tag in tags])
         snippet.save_to_db()
         return snippet_schema.dump(snippet), 200
 
@@ -95,10 +122,13 @@ class SnippetsNotApproved(Resource):
     @jwt_required
     def get(cls):
         """
-        Return list of unpublied snippets.
+        Return page of unpublied snippets, ordered by created_date.
+
+        Accepts the same query arguments as published snippets list.
         """
-        snippets = SnippetModel.find_all(published=False)
-        return snippet_schema_many.dump(snippets), 200
+        args = list_args_schema.load(request.args)
+        snippets, next_cursor = SnippetModel.find_page(published=False, **args)
+        return snippet_schema_many.dump(snippets), 200, pagination_headers(next_cursor)
 
 
 class SnippetNotAppprovedDetail(Resource):
@@ -146,3 +176,12 @@ class RevokeApprovalSnippet(Resource):
             return {"message": "Snippet is not published yet"}, 400
         snippet.revoke_approval()
         return {"message": "Snippet's approval has been revoked"}, 200
+
+
+blueprint, api = api_blueprint("snippets", __name__)
+api.add_resource(Snippets, "/snippets")
+api.add_resource(SnippetsNotApproved, "/snippets-not-approved")
+api.add_resource(SnippetDetail, "/snippets/<string:slug>")
+api.add_resource(SnippetNotAppprovedDetail, "/snippets-not-approved/<string:slug>")
+api.add_resource(ApproveSnippet, "/snippets/<string:slug>/approve")
+api.add_resource(RevokeApprovalSnippet, "/snippets/<string:slug>/revoke")
@@ -0,0 +1,91 @@
+from flask import request
+from flask_restful import Resource
+
+from libs.blueprint import api_blueprint
+from libs.conditional import conditional
+from libs.db_routing import use_replica
+from libs.pagination import decode_offset_cursor, encode_offset_cursor, pagination_headers
+from models import ArticleModel, SnippetModel, TagModel
+from schemas.article import ArticleSchema
+from schemas.pagination import ListArgsSchema
+from schemas.snippet import SnippetSchema
+from schemas.tag import TagCountsSchema, TagListArgsSchema
+from settings.cache import cache
+
+tag_counts_schema_many = TagCountsSchema(many=True)
+tag_list_args_schema = TagListArgsSchema()
+article_schema_many = ArticleSchema(many=True)
+snippet_schema_many = SnippetSchema(many=True)
+list_args_schema = ListArgsSchema()
+
+
+def tagged_list_version(model):
+    def version(name: str):
+        args = dict(list_args_schema.load(request.args), tag=name)
+        return model.find_list_version(**args)
+    return version
+
+
+class Tags(Resource):
+
+    @classmethod
+    @use_replica
+    @cache.cached("tags")
+    def get(cls):
+        """
+        Returns page of tags used by published articles and snippets, with
+        their articles_count and snippets_count.
+
+        Accepts type (article/snippet, counts only that kind), sort (count,
+        most used first, or name), cursor and limit query arguments. Cursor of
+        the next page is returned in X-Next-Cursor and Link headers.
+        """
+        args = tag_list_args_schema.load(request.args)
+        offset = decode_offset_cursor(args["cursor"]) if args.get("cursor") else 0
+        limit = args["limit"]
+        # fetch one extra tag to find out whether next page exists
+        tags = TagModel.find_used(args.get("type"), args["sort"]).offset(offset).limit(limit + 1).all()
+        next_cursor = encode_offset_cursor(offset + limit) if len(tags) > limit else None
+        return tag_counts_schema_many.dump(tags[:limit]), 200, pagination_headers(next_cursor)
+
+
+class TagArticles(Resource):
+
+    @classmethod
+    @use_replica
+    @conditional(tagged_list_version(ArticleModel))
+    @cache.cached("articles")
+    def get(cls, name: str):
+        """
+        Returns page of published articles with the tag, accepts the same
+        query arguments as article list.
+        """
+        if not TagModel.find_by_name(name):
+            return {"message": "Tag not found"}, 404
+        args = dict(list_args_schema.load(request.args), tag=name)
+        articles, next_cursor = ArticleModel.find_page(**args)
+        return article_schema_many.dump(articles), 200, pagination_headers(next_cursor)
+
+
+class TagSnippets(Resource):
+
+    @classmethod
+    @use_replica
+    @conditional(tagged_list_version(SnippetModel))
+    @cache.cached("snippets")
+    def get(cls, name: str):
+        """
+        Returns page of published snippets with the tag, accepts the same
+        query arguments as snippet list.
+        """
+        if not TagModel.find_by_name(name):
+            return {"message": "Tag not found"}, 404
+        args = dict(list_args_schema.load(request.args), tag=name)
+        snippets, next_cursor = SnippetModel.find_page(**args)
+        return snippet_schema_many.dump(snippets), 200, pagination_headers(next_cursor)
+
+
+blueprint, api = api_blueprint("tags", __name__)
+api.add_resource(Tags, "/tags")
+api.add_resource(TagArticles, "/tags/<string:name>/articles")
+api.add_resource(TagSnippets, "/tags/<string:name>/snippets")
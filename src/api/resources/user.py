@@ -1,6 +1,6 @@
 import traceback
-import os
-from flask import request, send_file
+from functools import partial
+from flask import redirect, request
 from flask_restful import Resource
 from flask_uploads import UploadNotAllowed
 from flask_jwt_extended import (
@@ -12,8 +12,13 @@ from flask_jwt_extended import (
     jwt_required
 )
 
-from libs import image_helper
-from settings.blacklist import BLACKLIST
+from libs import image_helper, image_serving
+from libs.blueprint import api_blueprint
+from libs.db_routing import use_replica
+from libs.password_hasher import PasswordPoolBusy
+from settings.blacklist import blacklist
+from settings.cache import cache
+from settings.login import login_throttle
 from schemas.user import UserSchema
 from models import UserModel
 from schemas.image import ImageSchema
@@ -32,16 +37,26 @@ class UserLogin(Resource):
         """
         user_json = request.get_json()
         user_data = user_schema.load(user_json)
-        user = UserModel.find_by_username(user_data.username)
 
-        if user and user.check_password(user_json["password"]):
+        retry_after = login_throttle.hit(user_data.username, request.remote_addr)
+        if retry_after:
+            return {"message": "Too many login attempts, try again later"}, 429, {"Retry-After": str(retry_after)}
+
+        user = UserModel.find_by_username(user_data.username)
+        try:
+            password_valid = user and user.check_password(user_json["password"])
+        except PasswordPoolBusy:
+            return {"message": "Server is busy, try again later"}, 429, {"Retry-After": "1"}
 
+        if password_valid:
+            login_throttle.reset(user_data.username)
             if user.active:
                 access_token = create_access_token(
                     identity=user.id, fresh=True)
                 refresh_token = create_refresh_token(user.id)
                 return {"access_token": access_token, "refresh_token": refresh_token}, 200
             return {"message": "User {} is not active".format(user.username)}, 400
+        login_throttle.fail(user_data.username)
         return {"message": "Invalid username or password"}, 401
 
 
@@ -53,9 +68,9 @@ class UserLogout(Resource):
         """
         Log out by setting JWT tokens to no longer valid.
         """
-        jti = get_raw_jwt()["jti"]
+        raw_jwt = get_raw_jwt()
         user_id = get_jwt_identity()
-        BLACKLIST.add(jti)
+        blacklist.revoke(raw_jwt["jti"], raw_jwt.get("exp"))
         return {"message": "User successfully logged out"}, 200
 
 
@@ -74,6 +89,8 @@ class TokenRefresh(Resource):
 class User(Resource):
 
     @classmethod
+    @use_replica
+    @cache.cached("users")
     def get(cls, username: str):
         """
         Resource to access user data.
@@ -91,19 +108,21 @@ class UserAvatar(Resource):
     def get(cls, username: str):
         """
         Get specific user avatar.
+
+        Redirects to immutable URL of current avatar, which is served with
+        long lived cache headers.
         """
         user = UserModel.find_by_username(username)
         if not user:
             return {"message": "User {} not found".format(username)}, 404
-        if user.avatar_name == "":
+        if not user.avatar_name:
             return {"message": "Avatar for user {} not found".format(username)}, 404
-        folder = "avatars"
-        path = image_helper.get_path(user.avatar_name, folder)
-        print(path)
-        try:
-            return send_file(path)
-        except FileNotFoundError:
+        avatar_url = image_serving.get_image_url(user.avatar_name, "avatars")
+        if not avatar_url:
             return {"message": "Image not found"}, 404
+        response = redirect(avatar_url)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
     @classmethod
     @jwt_required
@@ -121,15 +140,16 @@ class UserAvatar(Resource):
         data = image_schema.load(request.files)
         folder = "avatars"
         try:
-            image_path = image_helper.save_image(data["image"], folder=folder)
-            basename = image_helper.get_basename(image_path)
+            basename = image_helper.save_image(data["image"])
 
             previous_avatar_name = user.avatar_name
+            if previous_avatar_name:
+                image_helper.release_image(previous_avatar_name, folder)
             user.avatar_name = basename
+            user.avatar_variants = None
             user.save_to_db()
-
-            if previous_avatar_name:
-                image_helper.delete_image(previous_avatar_name, folder)
+            image_helper.generate_variants(
+                basename, folder, partial(UserModel.store_avatar_variants, user.id, basename))
 
             return {"message": "Image {} uploaded".format(basename)}, 201
         except UploadNotAllowed:
@@ -151,19 +171,27 @@ class UserAvatar(Resource):
             return {"message": "User {} not found".format(username)}, 404
         if not user.id == user_id:
             return {"message": "You can't manipulate other user's avatars."}, 403
-        if user.avatar_name == "":
+        if not user.avatar_name:
             return {"message": "You don't have avatar"}, 400
 
         folder = "avatars"
         avatar_name = user.avatar_name
         try:
-            path = image_helper.get_path(avatar_name, folder)
+            image_helper.release_image(avatar_name, folder)
             user.avatar_name = ""
+            user.avatar_variants = None
             user.save_to_db()
-            os.remove(path)
             return {"message": "Avatar has been removed"}, 200
         except FileNotFoundError:
             return {"message": "Avatar not found in database"}, 400
         except Exception:
             traceback.print_exc()
             return {"message": "Internal server error"}, 500
+
+
+blueprint, api = api_blueprint("users", __name__)
+api.add_resource(UserLogin, "/login")
+api.add_resource(UserLogout, "/logout")
+api.add_resource(TokenRefresh, "/refresh")
+api.add_resource(User, "/users/<string:username>")
+api.add_resource(UserAvatar, "/users/<string:username>/avatar")
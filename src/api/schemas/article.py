@@ -1,17 +1,24 @@
 from marshmallow import fields
+from libs.serializer import CompiledDumpMixin
 from settings.ma import ma
+from libs.image_serving import get_image_url
 from models.article import ArticleModel
 from schemas.tag import TagSchema
 from schemas.article_content import ContentSchema
 
 
-class ArticleSchema(ma.ModelSchema):
+class ArticleSchema(CompiledDumpMixin, ma.ModelSchema):
 
     tags = ma.Nested(TagSchema, many=True)
     content = ma.Nested(ContentSchema, many=True)
+    likes_count = fields.Integer(dump_only=True)
+    image_variants = fields.Dict(dump_only=True)
+    image_src = fields.Function(lambda article: get_image_url(article.image_url, "article_images"),
+                                dump_only=True)
 
     class Meta:
         model = ArticleModel
-        dump_only = ("id",)
+        dump_only = ("id", "slug")
+        exclude = ("likes", "rendered", "content_html")
         include_fk = True
         ordered = True
@@ -0,0 +1,10 @@
+from marshmallow import EXCLUDE, fields
+from settings.ma import ma
+
+
+class HighlightArgsSchema(ma.Schema):
+    """Query string argument asking for highlighted code in snippet and article responses."""
+    highlight = fields.Boolean(missing=False)
+
+    class Meta:
+        unknown = EXCLUDE
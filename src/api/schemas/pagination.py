@@ -0,0 +1,24 @@
+from marshmallow import EXCLUDE, fields, validate
+from settings.ma import ma
+from libs.pagination import DEFAULT_LIMIT, MAX_LIMIT
+
+
+class ListArgsSchema(ma.Schema):
+    """Query string arguments accepted by paginated list endpoints."""
+    cursor = fields.String()
+    limit = fields.Integer(missing=DEFAULT_LIMIT,
+                           validate=validate.Range(min=1, max=MAX_LIMIT))
+    sort = fields.String(missing="desc", validate=validate.OneOf(["desc", "asc"]))
+    tag = fields.String()
+    author = fields.String()
+    date_from = fields.DateTime()
+    date_to = fields.DateTime()
+
+    class Meta:
+        unknown = EXCLUDE
+
+
+class LikedArgsSchema(ma.Schema):
+    """Articles whose like state is checked in one request, at most one page of them."""
+    ids = fields.List(fields.Integer(), required=True,
+                      validate=validate.Length(min=1, max=MAX_LIMIT))
@@ -0,0 +1,15 @@
+from marshmallow import EXCLUDE, fields, validate
+from settings.ma import ma
+from libs.pagination import DEFAULT_LIMIT, MAX_LIMIT
+
+
+class SearchArgsSchema(ma.Schema):
+    """Query string arguments accepted by search endpoint."""
+    q = fields.String(required=True, validate=validate.Length(min=1, max=200))
+    type = fields.String(validate=validate.OneOf(["article", "snippet"]))
+    cursor = fields.String()
+    limit = fields.Integer(missing=DEFAULT_LIMIT,
+                           validate=validate.Range(min=1, max=MAX_LIMIT))
+
+    class Meta:
+        unknown = EXCLUDE
@@ -1,11 +1,12 @@
+from libs.serializer import CompiledDumpMixin
 from settings.ma import ma
 from models import SnippetModel
 from schemas.tag import TagSchema
 
 
-class SnippetSchema(ma.ModelSchema):
+class SnippetSchema(CompiledDumpMixin, ma.ModelSchema):
     tags = ma.Nested(TagSchema, many=True)
 
     class Meta:
         model = SnippetModel
-        dump_only = ("id",)
+        dump_only = ("id", "slug")
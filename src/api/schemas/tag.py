@@ -1,8 +1,33 @@
+from marshmallow import EXCLUDE, fields, validate
+
+from libs.pagination import DEFAULT_LIMIT, MAX_LIMIT
+from libs.serializer import CompiledDumpMixin
 from settings.ma import ma
 from models import TagModel
 
 
-class TagSchema(ma.ModelSchema):
+class TagSchema(CompiledDumpMixin, ma.ModelSchema):
     class Meta:
         model = TagModel
         dump_only = ("id",)
+        # change without saving tag, nested tags of rendered articles would go stale
+        exclude = ("articles_count", "snippets_count")
+
+
+class TagCountsSchema(CompiledDumpMixin, ma.ModelSchema):
+    """Tag listing entry: name with numbers of published articles and snippets."""
+    class Meta:
+        model = TagModel
+        fields = ("name", "articles_count", "snippets_count")
+
+
+class TagListArgsSchema(ma.Schema):
+    """Query string arguments accepted by tag listing."""
+    type = fields.String(validate=validate.OneOf(["article", "snippet"]))
+    sort = fields.String(missing="count", validate=validate.OneOf(["count", "name"]))
+    cursor = fields.String()
+    limit = fields.Integer(missing=DEFAULT_LIMIT,
+                           validate=validate.Range(min=1, max=MAX_LIMIT))
+
+    class Meta:
+        unknown = EXCLUDE
@@ -1,8 +1,14 @@
+from marshmallow import fields
+from libs.serializer import CompiledDumpMixin
 from settings.ma import ma
+from libs.image_serving import get_image_url
 from models.user import UserModel
 
 
-class UserSchema(ma.ModelSchema):
+class UserSchema(CompiledDumpMixin, ma.ModelSchema):
+    avatar_variants = fields.Dict(dump_only=True)
+    avatar_src = fields.Function(lambda user: get_image_url(user.avatar_name, "avatars"), dump_only=True)
+
     class Meta:
         model = UserModel
         load_only = ("password", )
@@ -1,9 +1,13 @@
 """
 blacklist.py
 
-This file just contains the blacklist of the JWT tokens–it will be imported by
+This file contains the blacklist of revoked JWT tokens–it will be imported by
 app and the logout resource so that tokens can be added to the blacklist when the
 user logs out.
+
+Revoked tokens are kept in the database (or Redis) until they expire, so the
+blacklist survives restarts and is shared by all workers.
 """
+from libs.token_blacklist import TokenBlacklist
 
-BLACKLIST = set()
+blacklist = TokenBlacklist()
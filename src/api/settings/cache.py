@@ -0,0 +1,3 @@
+from libs.cache import ResponseCache
+
+cache = ResponseCache()
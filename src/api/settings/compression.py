@@ -0,0 +1,3 @@
+from libs.compression import Compression
+
+compression = Compression()
@@ -1,5 +1,5 @@
-from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import MetaData
+from libs.db_routing import RoutingSQLAlchemy
 
 convention = {
     "ix": "ix_%(column_0_label)s",
@@ -10,4 +10,4 @@ convention = {
 }
 
 metadata = MetaData(naming_convention=convention)
-db = SQLAlchemy(metadata=metadata)
+db = RoutingSQLAlchemy(metadata=metadata)
@@ -3,9 +3,96 @@ import os
 DEBUG = True
 SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///data.db")
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+# connection pool of primary and each replica (not used with SQLite)
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", 5))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", 10))
+# seconds to wait for free connection before request fails
+DATABASE_POOL_TIMEOUT = int(os.getenv("DATABASE_POOL_TIMEOUT", 10))
+# seconds after which connection is replaced, keep below server/proxy idle timeout
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", 1800))
+# test connection before use, survives database restarts at cost of a round trip
+DATABASE_POOL_PRE_PING = os.getenv("DATABASE_POOL_PRE_PING", "1") == "1"
+# PostgreSQL statement_timeout of every connection in milliseconds, 0 disables it
+DATABASE_STATEMENT_TIMEOUT_MS = int(os.getenv("DATABASE_STATEMENT_TIMEOUT_MS", 0))
+# comma separated URLs of read replicas, queried by public article, snippet and user GETs
+DATABASE_REPLICA_URLS = [url for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url]
+# seconds client reads from primary after its write, should exceed replication lag
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv("DATABASE_REPLICA_STICKY_SECONDS", 10))
+# times a request is run again after serialization failure or deadlock, 0 disables retries
+UNIT_OF_WORK_RETRIES = int(os.getenv("UNIT_OF_WORK_RETRIES", 2))
+# threads of ASGI app (asgi.py) running handlers and their queries, keep close to DATABASE_POOL_SIZE
+ASGI_THREADS = int(os.getenv("ASGI_THREADS", 8))
 PROPAGATE_EXCEPTIONS = True
 JWT_SECRET_KEY = os.environ["JWT_SECRET_KEY"]
 SECRET_KEY = os.environ["APP_SECRET_KEY"]
 JWT_BLACKLIST_ENABLED = True
 UPLOADED_IMAGES_DEST = os.path.join("static", "images")
 JWT_BLACKLIST_TOKEN_CHECKS = ["access", "refresh"]
+# "memory" (per worker LRU), "redis" (shared, needs redis package) or "null"
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 300))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1024))
+RESPONSE_CACHE_REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# "database" (blog_revoked_token table) or "redis" (needs redis package)
+REVOKED_TOKENS_BACKEND = os.getenv("REVOKED_TOKENS_BACKEND", "database")
+REVOKED_TOKENS_REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# seconds a token revoked by another worker can still be accepted, 0 disables local pre-check
+REVOKED_TOKENS_SYNC_INTERVAL = int(os.getenv("REVOKED_TOKENS_SYNC_INTERVAL", 5))
+# bcrypt work factor of new password hashes
+BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 12))
+# processes hashing passwords per worker (0 runs bcrypt in request thread)
+PASSWORD_HASHING_WORKERS = int(os.getenv("PASSWORD_HASHING_WORKERS", 2))
+# requests waiting for hashing process before 429 is returned
+PASSWORD_HASHING_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASHING_QUEUE_LIMIT", 8))
+# "memory" (per worker) or "redis" (shared, needs redis package)
+LOGIN_THROTTLE_BACKEND = os.getenv("LOGIN_THROTTLE_BACKEND", "memory")
+LOGIN_THROTTLE_REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+LOGIN_THROTTLE_WINDOW = 60
+# failed attempts per username, all attempts per client address
+LOGIN_THROTTLE_USERNAME_LIMIT = 5
+LOGIN_THROTTLE_IP_LIMIT = 20
+# number of proxies in front of the app trusted to set X-Forwarded-For/-Proto/-Host,
+# client address of requests (and login throttling) comes from them, 0 uses peer address
+PROXY_FIX_HOPS = int(os.getenv("PROXY_FIX_HOPS", 0))
+# processes generating image variants, needs Pillow (0 generates them in request)
+IMAGE_PROCESSING_WORKERS = int(os.getenv("IMAGE_PROCESSING_WORKERS", 2))
+# nginx internal location aliased to UPLOADED_IMAGES_DEST, e.g. "/protected-images"
+IMAGE_ACCEL_REDIRECT_LOCATION = os.getenv("IMAGE_ACCEL_REDIRECT_LOCATION")
+# let apache/lighttpd send image files (X-Sendfile)
+USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "") == "1"
+# "json" (standard library) or "orjson" (needs orjson package, compact output)
+JSON_ENCODER = os.getenv("JSON_ENCODER", "json")
+# store article content as HTML with highlighted code (Pygments) on publish
+ARTICLE_RENDER_HTML = os.getenv("ARTICLE_RENDER_HTML", "") == "1"
+# PostgreSQL text search configuration used for stemming
+SEARCH_LANGUAGE = os.getenv("SEARCH_LANGUAGE", "english")
+# per endpoint timings, SQL query counts and /metrics (Prometheus format)
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "") == "1"
+# profiles of slow requests are written here, profiling is off when not set
+INSTRUMENTATION_PROFILE_DIR = os.getenv("INSTRUMENTATION_PROFILE_DIR")
+# "cprofile" (.prof files) or "pyinstrument" (.html files, needs pyinstrument package)
+INSTRUMENTATION_PROFILER = os.getenv("INSTRUMENTATION_PROFILER", "cprofile")
+# fraction of requests run under profiler, kept only if slower than threshold
+INSTRUMENTATION_PROFILE_SAMPLE_RATE = float(os.getenv("INSTRUMENTATION_PROFILE_SAMPLE_RATE", 0.01))
+INSTRUMENTATION_PROFILE_THRESHOLD_MS = int(os.getenv("INSTRUMENTATION_PROFILE_THRESHOLD_MS", 500))
+# requests with X-Profile header set to this token are always profiled and written
+INSTRUMENTATION_PROFILE_TOKEN = os.getenv("INSTRUMENTATION_PROFILE_TOKEN")
+# gzip/Brotli compression of responses negotiated by Accept-Encoding
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "1") == "1"
+# "br" needs brotli package, it's skipped without it
+COMPRESSION_ENCODINGS = os.getenv("COMPRESSION_ENCODINGS", "br,gzip").split(",")
+COMPRESSION_MIMETYPES = os.getenv(
+    "COMPRESSION_MIMETYPES", "application/json,application/x-ndjson,text/html,text/plain").split(",")
+# smaller bodies are sent as they are
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 5))
+# compressed bodies kept per worker, so unchanged responses are compressed once
+COMPRESSION_CACHE_MAX_BYTES = int(os.getenv("COMPRESSION_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+# highlighted snippet and article code in responses asked with ?highlight=1, needs Pygments
+HIGHLIGHT_ENABLED = os.getenv("HIGHLIGHT_ENABLED", "1") == "1"
+# processes highlighting code larger than HIGHLIGHT_INLINE_MAX_BYTES after save (0 highlights all of it in request)
+HIGHLIGHT_WORKERS = int(os.getenv("HIGHLIGHT_WORKERS", 2))
+HIGHLIGHT_INLINE_MAX_BYTES = int(os.getenv("HIGHLIGHT_INLINE_MAX_BYTES", 4096))
+# highlighted code kept per worker, the rest is read from blog_highlighted_code
+HIGHLIGHT_CACHE_MAX_ENTRIES = int(os.getenv("HIGHLIGHT_CACHE_MAX_ENTRIES", 2048))
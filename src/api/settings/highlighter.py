@@ -0,0 +1,3 @@
+from libs.highlighting import Highlighter
+
+highlighter = Highlighter()
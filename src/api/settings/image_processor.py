@@ -0,0 +1,3 @@
+from libs.image_processing import ImageProcessor
+
+image_processor = ImageProcessor()
@@ -0,0 +1,3 @@
+from libs.instrumentation import Instrumentation
+
+instrumentation = Instrumentation()
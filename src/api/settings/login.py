@@ -0,0 +1,5 @@
+from libs.login_throttle import LoginThrottle
+from libs.password_hasher import PasswordHasher
+
+password_hasher = PasswordHasher()
+login_throttle = LoginThrottle()
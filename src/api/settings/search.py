@@ -0,0 +1,3 @@
+from libs.search import SearchIndex
+
+search_index = SearchIndex()
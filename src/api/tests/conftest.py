@@ -0,0 +1,97 @@
+import os
+from datetime import datetime
+
+import pytest
+
+# read by settings/default_config.py when app is created
+os.environ.setdefault("JWT_SECRET_KEY", "test-jwt-secret")
+os.environ.setdefault("APP_SECRET_KEY", "test-app-secret")
+
+from app import create_app
+from settings.db import db
+
+
+@pytest.fixture
+def config(tmp_path) -> dict:
+    """Overrides of test config, redefined by tests which need other settings."""
+    return {}
+
+
+@pytest.fixture
+def app(tmp_path, config):
+    app = create_app(dict({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///{}".format(tmp_path / "test.db"),
+        "UPLOADED_IMAGES_DEST": str(tmp_path / "images"),
+        "BCRYPT_LOG_ROUNDS": 4,
+        # everything runs in the request, results are there when it's answered
+        "PASSWORD_HASHING_WORKERS": 0,
+        "IMAGE_PROCESSING_WORKERS": 0,
+        "HIGHLIGHT_WORKERS": 0,
+    }, **config))
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app):
+    from models import UserModel
+
+    def make_user(username: str, password: str = "password") -> UserModel:
+        user = UserModel(username=username, email="{}@example.com".format(username), active=True)
+        user.set_password(password)
+        user.save_to_db()
+        return user
+    return make_user
+
+
+@pytest.fixture
+def login(client):
+    def login(username: str, password: str = "password") -> dict:
+        response = client.post("/api/v1/login", json={"username": username, "password": password})
+        return {"Authorization": "Bearer {}".format(response.get_json()["access_token"])}
+    return login
+
+
+@pytest.fixture
+def make_article(app, make_user):
+    from models import ArticleModel, TagModel, UserModel
+
+    def make_article(title: str, author: UserModel = None, tags=("python",), content=None,
+                     published: bool = True) -> ArticleModel:
+        author = author or UserModel.find_by_username("author") or make_user("author")
+        article = ArticleModel(
+            title=title, description="About {}".format(title), author_id=author.id, image_url="image.png",
+            content=content if content is not None else [{
+                "paragraph_title": "Intro", "content": "Text of {}".format(title),
+                "code": {"language": "python", "content": "print({!r})".format(title)},
+            }],
+        )
+        article.tags = TagModel.get_or_create_many(list(tags))
+        article.published_date = datetime.utcnow() if published else None
+        article.save_to_db()
+        return article
+    return make_article
+
+
+@pytest.fixture
+def make_snippet(app):
+    from models import SnippetModel, TagModel
+
+    def make_snippet(title: str, tags=("python",), code: str = "print(1)", language: str = "python",
+                     published: bool = True) -> SnippetModel:
+        snippet = SnippetModel(title=title, description="About {}".format(title), code=code,
+                               language=language, author="author")
+        snippet.tags = TagModel.get_or_create_many(list(tags))
+        snippet.published_date = datetime.utcnow() if published else None
+        snippet.save_to_db()
+        return snippet
+    return make_snippet
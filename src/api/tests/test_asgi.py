@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from libs.asgi import BUFFER_SIZE, PublicReadApp
+
+
+@pytest.fixture
+def asgi_app(app):
+    return PublicReadApp(app, threads=2)
+
+
+def asgi_request(asgi_app, method: str, path: str, query_string: bytes = b"", headers=()):
+    """Status, headers and body chunks the ASGI app sends for request."""
+    scope = {"type": "http", "method": method, "path": path, "query_string": query_string,
+             "headers": [(name.encode("latin1"), value.encode("latin1")) for name, value in headers],
+             "http_version": "1.1", "scheme": "http", "server": ("testserver", 80), "client": ("127.0.0.1", 5000)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(asgi_app(scope, receive, send))
+    finally:
+        loop.close()
+    start, bodies = sent[0], sent[1:]
+    assert start["type"] == "http.response.start"
+    assert bodies[-1] == {"type": "http.response.body", "body": b""} or not bodies[-1].get("more_body")
+    return start["status"], dict(start["headers"]), [message["body"] for message in bodies if message["body"]]
+
+
+def test_public_routes_answer_like_wsgi(client, asgi_app, make_article, make_snippet):
+    article = make_article("Served article")
+    snippet = make_snippet("Served snippet")
+
+    for path in ("/api/v1/articles", "/api/v1/articles/{}".format(article.slug),
+                 "/api/v1/snippets", "/api/v1/snippets/{}".format(snippet.slug), "/api/v1/users/author"):
+        status, headers, chunks = asgi_request(asgi_app, "GET", path)
+        assert status == 200, path
+        assert b"".join(chunks) == client.get(path).data
+        assert headers[b"content-type"] == b"application/json"
+
+
+def test_query_string_and_headers_reach_view(asgi_app, make_article):
+    make_article("Older")
+    make_article("Newer")
+
+    status, headers, chunks = asgi_request(asgi_app, "GET", "/api/v1/articles", b"limit=1")
+    assert status == 200
+    assert b"Newer" in b"".join(chunks) and b"Older" not in b"".join(chunks)
+    assert b"x-next-cursor" in headers
+
+    status, headers, _ = asgi_request(asgi_app, "GET", "/api/v1/articles", b"limit=1",
+                                      headers=[("If-None-Match", headers[b"etag"].decode("latin1"))])
+    assert status == 304
+
+
+def test_large_body_is_sent_in_chunks(client, asgi_app, make_article):
+    paragraphs = [{"paragraph_title": "Part {}".format(number), "content": "x" * 1000} for number in range(200)]
+    article = make_article("Long article", content=paragraphs)
+
+    status, _, chunks = asgi_request(asgi_app, "GET", "/api/v1/articles/{}".format(article.slug))
+    assert status == 200
+    assert sum(len(chunk) for chunk in chunks) > BUFFER_SIZE
+    assert b"".join(chunks) == client.get("/api/v1/articles/{}".format(article.slug)).data
+
+    status, headers, chunks = asgi_request(asgi_app, "HEAD", "/api/v1/articles/{}".format(article.slug))
+    assert status == 200 and chunks == []
+
+
+@pytest.mark.parametrize("method, path", [
+    ("POST", "/api/v1/articles"),
+    ("DELETE", "/api/v1/articles/served-article"),
+    ("GET", "/api/v1/articles/draft"),
+    ("GET", "/api/v1/login"),
+    ("GET", "/api/v1/unknown"),
+])
+def test_other_routes_are_left_to_wsgi(asgi_app, make_article, method, path):
+    make_article("Served article")
+
+    status, _, chunks = asgi_request(asgi_app, method, path)
+    assert status == 404
+    assert b"Not served" in b"".join(chunks)
@@ -0,0 +1,107 @@
+import json
+
+from libs import bulk
+from libs.unit_of_work import unit_of_work
+from models import ArticleModel, HighlightedCodeModel, ImageBlobModel, SnippetModel
+
+
+def ndjson(*records) -> bytes:
+    return "".join(json.dumps(record) + "\n" for record in records).encode("utf-8")
+
+
+def article_record(title: str, **fields) -> dict:
+    record = {"title": title, "description": "About {}".format(title), "author": "author", "image_url": None,
+              "content": [{"paragraph_title": "Intro", "content": "Text"}], "tags": [{"name": "python"}],
+              "created_date": "2020-01-01T10:00:00", "published_date": "2020-01-02T10:00:00"}
+    record.update(fields)
+    return record
+
+
+def test_api_export_import_round_trip(client, make_user, login, make_article):
+    make_article("Published article", tags=["python", "flask"])
+    make_article("Draft article", tags=[], published=False)
+    make_user("editor")
+    headers = login("editor")
+
+    exported = client.get("/api/v1/bulk/articles", headers=headers)
+    assert exported.status_code == 200
+    assert exported.mimetype == "application/x-ndjson"
+    lines = exported.data.decode("utf-8").splitlines()
+    assert [json.loads(line)["title"] for line in lines] == ["Published article", "Draft article"]
+
+    for article in ArticleModel.query.all():
+        article.delete_from_db()
+    response = client.post("/api/v1/bulk/articles", headers=headers, data=exported.data)
+    assert response.get_json() == {"imported": 2, "failed": 0, "errors": []}
+
+    assert client.get("/api/v1/bulk/articles", headers=headers).data == exported.data
+    published = client.get("/api/v1/articles").get_json()
+    assert [(item["title"], sorted(tag["name"] for tag in item["tags"])) for item in published] \
+        == [("Published article", ["flask", "python"])]
+
+
+def test_failing_lines_are_reported_and_skipped(client, make_user, login, make_article):
+    make_article("Existing article")
+    make_user("editor")
+
+    body = ndjson(
+        article_record("Hello world"),
+        article_record("Existing article"),
+        # same slug as line 1, in the same chunk
+        article_record("Hello, World!"),
+        article_record("No author", author="nobody"),
+        article_record("Bad content", content="text"),
+    ) + b"{not json\n\n" + ndjson(article_record("Last line"))
+    response = client.post("/api/v1/bulk/articles", headers=login("editor"), data=body)
+
+    report = response.get_json()
+    assert (report["imported"], report["failed"]) == (2, 5)
+    assert [error["line"] for error in report["errors"]] == [2, 3, 4, 5, 6]
+    assert "title" in report["errors"][1]["errors"]
+    assert sorted(article.title for article in ArticleModel.query) == ["Existing article", "Hello world", "Last line"]
+
+
+def test_cli_import_commits_every_chunk(app, monkeypatch, tmp_path, make_snippet):
+    monkeypatch.setattr(bulk, "IMPORT_CHUNK_SIZE", 2)
+    make_snippet("Existing snippet")
+    source = tmp_path / "snippets.ndjson"
+    records = [{"title": title, "description": "About", "code": "print(1)", "language": "python",
+                "author": "author", "tags": [{"name": "python"}], "created_date": "2020-01-01T10:00:00",
+                "published_date": None}
+               for title in ("First snippet", "Second snippet", "first snippet!", "Existing snippet", "Third")]
+    source.write_bytes(ndjson(*records))
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["bulk", "import", "snippets", str(source)])
+    assert result.exit_code == 1
+    assert "Imported 3 snippets, 2 line(s) failed" in result.output
+    # line 3 collides with line 1 of the previous, already committed chunk
+    assert "Line 3:" in result.output and "Line 4:" in result.output
+
+    output = tmp_path / "export.ndjson"
+    result = runner.invoke(args=["bulk", "export", "snippets", str(output)])
+    assert result.exit_code == 0
+    exported = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [record["title"] for record in exported] == [
+        "Existing snippet", "First snippet", "Second snippet", "Third"]
+    assert exported[1] == records[0]
+    assert SnippetModel.query.count() == 4
+
+
+def test_import_references_image_blobs_and_highlights_code(client, make_user, login):
+    make_user("author")
+    with unit_of_work():
+        name = ImageBlobModel.acquire("ab" * 32, ".png", 10)
+    body = ndjson(
+        article_record("First with image", image_url=name),
+        article_record("Second with image", image_url=name, content=[
+            {"paragraph_title": "Code", "content": "Text", "code": {"language": "python", "content": "x = 1"}}]),
+        article_record("Missing image", image_url="cd" * 32 + ".png"),
+    )
+    response = client.post("/api/v1/bulk/articles", headers=login("author"), data=body)
+
+    report = response.get_json()
+    assert (report["imported"], report["failed"]) == (2, 1)
+    assert report["errors"][0]["line"] == 3 and "image_url" in report["errors"][0]["errors"]
+    assert ImageBlobModel.find_by_digest("ab" * 32).refcount == 3
+    assert [row.language for row in HighlightedCodeModel.query] == ["python"]
@@ -0,0 +1,24 @@
+import pytest
+
+from settings.cache import cache
+
+
+@pytest.fixture
+def config(tmp_path) -> dict:
+    # replica is the same database, lag is simulated by the stickiness window alone
+    return {"DATABASE_REPLICA_URLS": ["sqlite:///{}".format(tmp_path / "test.db")],
+            "DATABASE_REPLICA_STICKY_SECONDS": 10}
+
+
+def test_replica_reads_dont_fill_cache_right_after_write(app, client, make_snippet):
+    make_snippet("Written just now")
+    skipped = cache.skipped_fills
+
+    assert client.get("/api/v1/snippets").headers["X-Cache"] == "MISS"
+    # read from replica which may not have the write yet, not stored
+    assert client.get("/api/v1/snippets").headers["X-Cache"] == "MISS"
+    assert cache.skipped_fills == skipped + 2
+
+    cache.replica_lag = 0
+    assert client.get("/api/v1/snippets").headers["X-Cache"] == "MISS"
+    assert client.get("/api/v1/snippets").headers["X-Cache"] == "HIT"
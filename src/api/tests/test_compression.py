@@ -0,0 +1,27 @@
+import gzip
+
+
+def test_large_responses_are_compressed_as_negotiated(client, make_snippet):
+    for number in range(20):
+        make_snippet("Snippet number {}".format(number))
+
+    plain = client.get("/api/v1/snippets?limit=20")
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+
+    compressed = client.get("/api/v1/snippets?limit=20", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert gzip.decompress(compressed.data) == plain.data
+    assert compressed.headers["ETag"].startswith("W/")
+
+    not_modified = client.get("/api/v1/snippets?limit=20", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": compressed.headers["ETag"]})
+    assert not_modified.status_code == 304
+
+
+def test_small_responses_are_sent_as_they_are(client, make_snippet):
+    make_snippet("Only snippet")
+    response = client.get("/api/v1/snippets/only-snippet", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
@@ -0,0 +1,37 @@
+from models import HighlightedCodeModel, SnippetModel
+from settings.highlighter import highlighter
+
+
+def test_language_is_stored_as_lexer_alias(client, make_snippet):
+    make_snippet("Aliased language", code="print('alias')", language="Py")
+    make_snippet("Unknown language", code="print('unknown')", language="x" * 200)
+
+    assert sorted(row.language for row in HighlightedCodeModel.query) == ["python", "text"]
+
+    response = client.get("/api/v1/snippets/aliased-language?highlight=1")
+    assert response.status_code == 200
+    assert 'class="highlight"' in response.get_json()["highlighted"]
+    response = client.get("/api/v1/snippets/unknown-language?highlight=1")
+    assert response.get_json()["highlighted"] is not None
+
+
+def test_failures_of_pool_results_are_logged(app, caplog):
+    def on_done():
+        raise RuntimeError("item can't be saved")
+
+    highlighter._finish(("python", "0" * 64), "<pre></pre>", on_done)
+    assert "Storing highlighted code failed" in caplog.text
+    assert "item can't be saved" in caplog.text
+
+
+def test_stored_pool_result_changes_version_not_updated_date(client, make_snippet):
+    snippet = make_snippet("Large snippet")
+    snippet_id, updated_date = snippet.id, snippet.updated_date
+    first = client.get("/api/v1/snippets/large-snippet?highlight=1")
+
+    SnippetModel.store_highlighted(snippet_id)
+    second = client.get("/api/v1/snippets/large-snippet?highlight=1")
+    assert second.headers["X-Cache"] == "MISS"
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.get_json()["updated_date"] == first.get_json()["updated_date"]
+    assert SnippetModel.find_by_id(snippet_id).updated_date == updated_date
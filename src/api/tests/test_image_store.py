@@ -0,0 +1,37 @@
+import io
+import os
+
+from werkzeug.datastructures import FileStorage
+
+from libs import image_helper, image_serving
+from libs.unit_of_work import unit_of_work
+
+
+def upload(filename: str, content: bytes) -> str:
+    with unit_of_work():
+        return image_helper.save_image(FileStorage(io.BytesIO(content), filename=filename))
+
+
+def test_same_content_with_other_extension_reuses_blob(app):
+    first = upload("photo.jpeg", b"same bytes")
+    second = upload("photo.jpg", b"same bytes")
+
+    assert second == first
+    assert first.endswith(".jpeg")
+    blobs_dir = os.path.dirname(image_helper.get_path(first))
+    assert os.listdir(blobs_dir) == [first]
+
+
+def test_blob_url_is_derived_from_name(app, client, monkeypatch):
+    name = upload("photo.png", b"blob bytes")
+    with app.test_request_context():
+        monkeypatch.setattr(os.path, "isfile", None)
+        url = image_serving.get_image_url(name, "article_images")
+        monkeypatch.undo()
+        assert image_serving.get_image_url("missing.png", "article_images") is None
+        assert image_serving.get_image_url(name, "private") is None
+    assert name[:16] in url
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.get_data() == b"blob bytes"
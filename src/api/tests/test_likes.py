@@ -0,0 +1,16 @@
+def test_like_returns_changed_count(client, make_user, login, make_article):
+    article = make_article("Liked article")
+    make_user("reader")
+    headers = login("reader")
+
+    response = client.post("/api/v1/articles/{}/like".format(article.slug), headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["likes_count"] == 1
+
+    # liking again has no effect
+    response = client.post("/api/v1/articles/{}/like".format(article.slug), headers=headers)
+    assert response.get_json()["likes_count"] == 1
+
+    response = client.post("/api/v1/articles/{}/revoke-like".format(article.slug), headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["likes_count"] == 0
@@ -0,0 +1,34 @@
+import pytest
+
+
+@pytest.fixture
+def config():
+    return {"LOGIN_THROTTLE_USERNAME_LIMIT": 2, "LOGIN_THROTTLE_IP_LIMIT": 4, "PROXY_FIX_HOPS": 1}
+
+
+def login(client, password, address="203.0.113.1"):
+    return client.post("/api/v1/login", json={"username": "reader", "password": password},
+                       headers={"X-Forwarded-For": address})
+
+
+def test_only_failed_attempts_count_against_username(client, make_user):
+    make_user("reader")
+    for _ in range(3):
+        assert login(client, "password").status_code == 200
+    assert login(client, "wrong").status_code == 401
+    # success forgets the failure, so two more fit in the limit
+    assert login(client, "password", "203.0.113.2").status_code == 200
+    assert login(client, "wrong", "203.0.113.2").status_code == 401
+    assert login(client, "wrong", "203.0.113.2").status_code == 401
+
+    throttled = login(client, "password", "203.0.113.3")
+    assert throttled.status_code == 429
+    assert int(throttled.headers["Retry-After"]) > 0
+
+
+def test_attempts_are_counted_per_forwarded_address(client, make_user):
+    make_user("reader")
+    for _ in range(4):
+        assert login(client, "password").status_code == 200
+    assert login(client, "password").status_code == 429
+    assert login(client, "password", "203.0.113.2").status_code == 200
@@ -0,0 +1,21 @@
+from datetime import datetime
+
+
+def test_draft_pages_follow_cursor(client, make_user, make_article, login):
+    make_user("author")
+    created_date = datetime(2020, 1, 1)
+    for number in range(5):
+        article = make_article("Draft {}".format(number), published=False)
+        # same date for some, so the id decides their order
+        article.created_date = created_date if number < 3 else datetime(2020, 1, number)
+        article.save_to_db()
+    headers = login("author")
+
+    titles, url = [], "/api/v1/articles/draft?limit=2"
+    while url:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        titles += [article["title"] for article in response.get_json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        url = "/api/v1/articles/draft?limit=2&cursor={}".format(cursor) if cursor else None
+    assert titles == ["Draft 4", "Draft 3", "Draft 2", "Draft 1", "Draft 0"]
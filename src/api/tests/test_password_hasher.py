@@ -0,0 +1,39 @@
+import time
+
+import pytest
+from flask import Flask
+
+from libs.password_hasher import PasswordHasher, PasswordPoolBusy
+from models import UserModel
+
+
+@pytest.fixture
+def hasher():
+    app = Flask(__name__)
+    app.config.update(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE_LIMIT=0, PASSWORD_HASHING_TIMEOUT=0.2)
+    return PasswordHasher(app)
+
+
+def test_timed_out_work_keeps_its_slot(hasher):
+    with pytest.raises(PasswordPoolBusy):
+        hasher._run(time.sleep, 1)
+    # process is still sleeping, so there is no room for more and it's refused right away
+    started = time.monotonic()
+    with pytest.raises(PasswordPoolBusy):
+        hasher._run(abs, -1)
+    assert time.monotonic() - started < hasher.timeout
+
+    time.sleep(1)
+    assert hasher._run(abs, -1) == 1
+
+
+def test_login_answers_429_when_pool_is_busy(client, make_user, monkeypatch):
+    make_user("busy")
+
+    def busy(self, password):
+        raise PasswordPoolBusy()
+
+    monkeypatch.setattr(UserModel, "check_password", busy)
+    response = client.post("/api/v1/login", json={"username": "busy", "password": "password"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
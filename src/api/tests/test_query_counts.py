@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from settings.db import db
+
+# statements per response, whatever the number of items, tags and authors on it
+MAX_QUERIES = 6
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def queries_of(client, path: str) -> int:
+    with count_queries() as statements:
+        response = client.get(path)
+    assert response.status_code == 200
+    return len(statements)
+
+
+def add_articles(make_user, make_article, start: int, count: int) -> None:
+    for number in range(start, start + count):
+        author = make_user("author{}".format(number))
+        make_article("Article {}".format(number), author=author,
+                     tags=["tag{}".format(number), "tag{}".format(number + 1), "common"])
+
+
+def add_snippets(make_snippet, start: int, count: int) -> None:
+    for number in range(start, start + count):
+        make_snippet("Snippet {}".format(number), tags=["tag{}".format(number), "common"])
+
+
+@pytest.mark.parametrize("path", ["/api/v1/articles", "/api/v1/articles?highlight=1"])
+def test_article_list_queries_are_bounded(client, make_user, make_article, path):
+    add_articles(make_user, make_article, 0, 2)
+    few = queries_of(client, path)
+    add_articles(make_user, make_article, 2, 10)
+    many = queries_of(client, path)
+    assert many == few <= MAX_QUERIES
+
+
+@pytest.mark.parametrize("path", ["/api/v1/snippets", "/api/v1/snippets?highlight=1"])
+def test_snippet_list_queries_are_bounded(client, make_snippet, path):
+    add_snippets(make_snippet, 0, 2)
+    few = queries_of(client, path)
+    add_snippets(make_snippet, 2, 10)
+    many = queries_of(client, path)
+    assert many == few <= MAX_QUERIES
+
+
+@pytest.mark.parametrize("highlight", ["", "?highlight=1"])
+def test_article_detail_queries_are_bounded(client, make_article, highlight):
+    few = make_article("Few", tags=["one"])
+    paragraphs = [{"paragraph_title": "Part {}".format(number), "content": "Text",
+                   "code": {"language": "python", "content": "x = {}".format(number)}} for number in range(10)]
+    many = make_article("Many", tags=["tag{}".format(number) for number in range(10)], content=paragraphs)
+    assert queries_of(client, "/api/v1/articles/{}{}".format(many.slug, highlight)) \
+        == queries_of(client, "/api/v1/articles/{}{}".format(few.slug, highlight)) <= MAX_QUERIES
+
+
+def test_snippet_detail_queries_are_bounded(client, make_snippet):
+    few = make_snippet("Few", tags=["one"])
+    many = make_snippet("Many", tags=["tag{}".format(number) for number in range(10)])
+    assert queries_of(client, "/api/v1/snippets/{}".format(many.slug)) \
+        == queries_of(client, "/api/v1/snippets/{}".format(few.slug)) <= MAX_QUERIES
@@ -0,0 +1,64 @@
+import io
+
+from flask_restful.representations.json import output_json as restful_output_json
+
+from libs.representation import dumps
+from models import ArticleModel
+from schemas.article import ArticleSchema
+from settings.db import db
+
+
+def live_body(app, article: ArticleModel) -> bytes:
+    """Body of article dumped and encoded on request, the way every other response is."""
+    with app.test_request_context():
+        return (dumps(ArticleSchema().dump(ArticleModel.find_by_slug(article.slug))) + "\n").encode("utf-8")
+
+
+def test_rendered_article_is_identical_to_live_dump(app, client, make_article):
+    # default config runs with DEBUG, responses must not depend on it
+    assert app.debug
+    article = make_article("Rendered", tags=["python", "flask"], content=[
+        {"paragraph_title": "Zażółć", "content": "Ünicode and \"quotes\"",
+         "code": {"language": "python", "content": "print('\\t')"}},
+    ])
+
+    rendered = client.get("/api/v1/articles/{}".format(article.slug))
+    assert rendered.status_code == 200
+    assert rendered.get_data() == live_body(app, article)
+
+    # published before rendering existed, dumped on request
+    ArticleModel.query.filter_by(id=article.id).update({"rendered": None})
+    db.session.commit()
+    # other query string, so it isn't served from response cache
+    fallback = client.get("/api/v1/articles/{}?fallback=1".format(article.slug))
+    assert fallback.get_data() == live_body(app, article)
+
+
+def test_upload_to_article_with_malformed_content_is_rejected(app, client, make_user, login, make_article):
+    article = make_article("Malformed")
+    # written around the model, e.g. by hand
+    ArticleModel.query.filter_by(id=article.id).update({"content": [{"content": "No paragraph title"}]})
+    db.session.commit()
+    headers = login("author")
+
+    response = client.put("/api/v1/articles/{}/image".format(article.slug), headers=headers,
+                          data={"image": (io.BytesIO(b"not really a picture"), "picture.png")},
+                          content_type="multipart/form-data")
+    assert response.status_code == 400
+    assert "paragraph_title" in response.get_json()["0"]
+
+
+def test_highlighted_article_is_encoded_like_rendered_one(client, make_article):
+    article = make_article("Highlighted")
+    response = client.get("/api/v1/articles/{}?highlight=1".format(article.slug))
+    data = response.get_json()
+    assert data["content"][0]["code"]["highlighted"]
+    assert response.get_data() == (dumps(data) + "\n").encode("utf-8")
+
+
+def test_other_responses_keep_flask_restful_encoding(app, client, make_snippet):
+    make_snippet("Encoded snippet")
+    response = client.get("/api/v1/snippets/encoded-snippet")
+    with app.test_request_context():
+        expected = restful_output_json(response.get_json(), 200).get_data()
+    assert response.get_data() == expected
@@ -0,0 +1,48 @@
+def test_repeated_request_is_served_from_cache(client, make_article):
+    make_article("Cached article")
+
+    first = client.get("/api/v1/articles?limit=5&sort=desc")
+    assert first.headers["X-Cache"] == "MISS"
+    # order of query arguments doesn't matter
+    second = client.get("/api/v1/articles?sort=desc&limit=5")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.get_json() == first.get_json()
+
+
+def test_model_writes_invalidate_cached_responses(client, make_article, make_snippet):
+    article = make_article("First article")
+    snippet = make_snippet("Cached snippet")
+    client.get("/api/v1/articles")
+    client.get("/api/v1/snippets/{}".format(snippet.slug))
+
+    make_article("Second article")
+    response = client.get("/api/v1/articles")
+    assert response.headers["X-Cache"] == "MISS"
+    assert [item["title"] for item in response.get_json()] == ["Second article", "First article"]
+
+    article.unpublish()
+    response = client.get("/api/v1/articles")
+    assert response.headers["X-Cache"] == "MISS"
+    assert [item["title"] for item in response.get_json()] == ["Second article"]
+
+    # snippets have their own namespace, article writes left them cached
+    assert client.get("/api/v1/snippets/{}".format(snippet.slug)).headers["X-Cache"] == "HIT"
+    snippet.revoke_approval()
+    assert client.get("/api/v1/snippets/{}".format(snippet.slug)).status_code == 404
+
+
+def test_error_responses_are_not_cached(client):
+    assert client.get("/api/v1/articles/missing").status_code == 404
+    response = client.get("/api/v1/articles/missing")
+    assert response.headers["X-Cache"] == "MISS"
+
+
+def test_cached_next_page_link_is_relative(client, make_article):
+    make_article("First article")
+    make_article("Second article")
+
+    first = client.get("/api/v1/articles?limit=1", base_url="https://blog.example.com")
+    second = client.get("/api/v1/articles?limit=1", base_url="http://localhost")
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.headers["Link"] == first.headers["Link"]
+    assert first.headers["Link"].startswith("</api/v1/articles?")
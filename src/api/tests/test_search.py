@@ -0,0 +1,17 @@
+def test_search_highlights_escape_authored_html(client, make_article, make_snippet):
+    make_article("Scripted <b>title</b>", content=[{
+        "paragraph_title": "Payload", "content": "alert <script>alert('xss')</script> & more",
+    }])
+    make_snippet("Snippet with markup", code="document.write('<img src=x onerror=alert(1)>') // alert")
+
+    response = client.get("/api/v1/search?q=alert")
+    assert response.status_code == 200
+    results = response.get_json()
+    assert len(results) == 2
+    for result in results:
+        highlights = result["highlights"]["title"] + result["highlights"]["body"]
+        assert "<mark>alert</mark>" in highlights
+        assert "<script>" not in highlights and "<img" not in highlights and "<b>" not in highlights
+    article = next(result for result in results if result["type"] == "article")
+    assert "&lt;script&gt;<mark>alert</mark>(&#x27;xss&#x27;)&lt;/script&gt; &amp; more" in article["highlights"]["body"]
+    assert article["highlights"]["title"] == "Scripted &lt;b&gt;title&lt;/b&gt;"
@@ -0,0 +1,79 @@
+import json
+from datetime import datetime
+
+import pytest
+from marshmallow import Schema
+
+from models import ArticleModel, SnippetModel, TagModel, UserModel
+from schemas.article import ArticleSchema
+from schemas.snippet import SnippetSchema
+
+
+def reflective_and_compiled(schema_class, objects):
+    """JSON of objects dumped by plain marshmallow and by compiled dump of the same schema."""
+    schema = schema_class(many=True)
+    expected = json.dumps(Schema.dump(schema, objects, many=True))
+    actual = json.dumps(schema.dump(objects))
+    single = [json.dumps(schema_class().dump(obj)) for obj in objects]
+    return expected, actual, "[" + ", ".join(single) + "]"
+
+
+def make_articles():
+    date = datetime(2020, 1, 2, 3, 4, 5, 678)
+    tags = [TagModel(id=1, name="python", updated_date=date), TagModel(id=2, name="flask", updated_date=None)]
+    author = UserModel(id=7, username="author", email="author@example.com", created_date=date, active=True)
+    full = ArticleModel(
+        id=1, author_id=author.id, title="Full", description="All fields", created_date=date,
+        published_date=date, updated_date=date, image_url="image.png", image_variants={"small": "image-small.png"},
+        likes_count=3, content=[
+            {"paragraph_title": "Code", "content": "Text", "code": {"language": "python", "content": "x = 1"}},
+            {"paragraph_title": "Image", "content": "Text", "image": {"url": "http://example.com/a.png",
+                                                                       "description": "A"}},
+            {"paragraph_title": "Plain", "content": "Text", "code": None},
+            {"paragraph_title": "No language", "content": "Text", "code": {"content": "x = 2"}},
+        ],
+    )
+    full.author = author
+    full.tags = tags
+    # draft of unknown author, every optional field left empty
+    bare = ArticleModel(id=2, author_id=None, title="Bare", description="Nothing else", created_date=None,
+                        published_date=None, updated_date=None, image_url=None, image_variants=None,
+                        likes_count=0, content=[])
+    bare.tags = []
+    no_content = ArticleModel(id=3, title="No content", description="Content is null", content=None)
+    no_content.tags = tags[:1]
+    return [full, bare, no_content]
+
+
+def make_snippets():
+    date = datetime(2020, 1, 2, 3, 4, 5)
+    tagged = SnippetModel(id=1, title="Tagged", description="Has tags", code="print(1)\n", language="python",
+                          author="author", created_date=date, published_date=date, updated_date=date)
+    tagged.tags = [TagModel(id=1, name="python", updated_date=date), TagModel(id=2, name="flask")]
+    bare = SnippetModel(id=2, title="Bare", description="", code="", language="text", author="",
+                        created_date=None, published_date=None, updated_date=None)
+    bare.tags = []
+    return [tagged, bare]
+
+
+@pytest.mark.parametrize("schema_class, make_objects", [
+    (ArticleSchema, make_articles),
+    (SnippetSchema, make_snippets),
+])
+def test_compiled_dump_matches_marshmallow(app, schema_class, make_objects):
+    with app.test_request_context():
+        expected, actual, single = reflective_and_compiled(schema_class, make_objects())
+    assert actual == expected
+    assert single == expected
+
+
+def test_compiled_dump_matches_marshmallow_for_saved_items(client, make_user, make_article, make_snippet):
+    make_article("Published", tags=["python", "flask"])
+    make_article("Draft", author=make_user("other"), tags=[], content=[], published=False)
+    make_snippet("Published snippet", tags=["python"])
+    make_snippet("Draft snippet", tags=[], published=False)
+    with client.application.test_request_context():
+        for schema_class, model in ((ArticleSchema, ArticleModel), (SnippetSchema, SnippetModel)):
+            expected, actual, single = reflective_and_compiled(schema_class, model.query_for_dump().all())
+            assert actual == expected
+            assert single == expected
@@ -0,0 +1,49 @@
+import importlib.util
+import os
+
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+from models import ArticleModel
+from settings.db import db
+
+MIGRATION = os.path.join(os.path.dirname(__file__), os.pardir, "migrations", "versions", "5d1afcfce574_.py")
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location("slug_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class OnlineContext:
+    @staticmethod
+    def is_offline_mode() -> bool:
+        return False
+
+
+def test_backfill_gives_unique_slugs(app, monkeypatch):
+    migration = load_migration()
+    monkeypatch.setattr(migration, "context", OnlineContext)
+    titles = ["Hello", "Hello 3", "Hello!", "!!!", "???", "4"]
+    with db.engine.begin() as connection:
+        connection.execute(sa.text("CREATE TABLE legacy (id INTEGER PRIMARY KEY, title TEXT, slug TEXT)"))
+        connection.execute(sa.text("INSERT INTO legacy (title) VALUES (:title)"), [{"title": t} for t in titles])
+        with Operations.context(MigrationContext.configure(connection)):
+            migration._backfill_slugs("legacy")
+        slugs = [slug for (slug,) in connection.execute(sa.text("SELECT slug FROM legacy ORDER BY id"))]
+
+    assert slugs == ["hello", "hello-3", "hello-3-2", "4", "5", "4-6"]
+
+
+def test_title_without_slug_is_rejected(client, make_user, login, make_article):
+    article = make_article("Renamed article")
+    make_user("editor")
+
+    response = client.post("/api/v1/articles/{}/new-title".format(article.slug), json={"title": "!!!"},
+                           headers=login("editor"))
+    assert response.status_code == 400
+    assert "title" in response.get_json()
+    assert ArticleModel.find_by_slug("renamed-article").title == "Renamed article"
@@ -0,0 +1,64 @@
+from models import ArticleModel, SnippetModel, TagModel
+from settings.db import db
+
+
+def counts() -> dict:
+    db.session.expire_all()
+    return {tag.name: (tag.articles_count, tag.snippets_count)
+            for tag in TagModel.query.order_by(TagModel.name) if tag.articles_count or tag.snippets_count}
+
+
+def assert_counts(app, expected: dict) -> None:
+    """Counters kept by write paths are the expected ones and the same as recount computes."""
+    assert counts() == expected
+    result = app.test_cli_runner().invoke(args=["tags", "recount"])
+    assert result.exit_code == 0, result.output
+    assert counts() == expected
+
+
+def test_counts_follow_publishing_tagging_and_deleting(app, make_article, make_snippet):
+    make_article("Tagged article", tags=["python", "flask"])
+    make_article("Draft article", tags=["python"], published=False)
+    make_snippet("Tagged snippet", tags=["python", "go"])
+    make_snippet("Draft snippet", tags=["rust"], published=False)
+    assert_counts(app, {"flask": (1, 0), "go": (0, 1), "python": (1, 1)})
+
+    # recount runs in its own app context, items are loaded again after it
+    ArticleModel.find_by_slug("draft-article").publish()
+    assert_counts(app, {"flask": (1, 0), "go": (0, 1), "python": (2, 1)})
+
+    ArticleModel.find_by_slug("tagged-article").unpublish()
+    assert_counts(app, {"go": (0, 1), "python": (1, 1)})
+
+    article = ArticleModel.find_by_slug("draft-article")
+    article.tags = TagModel.get_or_create_many(["flask", "sql"])
+    article.save_to_db()
+    assert_counts(app, {"flask": (1, 0), "go": (0, 1), "python": (0, 1), "sql": (1, 0)})
+
+    SnippetModel.find_by_slug("tagged-snippet").revoke_approval()
+    assert_counts(app, {"flask": (1, 0), "sql": (1, 0)})
+    SnippetModel.find_by_slug("tagged-snippet").approve()
+    assert_counts(app, {"flask": (1, 0), "go": (0, 1), "python": (0, 1), "sql": (1, 0)})
+
+    ArticleModel.find_by_slug("draft-article").delete_from_db()
+    SnippetModel.find_by_slug("tagged-snippet").delete_from_db()
+    assert_counts(app, {})
+
+
+def test_tag_listing_and_tagged_items(client, make_article, make_snippet):
+    make_article("Flask article", tags=["python", "flask"])
+    make_article("Draft article", tags=["python"], published=False)
+    make_snippet("Python snippet", tags=["python"])
+
+    response = client.get("/api/v1/tags")
+    assert response.get_json() == [
+        {"name": "python", "articles_count": 1, "snippets_count": 1},
+        {"name": "flask", "articles_count": 1, "snippets_count": 0},
+    ]
+    assert [tag["name"] for tag in client.get("/api/v1/tags?sort=name&type=snippet").get_json()] == ["python"]
+
+    articles = client.get("/api/v1/tags/python/articles").get_json()
+    assert [article["title"] for article in articles] == ["Flask article"]
+    snippets = client.get("/api/v1/tags/python/snippets").get_json()
+    assert [snippet["title"] for snippet in snippets] == ["Python snippet"]
+    assert client.get("/api/v1/tags/unknown/articles").status_code == 404
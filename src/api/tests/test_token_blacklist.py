@@ -0,0 +1,19 @@
+from datetime import datetime, timedelta
+
+from models.revoked_token import RevokedTokenModel
+from settings.blacklist import blacklist
+
+
+def test_revoking_twice_keeps_one_entry(app):
+    expires_date = datetime.utcnow() + timedelta(hours=1)
+    blacklist.backend.revoke("revoked-jti", expires_date)
+    blacklist.backend.revoke("revoked-jti", expires_date)
+    assert RevokedTokenModel.query.filter_by(jti="revoked-jti").count() == 1
+    assert blacklist.is_revoked("revoked-jti")
+
+
+def test_logged_out_token_is_rejected(client, make_user, login):
+    make_user("reader")
+    headers = login("reader")
+    assert client.post("/api/v1/logout", headers=headers).status_code == 200
+    assert client.post("/api/v1/logout", headers=headers).status_code == 401
@@ -0,0 +1,88 @@
+import base64
+import io
+from contextlib import contextmanager
+
+import pytest
+from flask_restful import Resource
+from sqlalchemy import event
+
+from libs.blueprint import api_blueprint
+from libs.unit_of_work import after_commit
+from models import ArticleModel, TagModel
+from settings.db import db
+
+PNG = base64.b64decode("iVBORw0KGgoAAAANSUhEUgAAAAIAAAACCAIAAAD91JpzAAAAFklEQVR4nGM8ISfHwMDAxMDAwMDAAAANBAEIfXHKZgAAAABJRU5ErkJggg==")
+
+
+@contextmanager
+def count_commits():
+    commits = []
+
+    def on_commit(connection):
+        commits.append(connection)
+
+    event.listen(db.engine, "commit", on_commit)
+    try:
+        yield commits
+    finally:
+        event.remove(db.engine, "commit", on_commit)
+
+
+@pytest.fixture
+def failing_views(app):
+    """Views which add a tag and then fail, callbacks they registered are recorded."""
+    called = []
+
+    class Rejected(Resource):
+        @classmethod
+        def post(cls):
+            TagModel(name="rejected").save_to_db()
+            after_commit(called.append, "rejected")
+            return {"message": "Rejected"}, 400
+
+    class Broken(Resource):
+        @classmethod
+        def post(cls):
+            TagModel(name="broken").save_to_db()
+            after_commit(called.append, "broken")
+            raise RuntimeError("view failed after writing")
+
+    class Accepted(Resource):
+        @classmethod
+        def post(cls):
+            TagModel(name="accepted").save_to_db()
+            after_commit(called.append, "accepted")
+            return {"message": "Accepted"}, 201
+
+    blueprint, api = api_blueprint("failing", __name__)
+    api.add_resource(Rejected, "/test/rejected")
+    api.add_resource(Broken, "/test/broken")
+    api.add_resource(Accepted, "/test/accepted")
+    app.register_blueprint(blueprint)
+    return called
+
+
+def test_write_request_commits_once(client, make_user, login, make_article):
+    slug = make_article("Illustrated article").slug
+    make_user("editor")
+    headers = login("editor")
+
+    with count_commits() as commits:
+        response = client.put("/api/v1/articles/{}/image".format(slug), headers=headers,
+                              data={"image": (io.BytesIO(PNG), "picture.png")})
+    assert response.status_code == 201
+    # image reference and article together, then variants, which tests generate
+    # in the request once it's committed
+    assert len(commits) == 2
+    assert ArticleModel.find_by_slug(slug).image_url.endswith(".png")
+
+
+def test_failed_views_leave_nothing_behind(app, client, failing_views):
+    app.config["PROPAGATE_EXCEPTIONS"] = False
+
+    assert client.post("/api/v1/test/rejected").status_code == 400
+    assert client.post("/api/v1/test/broken").status_code == 500
+    assert client.post("/api/v1/test/accepted").status_code == 201
+
+    assert [tag.name for tag in TagModel.query] == ["accepted"]
+    assert failing_views == ["accepted"]